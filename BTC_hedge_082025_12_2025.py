@@ -3,8 +3,13 @@ import numpy as np
 from scipy.stats import norm
 import matplotlib.pyplot as plt
 
+from stage_profiler import profiler_from_env
+
+PROFILE = profiler_from_env('BTC_hedge_082025_12_2025')
+
 print("DYNAMIC BTC HEDGING BACKTEST - Option 3")
 
+PROFILE.begin('load_kalshi')
 kalshi = pd.read_csv('/Users/aaditjerfy/Downloads/Implicit Event Forecasting /kalshi-price-history-kxbtcmaxm-aug25-minute.csv')
 
 SELECTED_STRIKE = '$130000 or above'
@@ -20,6 +25,7 @@ print(f"  Date range: {kalshi['timestamp'].min()} to {kalshi['timestamp'].max()}
 print(f"  Market: Will BTC max reach ${STRIKE:,} or above in August 2025?")
 
 
+PROFILE.begin('load_btc')
 btc = pd.read_csv('BTC_1min_2025.csv')
 btc['timestamp'] = pd.to_datetime(btc['timestamp']).dt.tz_localize(None)
 btc = btc[['timestamp', 'close', 'high', 'low']].copy()
@@ -28,6 +34,7 @@ btc.columns = ['timestamp', 'btc_price', 'btc_high', 'btc_low']
 print(f"\n Loaded BTC data: {len(btc)} data points")
 print(f"  Date range: {btc['timestamp'].min()} to {btc['timestamp'].max()}")
 
+PROFILE.begin('merge_asof')
 # Merge on timestamp (use forward-fill for missing Kalshi data)
 df = pd.merge_asof(
     btc.sort_values('timestamp'),
@@ -71,6 +78,7 @@ def calculate_actual_probability(current_price, strike, days_to_expiry, volatili
     
     return prob
 
+PROFILE.begin('probability')
 EXPIRY_DATE = pd.Timestamp('2025-08-31')
 df['days_to_expiry'] = (EXPIRY_DATE - df['timestamp']).dt.total_seconds() / 86400
 
@@ -93,6 +101,7 @@ print(f"  Mean actual prob: {df['actual_prob'].mean():.2%}")
 print(f"  Mean mispricing: {df['prob_mispricing'].mean():.2%}")
 
 
+PROFILE.begin('signals')
 STRONG_THRESHOLD = 0.15
 WEAK_THRESHOLD = 0.05
 NEUTRAL_THRESHOLD = 0.02
@@ -133,6 +142,7 @@ print(f"  Neutral zone: ±{NEUTRAL_THRESHOLD:.1%} → 0x position")
 print(f"  Total trades: {num_trades}")
 
 
+PROFILE.begin('pnl')
 INITIAL_CAPITAL = 10000
 CONTRACTS = 100
 
@@ -231,7 +241,10 @@ print(f"\n  Best Strategy: {results.loc[results['Total P&L'].idxmax(), 'Strategy
 print(f"  Outperformance vs Unhedged: ${results['Total P&L'].max() - strategy_a_pnl:,.2f}")
 
 
+PROFILE.begin('write_csv')
 df.to_csv('dynamic_hedge_backtest_results.csv', index=False)
 print(f"\n  Saved detailed results to: dynamic_hedge_backtest_results.csv")
 
 print("BACKTEST COMPLETE")
+
+PROFILE.finish()
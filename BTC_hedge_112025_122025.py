@@ -3,8 +3,13 @@ import numpy as np
 from scipy.stats import norm
 import matplotlib.pyplot as plt
 
+from stage_profiler import profiler_from_env
+
+PROFILE = profiler_from_env('BTC_hedge_112025_122025')
+
 print("DYNAMIC BTC HEDGING BACKTEST - Option 3")
 
+PROFILE.begin('load_kalshi')
 kalshi = pd.read_csv('/Users/aaditjerfy/Downloads/Implicit Event Forecasting /kalshi-price-history-kxbtc2025100-25dec31-minute.csv')
 
 STRIKE = 100000
@@ -17,6 +22,7 @@ print(f"\n Loaded Kalshi data: {len(kalshi)} data points")
 print(f"  Date range: {kalshi['timestamp'].min()} to {kalshi['timestamp'].max()}")
 print(f"  Market: Will BTC close above ${STRIKE:,} on Dec 31, 2025?")
 
+PROFILE.begin('load_btc')
 btc = pd.read_csv('BTC_1min_2025.csv')
 btc['timestamp'] = pd.to_datetime(btc['timestamp']).dt.tz_localize(None)
 btc = btc[['timestamp', 'close', 'high', 'low']].copy()
@@ -25,6 +31,7 @@ btc.columns = ['timestamp', 'btc_price', 'btc_high', 'btc_low']
 print(f"\n Loaded BTC data: {len(btc)} data points")
 print(f"  Date range: {btc['timestamp'].min()} to {btc['timestamp'].max()}")
 
+PROFILE.begin('merge_asof')
 # Merge on timestamp (use forward-fill for missing Kalshi data)
 df = pd.merge_asof(
     btc.sort_values('timestamp'),
@@ -65,6 +72,7 @@ def calculate_actual_probability(current_price, strike, days_to_expiry, volatili
     
     return prob
 
+PROFILE.begin('probability')
 EXPIRY_DATE = pd.Timestamp('2025-12-31')
 df['days_to_expiry'] = (EXPIRY_DATE - df['timestamp']).dt.total_seconds() / 86400
 
@@ -88,6 +96,7 @@ print(f"  Mean actual prob: {df['actual_prob'].mean():.2%}")
 print(f"  Mean mispricing: {df['prob_mispricing'].mean():.2%}")
 
 
+PROFILE.begin('signals')
 # Signal thresholds for scaled positions
 STRONG_THRESHOLD = 0.15
 WEAK_THRESHOLD = 0.05
@@ -133,6 +142,7 @@ print(f"  Total trades: {num_trades}")
 # Strategy B: Static Hedge (buy BTC + short Yes at start, hold to expiry)
 # Strategy C: Dynamic Hedge (buy BTC + trade Yes contracts based on signals)
 
+PROFILE.begin('pnl')
 INITIAL_CAPITAL = 10000
 CONTRACTS = 100
 
@@ -227,7 +237,10 @@ print(results.to_string(index=False))
 print(f"\n  Best Strategy: {results.loc[results['Total P&L'].idxmax(), 'Strategy']}")
 print(f"  Outperformance vs Unhedged: ${results['Total P&L'].max() - strategy_a_pnl:,.2f}")
 
+PROFILE.begin('write_csv')
 df.to_csv('dynamic_hedge_backtest_results.csv', index=False)
 print(f"\n  Saved detailed results to: dynamic_hedge_backtest_results.csv")
 
 print("BACKTEST COMPLETE")
+
+PROFILE.finish()
@@ -0,0 +1,159 @@
+"""
+N-Way As-Of Alignment
+=====================
+The hedge scripts line up exactly two series with one
+pd.merge_asof(btc, kalshi, direction='backward'), and the ERA5 comparison
+does not line up Kalshi and ERA5 at all. align_asof joins any number of
+time series (several Kalshi markets, BTC spot, ERA5 hourly observations)
+onto one clock in a single pass per source.
+
+For every clock time each source contributes its last row at or before that
+time (backward as-of, like the scripts' merge_asof). Per source you can set
+a staleness limit, beyond which the value is treated as missing, and choose
+whether empty cells are skipped (each column then uses its own last
+non-missing value, like the ffill in ladder_hedge.merge_btc_ladder).
+
+Inputs are checked for order in O(n) and only sorted when they are not
+already in time order; the lookups are searchsorted calls on the sorted
+times, so a panel costs one pass over each source plus O(log n) per clock
+row and source.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from compact_prices import NS_PER_MINUTE
+
+
+def _as_ns(timestamps):
+    values = timestamps.values if isinstance(timestamps, (pd.Series, pd.Index)) else timestamps
+    return np.asarray(values).astype('datetime64[ns]').astype(np.int64)
+
+
+@dataclass
+class Source:
+    """
+    One time series to align.
+
+    Attributes:
+        name: Prefix for the output columns ("name:column")
+        frame: DataFrame holding a time column and numeric value columns
+        time_column: Name of the time column ('timestamp' for Kalshi/BTC, 'time' for ERA5)
+        columns: Value columns to bring over (default: all but the time column)
+        max_staleness: Oldest acceptable value, as a pandas Timedelta or
+            string like '90min' (default: no limit)
+        skip_missing: Let each column fall back to its last non-missing value
+    """
+    name: str
+    frame: pd.DataFrame
+    time_column: str = 'timestamp'
+    columns: list = None
+    max_staleness: object = None
+    skip_missing: bool = False
+
+    def prepared(self):
+        """(times_ns, values, columns) in time order, sorting only if needed."""
+        columns = self.columns or [c for c in self.frame.columns if c != self.time_column]
+        times = _as_ns(self.frame[self.time_column])
+        values = self.frame[columns].to_numpy(dtype=float)
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        return times, values, columns
+
+
+def _asof_pick(times, values, clock, limit):
+    """
+    Rows of `values` as of each clock time, NaN where there is none or it is
+    older than `limit` ns.
+
+    Returns:
+        (picked, age) with picked shaped (clock, columns) and age in ns
+        (NaN where nothing was picked)
+    """
+    picked = np.full((len(clock), values.shape[1]), np.nan)
+    age = np.full(len(clock), np.nan)
+    if not len(times):
+        return picked, age
+    rows = np.searchsorted(times, clock, side='right') - 1
+    found = rows >= 0
+    rows = rows[found]
+    age[found] = clock[found] - times[rows]
+    if limit is not None:
+        fresh = age[found] <= limit
+        found[found] = fresh
+        rows = rows[fresh]
+        age[~found] = np.nan
+    picked[found] = values[rows]
+    return picked, age
+
+
+def union_clock(sources):
+    """Sorted, de-duplicated union of every source's timestamps (datetime64[ns])."""
+    return np.unique(np.concatenate([_as_ns(s.frame[s.time_column]) for s in sources])).astype('datetime64[ns]')
+
+
+def align_asof(clock, sources, include_age=False):
+    """
+    As-of join many sources onto one clock.
+
+    Parameters:
+    - clock: Sorted timestamps to sample at (e.g. BTC minutes, a
+      pd.date_range grid, or union_clock(sources))
+    - sources: List of Source
+    - include_age: Also output "name:age_minutes", the age of each source's
+      latest row (any column) at every clock time
+
+    Returns:
+        DataFrame with 'timestamp' plus one "name:column" per source column;
+        NaN where a source has no row yet or its row is too stale
+    """
+    clock_ns = _as_ns(clock)
+    if len(clock_ns) > 1 and np.any(clock_ns[1:] < clock_ns[:-1]):
+        raise ValueError("clock must be in time order")
+
+    out = {'timestamp': clock_ns.astype('datetime64[ns]')}
+    for source in sources:
+        times, values, columns = source.prepared()
+        limit = None if source.max_staleness is None else pd.Timedelta(source.max_staleness).value
+
+        if source.skip_missing:
+            # Each column as of its own last non-missing cell
+            for j, name in enumerate(columns):
+                valid = ~np.isnan(values[:, j])
+                picked, _ = _asof_pick(times[valid], values[valid, j:j + 1], clock_ns, limit)
+                out[f'{source.name}:{name}'] = picked[:, 0]
+        else:
+            picked, _ = _asof_pick(times, values, clock_ns, limit)
+            for j, name in enumerate(columns):
+                out[f'{source.name}:{name}'] = picked[:, j]
+        if include_age:
+            _, age = _asof_pick(times, values[:, :0], clock_ns, limit)
+            out[f'{source.name}:age_minutes'] = age / NS_PER_MINUTE
+    return pd.DataFrame(out)
+
+
+def main():
+    """Align the NY snow ladder, the NY snow market and ERA5 on one clock"""
+    from ladders import load_price_history
+
+    storm = load_price_history('kalshi-price-history-kxsnowstorm-26jannyc-minute.csv')
+    monthly = load_price_history('kalshi-price-history-kxnycsnowm-26jan-minute.csv')
+    era5 = pd.read_csv('NY_SNOW_ERA.csv', parse_dates=['time'])
+
+    sources = [
+        Source('storm', storm, skip_missing=True),
+        Source('monthly', monthly, skip_missing=True),
+        Source('era5', era5, time_column='time', max_staleness='90min'),
+    ]
+    start = max(storm['timestamp'].iloc[0], monthly['timestamp'].iloc[0])
+    clock = pd.date_range(start.ceil('15min'), storm['timestamp'].iloc[-1], freq='15min')
+    panel = align_asof(clock, sources, include_age=True)
+    print(panel.iloc[:, [0, 1, 5, 12, 13, -2, -1]].head(12).to_string())
+    print(f"\n  {len(panel):,} rows x {panel.shape[1] - 1} columns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Barrier ("Max Reaches") Monte Carlo
+===================================
+Prices KXBTCMAXM / BTCMAXY style markets, which settle YES if BTC's maximum
+reaches the strike before expiry. calculate_actual_probability in the hedge
+scripts uses the terminal-price BSM formula, which understates these.
+
+Paths are simulated in chunks of log-return increments (GBM with r=0, or
+bootstrapped from historical returns) with antithetic variates. One set of
+paths serves every start time and strike: the running maximum of the
+cumulative log-return is read off at each start's horizon and compared with
+ln(K / S) for all strikes at once. Each chunk has its own SeedSequence child,
+so results depend only on the seed and chunk size, not on how chunks are
+spread over worker processes.
+
+The barrier is monitored at the simulation step (steps_per_day), so results
+sit slightly below the continuous-monitoring closed form.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import norm
+
+from hedge_backtest import calculate_actual_probability
+
+DEFAULT_STEPS_PER_DAY = 24
+
+
+def barrier_probability_closed_form(spot, strike, days_to_expiry, volatility=0.60):
+    """
+    Continuous-monitoring probability that a zero-rate GBM touches strike.
+
+    Reflection formula with log drift mu = -sigma^2 / 2. Works on arrays.
+    """
+    spot = np.asarray(spot, dtype=float)
+    T = np.maximum(np.asarray(days_to_expiry, dtype=float), 0) / 365.0
+    b = np.log(strike / spot)
+    mu = -0.5 * volatility**2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sd = volatility * np.sqrt(T)
+        prob = norm.cdf((-b + mu * T) / sd) + np.exp(2 * mu * b / volatility**2) * norm.cdf((-b - mu * T) / sd)
+    return np.where(b <= 0, 1.0, np.where(T > 0, prob, 0.0))
+
+
+def _increments(rng, n_paths, n_steps, volatility, steps_per_day, returns_pool):
+    """Antithetic log-return increments, shape (n_paths, n_steps)."""
+    half = (n_paths + 1) // 2
+    if returns_pool is None:
+        dt = 1.0 / (365.0 * steps_per_day)
+        z = rng.standard_normal((half, n_steps))
+        drift = -0.5 * volatility**2 * dt
+        shock = volatility * np.sqrt(dt) * z
+        inc = np.vstack([drift + shock, drift - shock])
+    else:
+        pool = np.asarray(returns_pool, dtype=float)
+        mean = pool.mean()
+        draws = pool[rng.integers(0, len(pool), size=(half, n_steps))]
+        inc = np.vstack([draws, 2 * mean - draws])
+    return inc[:n_paths]
+
+
+def _chunk_hits(args):
+    """Hit counts (starts x strikes) for one chunk of paths."""
+    (seed, n_paths, horizon_steps, log_barriers, volatility, steps_per_day, returns_pool) = args
+    rng = np.random.default_rng(seed)
+    n_steps = int(horizon_steps.max()) if len(horizon_steps) else 0
+    hits = np.zeros(log_barriers.shape, dtype=np.int64)
+    if n_steps == 0:
+        return hits + (log_barriers <= 0) * n_paths
+
+    inc = _increments(rng, n_paths, n_steps, volatility, steps_per_day, returns_pool)
+    running_max = np.maximum.accumulate(np.cumsum(inc, axis=1), axis=1)
+    # Max log-return up to each start's horizon; 0 steps means no move
+    at_horizon = np.where(horizon_steps[None, :] > 0,
+                          running_max[:, np.maximum(horizon_steps - 1, 0)], -np.inf)
+
+    # Already-settled barriers are -inf, so every path counts as a hit
+    for j in range(log_barriers.shape[1]):
+        hits[:, j] = (at_horizon >= log_barriers[:, j][None, :]).sum(axis=0)
+    return hits
+
+
+def _plan(spots, days_to_expiry, strikes, running_max, steps_per_day):
+    spots = np.atleast_1d(np.asarray(spots, dtype=float))
+    days = np.broadcast_to(np.asarray(days_to_expiry, dtype=float), spots.shape)
+    strikes = np.atleast_1d(np.asarray(strikes, dtype=float))
+    horizon_steps = np.ceil(np.maximum(days, 0) * steps_per_day).astype(np.int64)
+    # Distance to each barrier from the higher of spot and the max already set
+    level = spots if running_max is None else np.maximum(spots, np.asarray(running_max, dtype=float))
+    log_barriers = np.log(strikes[None, :] / spots[:, None])
+    log_barriers = np.where(level[:, None] >= strikes[None, :], -np.inf, log_barriers)
+    return horizon_steps, log_barriers
+
+
+def _chunk_args(n_paths, chunk_paths, seed, horizon_steps, log_barriers,
+                volatility, steps_per_day, returns_pool):
+    sizes = [chunk_paths] * (n_paths // chunk_paths)
+    if n_paths % chunk_paths:
+        sizes.append(n_paths % chunk_paths)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [(s, size, horizon_steps, log_barriers, volatility, steps_per_day, returns_pool)
+            for s, size in zip(seeds, sizes)]
+
+
+def barrier_probabilities(spots, days_to_expiry, strikes, volatility=0.60, n_paths=20000,
+                          steps_per_day=DEFAULT_STEPS_PER_DAY, returns_pool=None,
+                          running_max=None, chunk_paths=1000, seed=0, n_workers=1):
+    """
+    Probability that the max reaches each strike, for many start times.
+
+    Parameters:
+    - spots: BTC spot at each start time, shape (starts,)
+    - days_to_expiry: Days left at each start, shape (starts,) or scalar
+    - strikes: Barrier levels, shape (strikes,)
+    - volatility: Annualised vol for GBM paths (ignored with returns_pool)
+    - n_paths: Paths per start (shared across starts and strikes)
+    - steps_per_day: Monitoring steps per day; returns_pool must be sampled
+      at the same frequency
+    - returns_pool: Optional historical log-returns to bootstrap from
+    - running_max: Max already reached at each start; strikes at or below it
+      are settled YES (probability 1)
+    - chunk_paths: Paths per chunk; peak memory is about
+      chunk_paths x max horizon steps x 24 bytes
+    - seed: Seed for the SeedSequence that spawns one stream per chunk
+    - n_workers: Processes to spread chunks over (1 = run in-process)
+
+    Returns:
+        Array (starts, strikes) of probabilities
+    """
+    horizon_steps, log_barriers = _plan(spots, days_to_expiry, strikes, running_max, steps_per_day)
+    jobs = _chunk_args(n_paths, chunk_paths, seed, horizon_steps, log_barriers,
+                       volatility, steps_per_day, returns_pool)
+
+    if n_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            counts = sum(pool.map(_chunk_hits, jobs))
+    else:
+        counts = sum(_chunk_hits(job) for job in jobs)
+    return counts / n_paths
+
+
+def main():
+    """Compare MC, closed-form barrier and terminal BSM probabilities"""
+    spots = np.array([95000.0, 105000.0, 115000.0])
+    days = np.array([30.0, 15.0, 3.0])
+    strikes = np.array([110000, 120000, 125000, 130000, 135000])
+
+    mc = barrier_probabilities(spots, days, strikes, n_paths=20000, seed=42)
+    closed = barrier_probability_closed_form(spots[:, None], strikes[None, :], days[:, None])
+    terminal = calculate_actual_probability(spots[:, None], strikes[None, :], days[:, None])
+
+    for i, spot in enumerate(spots):
+        print(f"\nSpot ${spot:,.0f}, {days[i]:.0f} days left")
+        print(f"  {'Strike':>10} {'MC max':>8} {'Closed':>8} {'Terminal':>9}")
+        for j, strike in enumerate(strikes):
+            print(f"  {strike:>10,} {mc[i, j]:>8.2%} {closed[i, j]:>8.2%} {terminal[i, j]:>9.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Benchmark Suite
+===============
+Timed runs of the pipeline stages on seeded synthetic data
+(synthetic_data.py), so performance changes show up as numbers instead of
+"the backtest feels slower":
+
+    load_btc_csv        hedge_backtest.load_btc_minutes on a year of minutes
+    load_ladder_csv     ladders.load_price_history on a sparse 7-strike ladder
+    merge_asof          hedge_backtest.merge_btc_kalshi (one strike)
+    merge_ladder        ladder_hedge.merge_btc_ladder (every strike)
+    align_asof          asof_align.align_asof (ladder + ERA5 on BTC minutes)
+    probability         calculate_actual_probability over minutes x strikes
+    signals             hedge_backtest.generate_signals (one strike)
+    ladder_signals      ladder_hedge.ladder_signals (every strike)
+    kalshi_pnl          hedge_backtest.dynamic_kalshi_pnl (one strike)
+    ladder_backtest     ladder_hedge.run_ladder_backtest
+    snow_settlement     snow_settlement.settle_snow_ladder
+    catalog_filter      the notebooks' duration/liquidity filter over the catalog
+    sizing_kelly        position_sizing.size_positions, Kelly, over the entry days
+    sizing_mean_var     the same with the mean-variance objective
+    lead_lag            lead_lag.lead_lag, lags -60..60 over every strike
+
+Each benchmark reports the best of --repeat runs (default 5) with the
+garbage collector paused, as timeit does. Baselines are stored per scale in
+benchmark_baseline.json; a run compares against them and exits with status
+1 when any benchmark is slower than baseline x (1 + tolerance) and by more
+than --min-ms (which keeps millisecond-scale stages from failing on timer
+noise).
+
+    python benchmarks.py --save               # record baselines on this machine
+    python benchmarks.py                      # small scale, compare
+    python benchmarks.py --scale full         # a year of minutes, 120k markets
+    python benchmarks.py --only merge_asof signals
+
+Baselines are machine-specific, so benchmark_baseline.json is not kept in
+git: record it with --save (per scale) on the machine that runs the
+comparison. Saving with --only updates just those benchmarks.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from asof_align import Source, align_asof
+from hedge_backtest import (HedgeConfig, calculate_actual_probability, days_to_expiry, dynamic_kalshi_pnl,
+                            generate_signals, load_btc_minutes, merge_btc_kalshi)
+from ladder_hedge import ladder_signals, merge_btc_ladder, run_ladder_backtest
+from ladders import bucket_columns, ladder_thresholds, load_price_history
+from lead_lag import lead_lag
+from position_sizing import calibrated_probability, event_legs, size_positions
+from snow_settlement import settle_snow_ladder
+from synthetic_data import (synthetic_btc_ladder, synthetic_btc_minutes, synthetic_catalog, synthetic_era5_snow,
+                            synthetic_era5_temperature, synthetic_event_entries, synthetic_snow_ladder)
+
+BASELINE_FILE = 'benchmark_baseline.json'
+
+SCALES = {
+    'small': {'days': 30, 'markets': 10_000},
+    'full': {'days': 366, 'markets': 120_000},
+}
+
+MIN_DURATION_HOURS = 120
+MIN_LIQUIDITY_DOLLARS = 100000
+
+
+def filter_catalog(markets, min_duration_hours=MIN_DURATION_HOURS, min_liquidity=MIN_LIQUIDITY_DOLLARS):
+    """The STEP 3 market filter of work.ipynb, as a function."""
+    selected = []
+    for market in markets:
+        open_time = datetime.fromisoformat(market['open_time'].replace('Z', '+00:00'))
+        close_time = datetime.fromisoformat(market['close_time'].replace('Z', '+00:00'))
+        duration_hours = (close_time - open_time).total_seconds() / 3600
+        liquidity = float(market.get('liquidity_dollars', '0'))
+        if duration_hours >= min_duration_hours and liquidity >= min_liquidity:
+            selected.append(market)
+    return selected
+
+
+class Workload:
+    """Synthetic inputs for one scale, written to CSV where the stage reads files."""
+
+    def __init__(self, scale, directory):
+        days = SCALES[scale]['days']
+        self.config = HedgeConfig(expiry='2024-12-31')
+        btc = synthetic_btc_minutes(days=days)
+        ladder = synthetic_btc_ladder(btc, expiry=self.config.expiry)
+        snow_era5 = synthetic_era5_snow()
+
+        self.btc_csv = os.path.join(directory, 'BTC_1min_bench.csv')
+        self.ladder_csv = os.path.join(directory, 'kalshi-price-history-bench-minute.csv')
+        btc.assign(timestamp=btc['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')).to_csv(self.btc_csv, index=False)
+        ladder.assign(timestamp=ladder['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')).to_csv(
+            self.ladder_csv, index=False, float_format='%.2f')
+
+        self.btc = load_btc_minutes(self.btc_csv)
+        self.ladder = load_price_history(self.ladder_csv)
+        self.columns = bucket_columns(self.ladder)
+        self.strikes = ladder_thresholds(self.columns)
+        self.ladder_01 = self.ladder.copy()
+        self.ladder_01[self.columns] = self.ladder_01[self.columns] / 100
+
+        strike = self.columns[3]
+        self.strike = self.strikes[3]
+        kalshi = self.ladder[['timestamp', strike]].dropna()
+        self.kalshi = pd.DataFrame({'timestamp': kalshi['timestamp'], 'market_price': kalshi[strike] / 100})
+        self.merged = merge_btc_kalshi(self.btc, self.kalshi)
+        self.merged_ladder = merge_btc_ladder(self.btc, self.ladder_01)
+
+        stamps = self.merged_ladder['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        self.days = days_to_expiry(stamps, self.config.expiry_ns)
+        self.spot = self.merged_ladder['btc_price'].to_numpy(dtype=float)
+        prob = calculate_actual_probability(self.spot[:, None], self.strikes[None, :], self.days[:, None],
+                                            self.config.volatility)
+        self.mispricing = prob - self.merged_ladder[self.columns].to_numpy(dtype=float)
+        self.mispricing_one = self.mispricing[:, 3]
+        self.signals_one = generate_signals(self.mispricing_one, self.config.strong_threshold,
+                                            self.config.weak_threshold, self.config.neutral_threshold)
+        self.prices_one = self.merged_ladder[self.columns[3]].to_numpy(dtype=float)
+
+        self.era5 = synthetic_era5_temperature(days=days)
+        self.snow_era5 = snow_era5
+        self.snow_ladder = synthetic_snow_ladder(snow_era5)
+        _, self.markets = synthetic_catalog(n_markets=SCALES[scale]['markets'])
+        self.legs = event_legs(synthetic_event_entries(days=days))
+        self.legs['prob'] = calibrated_probability(self.legs)
+
+    def benchmarks(self):
+        """name -> zero-argument callable."""
+        c = self.config
+        thresholds = (c.strong_threshold, c.weak_threshold, c.neutral_threshold)
+        return {
+            'load_btc_csv': lambda: load_btc_minutes(self.btc_csv),
+            'load_ladder_csv': lambda: load_price_history(self.ladder_csv),
+            'merge_asof': lambda: merge_btc_kalshi(self.btc, self.kalshi),
+            'merge_ladder': lambda: merge_btc_ladder(self.btc, self.ladder_01),
+            'align_asof': lambda: align_asof(self.btc['timestamp'], [
+                Source('kalshi', self.ladder_01, skip_missing=True),
+                Source('era5', self.era5, time_column='time', max_staleness='90min'),
+            ]),
+            'probability': lambda: calculate_actual_probability(
+                self.spot[:, None], self.strikes[None, :], self.days[:, None], c.volatility),
+            'signals': lambda: generate_signals(self.mispricing_one, *thresholds),
+            'ladder_signals': lambda: ladder_signals(self.mispricing, *thresholds),
+            'kalshi_pnl': lambda: dynamic_kalshi_pnl(self.prices_one, self.signals_one, c.contracts),
+            'ladder_backtest': lambda: run_ladder_backtest(self.merged_ladder, self.strikes, c),
+            'snow_settlement': lambda: settle_snow_ladder(self.snow_ladder, self.snow_era5),
+            'catalog_filter': lambda: filter_catalog(self.markets),
+            'sizing_kelly': lambda: size_positions(self.legs, event_cap=5000),
+            'sizing_mean_var': lambda: size_positions(self.legs, method='mean_variance', event_cap=5000),
+            'lead_lag': lambda: lead_lag({'bench': self.merged_ladder}, max_lag=60),
+        }
+
+
+def time_best(func, repeat):
+    """Best wall time of `repeat` calls, in seconds (GC paused while timing)."""
+    best = float('inf')
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def run_benchmarks(scale='small', repeat=3, only=None):
+    """
+    Build the workload for a scale and time every benchmark.
+
+    Returns:
+        dict of benchmark name -> best time in seconds
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        workload = Workload(scale, directory)
+        timings = {}
+        for name, func in workload.benchmarks().items():
+            if only and name not in only:
+                continue
+            timings[name] = time_best(func, repeat)
+            print(f"  {name:<18} {timings[name] * 1000:>10.1f} ms")
+    return timings
+
+
+def load_baselines(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(scale, timings, path=BASELINE_FILE):
+    """Store timings under the scale, keeping other scales' and benchmarks' baselines."""
+    baselines = load_baselines(path)
+    baselines.setdefault(scale, {}).update({name: round(seconds, 6) for name, seconds in timings.items()})
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(timings, baseline, tolerance, min_seconds=0.0):
+    """
+    Compare timings against a baseline.
+
+    A benchmark regresses when it is more than `tolerance` (relative) and
+    `min_seconds` (absolute) slower than its baseline.
+
+    Returns:
+        (DataFrame with baseline, current, ratio and status per benchmark,
+         list of regressed benchmark names)
+    """
+    rows = []
+    for name, seconds in timings.items():
+        base = baseline.get(name)
+        ratio = seconds / base if base else np.nan
+        slower = base is not None and ratio > 1 + tolerance and seconds - base > min_seconds
+        status = 'new' if base is None else ('SLOWER' if slower else 'ok')
+        rows.append({'benchmark': name, 'baseline_ms': base * 1000 if base else np.nan,
+                     'current_ms': seconds * 1000, 'ratio': ratio, 'status': status})
+    table = pd.DataFrame(rows).set_index('benchmark')
+    return table, list(table.index[table['status'] == 'SLOWER'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the pipeline stages on synthetic data")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.50,
+                        help="allowed slowdown before a benchmark fails (0.50 = 50%%)")
+    parser.add_argument('--min-ms', type=float, default=25.0,
+                        help="slowdowns smaller than this many ms never fail")
+    parser.add_argument('--save', action='store_true', help=f"store the timings in {BASELINE_FILE}")
+    parser.add_argument('--only', nargs='+', help="run only these benchmarks")
+    args = parser.parse_args()
+
+    print(f"BENCHMARKS ({args.scale}: {SCALES[args.scale]['days']} days, "
+          f"{SCALES[args.scale]['markets']:,} markets, best of {args.repeat})")
+    timings = run_benchmarks(args.scale, args.repeat, args.only)
+
+    if args.save:
+        save_baselines(args.scale, timings)
+        print(f"\n  Baselines for '{args.scale}' written to {BASELINE_FILE}")
+        return 0
+
+    baseline = load_baselines().get(args.scale)
+    if not baseline:
+        print(f"\n  No '{args.scale}' baseline in {BASELINE_FILE}; run with --save to record one")
+        return 0
+    table, regressed = compare(timings, baseline, args.tolerance, args.min_ms / 1000)
+    print()
+    print(table.to_string(float_format=lambda x: f'{x:.2f}'))
+    if regressed:
+        print(f"\n  REGRESSION (> {args.tolerance:.0%} slower): {', '.join(regressed)}")
+        return 1
+    print(f"\n  All benchmarks within {args.tolerance:.0%} of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Compact Minute Price Histories
+==============================
+Kalshi minute exports hold prices in cents with two decimals (89.50, 18.98)
+on whole-minute timestamps, yet pandas keeps them as float64 and
+datetime64[ns], and the BTC ladder and snow files are mostly empty cells.
+
+CompactHistory stores the same data as integers:
+
+- prices as uint16 hundredths of a cent (0..10000), with MISSING (65535)
+  for empty cells: 2 bytes per cell instead of 8
+- timestamps as int32 minutes since the Unix epoch: 4 bytes instead of 8
+
+Encoding is exact for any price with at most two decimals; anything else is
+rejected rather than silently rounded. Prices are decoded to float cents
+(NaN for missing) only when a column, row range or the whole panel is asked
+for, so many markets can be held and sliced in their compact form.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ladders import bucket_columns, load_price_history
+
+PRICE_SCALE = 100  # stored units per cent
+MISSING = np.iinfo(np.uint16).max
+NS_PER_MINUTE = 60 * 10**9
+
+
+def encode_prices(cents):
+    """
+    Encode float prices in cents as uint16 hundredths of a cent.
+
+    Raises:
+        ValueError: if a price is outside 0-100 or has more than two decimals
+    """
+    cents = np.asarray(cents, dtype=float)
+    missing = np.isnan(cents)
+    scaled = np.where(missing, 0.0, cents) * PRICE_SCALE
+    codes = np.rint(scaled)
+    if np.any((codes < 0) | (codes > 100 * PRICE_SCALE)):
+        raise ValueError("prices must lie between 0 and 100 cents")
+    if np.any(np.abs(scaled - codes) > 1e-6):
+        raise ValueError("prices must have at most two decimals")
+    return np.where(missing, MISSING, codes).astype(np.uint16)
+
+
+def decode_prices(codes):
+    """Decode uint16 codes back to float cents, NaN where missing."""
+    codes = np.asarray(codes)
+    return np.where(codes == MISSING, np.nan, codes / PRICE_SCALE)
+
+
+def encode_minutes(timestamps):
+    """
+    Encode naive-UTC timestamps as int32 minutes since the epoch.
+
+    Raises:
+        ValueError: if a timestamp is not on a whole minute
+    """
+    ns = np.asarray(timestamps).astype('datetime64[ns]').astype(np.int64)
+    if np.any(ns % NS_PER_MINUTE):
+        raise ValueError("timestamps must fall on whole minutes")
+    return (ns // NS_PER_MINUTE).astype(np.int32)
+
+
+def decode_minutes(minutes):
+    """Decode int32 minutes since the epoch to datetime64[ns]."""
+    return (np.asarray(minutes, dtype=np.int64) * NS_PER_MINUTE).astype('datetime64[ns]')
+
+
+class CompactHistory:
+    """
+    Integer-encoded minute price history for one market.
+
+    Args:
+        minutes: int32 minutes since the epoch, sorted, shape (rows,)
+        codes: uint16 price codes, shape (rows, buckets)
+        columns: Bucket names
+
+    Example:
+        history = CompactHistory.from_csv('kalshi-price-history-kxhighny-25dec15-minute.csv')
+        history.nbytes                      # a quarter of the DataFrame's
+        history['28° to 29°']               # float cents, decoded on demand
+        history.between('2025-12-15 21:00', '2025-12-15 22:00').to_frame()
+    """
+
+    def __init__(self, minutes, codes, columns):
+        self.minutes = np.asarray(minutes, dtype=np.int32)
+        self.codes = np.asarray(codes, dtype=np.uint16)
+        self.columns = list(columns)
+        if self.codes.shape != (len(self.minutes), len(self.columns)):
+            raise ValueError("codes must have shape (len(minutes), len(columns))")
+
+    @classmethod
+    def from_frame(cls, kalshi_df):
+        """Encode a load_price_history frame (rows must be in time order)."""
+        columns = bucket_columns(kalshi_df)
+        return cls(encode_minutes(kalshi_df['timestamp']),
+                   encode_prices(kalshi_df[columns].to_numpy(dtype=float)), columns)
+
+    @classmethod
+    def from_csv(cls, kalshi_csv):
+        return cls.from_frame(load_price_history(kalshi_csv))
+
+    def __len__(self):
+        return len(self.minutes)
+
+    @property
+    def nbytes(self):
+        return self.minutes.nbytes + self.codes.nbytes
+
+    @property
+    def timestamps(self):
+        return decode_minutes(self.minutes)
+
+    def __getitem__(self, column):
+        """Decoded prices (¢) of one bucket."""
+        return decode_prices(self.codes[:, self.columns.index(column)])
+
+    def prices(self, columns=None):
+        """Decoded (rows, buckets) price matrix in cents, NaN where missing."""
+        if columns is None:
+            return decode_prices(self.codes)
+        return decode_prices(self.codes[:, [self.columns.index(c) for c in columns]])
+
+    def between(self, start, end):
+        """Rows with start <= timestamp < end, as a view (no copy, no decode)."""
+        # Round bounds up to the minute so off-minute bounds keep the same meaning
+        bounds = [-(-pd.Timestamp(t).value // NS_PER_MINUTE) for t in (start, end)]
+        lo, hi = np.searchsorted(self.minutes, bounds)
+        return CompactHistory(self.minutes[lo:hi], self.codes[lo:hi], self.columns)
+
+    def to_frame(self):
+        """Decode to the load_price_history layout."""
+        df = pd.DataFrame(self.prices(), columns=self.columns)
+        df.insert(0, 'timestamp', self.timestamps)
+        return df
+
+
+def main():
+    """Compare memory of every Kalshi file in this repo, pandas vs compact"""
+    import os
+
+    files = sorted(f for f in os.listdir('.') if f.startswith('kalshi-price-history-') and f.endswith('.csv'))
+    total_frame = total_compact = 0
+    for f in files:
+        df = load_price_history(f)
+        history = CompactHistory.from_frame(df)
+        assert np.array_equal(history.prices(), df[history.columns].to_numpy(), equal_nan=True)
+        frame_bytes = int(df.memory_usage(index=False, deep=True).sum())
+        total_frame += frame_bytes
+        total_compact += history.nbytes
+        print(f"  {f:<55} {frame_bytes:>10,} B -> {history.nbytes:>9,} B")
+    print(f"\n  Total: {total_frame:,} B -> {total_compact:,} B ({total_frame / total_compact:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,12 @@ This script compares prediction market prices with actual weather outcomes.
 import pandas as pd
 import numpy as np
 
+from dataset_registry import load_dataset
+from snow_settlement import settle_snow_ladder
+from stage_profiler import profiler_from_env
+
+PROFILE = profiler_from_env('compare_kalshi_vs_era5')
+
 def analyze_temperature_market(kalshi_csv, era5_csv, city_name, temp_buckets):
     """
     Compare Kalshi temperature predictions with ERA5 actual temperatures
@@ -22,14 +28,14 @@ def analyze_temperature_market(kalshi_csv, era5_csv, city_name, temp_buckets):
     print(f"{'='*70}")
     
     # Load Kalshi data
-    kalshi_df = pd.read_csv(kalshi_csv)
-    kalshi_df['timestamp'] = pd.to_datetime(kalshi_df['timestamp'])
+    PROFILE.begin(f'{city_name}: load')
+    kalshi_df = load_dataset(kalshi_csv)
     
     # Load ERA5 data
-    era5_df = pd.read_csv(era5_csv)
-    era5_df['time'] = pd.to_datetime(era5_df['time'])
+    era5_df = load_dataset(era5_csv)
     
     # Get daily maximum temperature from ERA5
+    PROFILE.begin(f'{city_name}: daily_max')
     era5_df['date'] = era5_df['time'].dt.date
     daily_max = era5_df.groupby('date')['temperature_f'].max()
     
@@ -38,6 +44,7 @@ def analyze_temperature_market(kalshi_csv, era5_csv, city_name, temp_buckets):
         print(f"  {date}: {temp:.1f}°F")
     
     # Determine which bucket the actual temperature fell into
+    PROFILE.begin(f'{city_name}: compare')
     for date, actual_temp in daily_max.items():
         print(f"\n--- {date} ---")
         print(f"Actual High: {actual_temp:.1f}°F")
@@ -93,45 +100,36 @@ def analyze_snow_market(kalshi_csv, era5_csv, city_name):
     print(f"{'='*70}")
     
     # Load Kalshi data
-    kalshi_df = pd.read_csv(kalshi_csv)
-    kalshi_df['timestamp'] = pd.to_datetime(kalshi_df['timestamp'])
-    
-    # Load ERA5 data
-    era5_df = pd.read_csv(era5_csv)
-    era5_df['time'] = pd.to_datetime(era5_df['time'])
+    PROFILE.begin(f'{city_name}: load')
+    kalshi_df = load_dataset(kalshi_csv)
     
-    # Calculate total snowfall (only when temp < 0°C)
-    if 'is_snow' in era5_df.columns:
-        snow_data = era5_df[era5_df['is_snow'] == True]
-        total_snow = snow_data['precipitation_inches'].sum()
-    else:
-        # Assume all precipitation is snow if temp data not available
-        total_snow = era5_df['precipitation_inches'].sum()
+    # Settle every threshold against the ERA5 cumulative snowfall path
+    PROFILE.begin(f'{city_name}: settle')
+    settlement = settle_snow_ladder(kalshi_df, load_dataset(era5_csv))
+    total_snow = settlement['total_snow'].iloc[0]
     
     print(f"\nActual Total Snowfall (ERA5): {total_snow:.2f} inches")
     
     # Get final market prices
+    PROFILE.begin(f'{city_name}: compare')
     final_prices = kalshi_df.iloc[-1]
     print(f"\nFinal Market Prices (¢):")
     
     # Get all bucket columns (exclude timestamp)
-    bucket_columns = [col for col in kalshi_df.columns if col != 'timestamp']
+    bucket_columns = list(settlement.index)
     
+    # Winner is the highest threshold reached among quoted buckets
+    quoted = settlement[settlement['final_price'].notna()]
+    reached = quoted[quoted['settled_yes']]
     winning_bucket = None
-    for bucket in bucket_columns:
-        if bucket in final_prices and pd.notna(final_prices[bucket]):
-            price = final_prices[bucket]
-            
-            # Determine if actual snow fell in this bucket
-            # Extract inches from bucket name
-            if 'Above' in bucket:
-                threshold = float(bucket.split('Above')[1].split('inches')[0].strip())
-                is_winner = total_snow >= threshold
-                if is_winner and (winning_bucket is None or threshold > winning_bucket[1]):
-                    winning_bucket = (bucket, threshold)
-            
-            winner_mark = "✓ WINNER" if (winning_bucket and bucket == winning_bucket[0]) else ""
-            print(f"  {bucket}: {price:.2f}¢ {winner_mark}")
+    if len(reached) > 0:
+        winner = reached['threshold'].idxmax()
+        winning_bucket = (winner, reached.loc[winner, 'threshold'])
+    
+    for bucket, row in quoted.iterrows():
+        winner_mark = "✓ WINNER" if (winning_bucket and bucket == winning_bucket[0]) else ""
+        crossed = f" (crossed {row['first_crossing']})" if row['settled_yes'] else ""
+        print(f"  {bucket}: {row['final_price']:.2f}¢ {winner_mark}{crossed}")
     
     # Market prediction (highest price bucket)
     bucket_prices = {bucket: final_prices[bucket] for bucket in bucket_columns 
@@ -311,6 +309,7 @@ def main():
     print(f"\n{'='*70}")
     print("ANALYSIS COMPLETE!")
     print(f"{'='*70}")
+    PROFILE.finish()
 
 if __name__ == "__main__":
     main()
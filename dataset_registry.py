@@ -0,0 +1,324 @@
+"""
+Dataset Registry
+================
+Content-addressed index of the CSV inputs plus a cache of their parsed
+frames.
+
+Every registered file is identified by the SHA-256 of its bytes, so
+byte-identical copies (kxhighhou-25jul26-minute.csv and its "(1)" download,
+analyze_price_HOU.py and analyze_price_HOU (1).py) resolve to one entry.
+Each entry records what the file holds:
+
+    kind        'kalshi' (minute price history), 'era5_temperature',
+                'era5_snow', 'btc_minutes' or 'other'
+    series      Kalshi series ticker (KXHIGHHOU) or ERA5 city code (HOU)
+    event       Kalshi event ticker (KXHIGHHOU-25JUL26)
+    schema      ladder_kind of the bucket headers ('exclusive' / 'cumulative')
+    columns     bucket or value columns
+    start, end  first and last timestamp; rows
+
+Parsed frames are cached by content hash, with least-recently-used eviction
+once the cache holds more than max_entries frames or max_bytes of frame
+memory, so a duplicate or a second analysis of the same file skips the CSV
+parse. Files are re-hashed only when their size or mtime changes.
+
+Frames come from the same loaders the scripts use (load_price_history,
+load_snow_hourly, load_btc_minutes), and load() hands out a copy by
+default because callers modify their frames in place.
+"""
+
+import fnmatch
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from hedge_backtest import load_btc_minutes
+from ladders import bucket_columns, ladder_kind, load_price_history
+from snow_settlement import load_snow_hourly
+
+_KALSHI_NAME = re.compile(r'^kalshi-price-history-([a-z0-9]+)-([a-z0-9]+)-minute(?: \(\d+\))?\.csv$', re.I)
+_ERA5_NAME = re.compile(r'^([A-Z]+)_(TEMP|SNOW|SSNOW)_ERA(?: \(\d+\))?\.csv$', re.I)
+_BTC_NAME = re.compile(r'^BTC_1min_[\w-]+(?: \(\d+\))?\.csv$', re.I)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def classify(path):
+    """
+    (kind, series, event) from a file name, following the repo's naming:
+    kalshi-price-history-<series>-<event>-minute.csv, <CITY>_TEMP_ERA.csv,
+    <CITY>_SNOW_ERA.csv and BTC_1min_<period>.csv.
+    """
+    name = os.path.basename(path)
+    match = _KALSHI_NAME.match(name)
+    if match:
+        series, event = match.group(1).upper(), match.group(2).upper()
+        return 'kalshi', series, f'{series}-{event}'
+    match = _ERA5_NAME.match(name)
+    if match:
+        kind = 'era5_temperature' if match.group(2).upper() == 'TEMP' else 'era5_snow'
+        return kind, match.group(1).upper(), None
+    if _BTC_NAME.match(name):
+        return 'btc_minutes', 'BTC', None
+    return 'other', None, None
+
+
+def _load_era5_temperature(path):
+    era5_df = pd.read_csv(path)
+    era5_df['time'] = pd.to_datetime(era5_df['time'])
+    return era5_df
+
+
+LOADERS = {
+    'kalshi': load_price_history,
+    'era5_temperature': _load_era5_temperature,
+    'era5_snow': load_snow_hourly,
+    'btc_minutes': load_btc_minutes,
+}
+
+
+@dataclass
+class DatasetInfo:
+    """Metadata of one distinct file content."""
+    digest: str
+    kind: str
+    paths: list = field(default_factory=list)
+    size_bytes: int = 0
+    series: str = None
+    event: str = None
+    schema: str = None
+    columns: list = None
+    start: pd.Timestamp = None
+    end: pd.Timestamp = None
+    rows: int = None
+
+
+def _describe(info, frame):
+    """Fill the frame-derived metadata of a parsed dataset."""
+    time_column = 'time' if info.kind.startswith('era5') else 'timestamp'
+    info.rows = len(frame)
+    info.columns = [c for c in frame.columns if c != time_column]
+    if len(frame):
+        info.start, info.end = frame[time_column].iloc[0], frame[time_column].iloc[-1]
+    if info.kind == 'kalshi':
+        columns = bucket_columns(frame)
+        try:
+            info.schema = ladder_kind(columns)
+        except ValueError:
+            info.schema = 'unknown'
+
+
+class FrameCache:
+    """
+    LRU cache of parsed frames keyed by content digest.
+
+    Args:
+        max_entries: Most frames kept
+        max_bytes: Most frame memory kept (DataFrame.memory_usage, deep)
+    """
+
+    def __init__(self, max_entries=32, max_bytes=512 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()  # digest -> (frame, nbytes)
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __contains__(self, digest):
+        return digest in self._frames
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, digest):
+        entry = self._frames.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._frames.move_to_end(digest)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, digest, frame):
+        if digest in self._frames:
+            self.nbytes -= self._frames.pop(digest)[1]
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        self._frames[digest] = (frame, nbytes)
+        self.nbytes += nbytes
+        # Evict oldest first, but always keep the frame just added
+        while len(self._frames) > 1 and (len(self._frames) > self.max_entries or self.nbytes > self.max_bytes):
+            _, (_, evicted) = self._frames.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        self._frames.clear()
+        self.nbytes = 0
+
+
+class DatasetRegistry:
+    """
+    Hash-keyed registry of input files with a parsed-frame cache.
+
+    Args:
+        root: Directory that scan() searches and relative paths resolve against
+        cache: FrameCache to use (default: a new one with default limits)
+
+    Example:
+        registry = DatasetRegistry()
+        registry.scan()
+        kalshi = registry.load('kalshi-price-history-kxhighhou-25jul26-minute (1).csv')
+        registry.duplicates()
+    """
+
+    def __init__(self, root='.', cache=None):
+        self.root = root
+        self.cache = cache if cache is not None else FrameCache()
+        self.datasets = {}   # digest -> DatasetInfo
+        self._paths = {}     # path -> (size, mtime_ns, digest)
+
+    def _resolve(self, path):
+        return os.path.normpath(path if os.path.isabs(path) else os.path.join(self.root, path))
+
+    def register(self, path):
+        """
+        Hash a file (unless unchanged since last time) and record it.
+
+        Returns:
+            DatasetInfo of the file's content
+        """
+        path = self._resolve(path)
+        stat = os.stat(path)
+        known = self._paths.get(path)
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return self.datasets[known[2]]
+
+        digest = file_digest(path)
+        if known and known[2] != digest:
+            self._forget(path, known[2])
+        self._paths[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        info = self.datasets.get(digest)
+        if info is None:
+            kind, series, event = classify(path)
+            info = self.datasets[digest] = DatasetInfo(digest, kind, size_bytes=stat.st_size,
+                                                       series=series, event=event)
+        if path not in info.paths:
+            info.paths.append(path)
+        return info
+
+    def _forget(self, path, digest):
+        info = self.datasets.get(digest)
+        if info is not None and path in info.paths:
+            info.paths.remove(path)
+            if not info.paths:
+                del self.datasets[digest]
+
+    def scan(self, patterns=('*.csv',)):
+        """Register every file in root matching any of the glob patterns."""
+        found = []
+        for name in sorted(os.listdir(self.root)):
+            if any(fnmatch.fnmatch(name, p) for p in patterns) and os.path.isfile(os.path.join(self.root, name)):
+                found.append(self.register(name))
+        return found
+
+    def load(self, path, copy=True):
+        """
+        Parsed frame of a file, from the cache when its content was seen before.
+
+        Args:
+            path: File to load (registered on the way if needed)
+            copy: Return a copy, so callers can modify it without touching the cache
+
+        Raises:
+            ValueError: for files of a kind without a loader
+        """
+        info = self.register(path)
+        frame = self.cache.get(info.digest)
+        if frame is None:
+            loader = LOADERS.get(info.kind)
+            if loader is None:
+                raise ValueError(f"No loader for {os.path.basename(path)!r} (kind {info.kind!r})")
+            frame = loader(self._resolve(path))
+            _describe(info, frame)
+            self.cache.put(info.digest, frame)
+        return frame.copy() if copy else frame
+
+    def describe(self, path):
+        """DatasetInfo with the frame metadata filled in (parses on first use)."""
+        info = self.register(path)
+        if info.rows is None and info.kind in LOADERS:
+            self.load(path, copy=False)
+        return info
+
+    def duplicates(self):
+        """Lists of paths that share identical content."""
+        return [sorted(info.paths) for info in self.datasets.values() if len(info.paths) > 1]
+
+    def index(self):
+        """One row per distinct content, as a DataFrame."""
+        rows = [{
+            'digest': info.digest[:12],
+            'kind': info.kind,
+            'series': info.series,
+            'event': info.event,
+            'schema': info.schema,
+            'buckets': len(info.columns) if info.columns is not None else None,
+            'start': info.start,
+            'end': info.end,
+            'rows': info.rows,
+            'copies': len(info.paths),
+            'file': os.path.basename(sorted(info.paths)[0]),
+        } for info in self.datasets.values()]
+        return pd.DataFrame(rows).astype({'buckets': 'Int64', 'rows': 'Int64'})
+
+
+_DEFAULT = None
+
+
+def default_registry():
+    """Process-wide registry rooted at the working directory."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = DatasetRegistry()
+    return _DEFAULT
+
+
+def load_dataset(path, copy=True):
+    """Load a file through the process-wide registry."""
+    return default_registry().load(path, copy)
+
+
+def main():
+    """Index this repo's data files, list duplicates and show the cache at work"""
+    registry = DatasetRegistry()
+    registry.scan(('*.csv', '*.py'))
+    for info in registry.datasets.values():
+        if info.kind in LOADERS:
+            registry.describe(info.paths[0])
+
+    index = registry.index()
+    print(index[index['kind'] != 'other'].drop(columns='digest').to_string(index=False))
+    print("\nIdentical files:")
+    for paths in registry.duplicates():
+        print("  " + "  ==  ".join(os.path.basename(p) for p in paths))
+
+    registry.load('kalshi-price-history-kxhighhou-25jul26-minute.csv')
+    registry.load('kalshi-price-history-kxhighhou-25jul26-minute (1).csv')
+    cache = registry.cache
+    print(f"\nCache: {len(cache)} frames, {cache.nbytes / 2**20:.1f} MiB, "
+          f"{cache.hits} hits / {cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Change-Only (Delta) Price Storage
+=================================
+Sparse ladders such as kxsnowstorm-26jannyc or kxbtcmaxm-aug25 are mostly
+empty cells, and the filled ones mostly repeat the bucket's previous price.
+DeltaHistory keeps only the change events, (minute, bucket, new price),
+so storage and scan cost grow with the number of price changes instead of
+minutes x buckets.
+
+Events are held bucket by bucket in time order (a CSR layout: offsets[b] to
+offsets[b + 1] are bucket b's changes) with one int64 key per event,
+bucket << 32 | minute. Any batch of (bucket, time) as-of queries is then a
+single np.searchsorted over the keys. A regular-grid panel is the same
+query for every grid point, which amounts to a vectorised forward fill.
+
+An empty cell in the export means "no new price", so reconstruction gives
+each bucket's last price at or before the query time (the same as ffill on
+the dense frame), with NaN before a bucket's first price. Minutes and
+prices use the integer encodings of compact_prices.
+"""
+
+import numpy as np
+import pandas as pd
+
+from compact_prices import MISSING, NS_PER_MINUTE, CompactHistory, decode_minutes, decode_prices
+from ladders import load_price_history
+
+
+def _query_minutes(timestamps):
+    """Whole minutes since the epoch at or before each timestamp (floor)."""
+    ns = np.asarray(pd.to_datetime(timestamps).values, dtype='datetime64[ns]').astype(np.int64)
+    return ns // NS_PER_MINUTE
+
+
+class DeltaHistory:
+    """
+    Change events of one market's buckets with as-of lookup.
+
+    Args:
+        minutes: int32 minute of each change, grouped by bucket, time-sorted
+        codes: uint16 new price of each change (compact_prices encoding)
+        offsets: Bucket b's changes are minutes[offsets[b]:offsets[b + 1]]
+        columns: Bucket names
+
+    Example:
+        deltas = DeltaHistory.from_csv('kalshi-price-history-kxsnowstorm-26jannyc-minute.csv')
+        deltas.asof('2026-01-25 12:00')                  # Series of ¢ by bucket
+        deltas.panel('2026-01-24', '2026-01-27', '15min')
+    """
+
+    def __init__(self, minutes, codes, offsets, columns):
+        self.minutes = np.asarray(minutes, dtype=np.int32)
+        self.codes = np.asarray(codes, dtype=np.uint16)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.columns = list(columns)
+        bucket = np.repeat(np.arange(len(self.columns), dtype=np.int64), np.diff(self.offsets))
+        self._keys = (bucket << 32) | self.minutes.astype(np.int64)
+        self._bucket = bucket
+
+    @classmethod
+    def from_compact(cls, history):
+        """Keep only the cells that change a bucket's last known price."""
+        minutes, codes, offsets = [], [], [0]
+        for b in range(len(history.columns)):
+            column = history.codes[:, b]
+            present = column != MISSING
+            values = column[present]
+            changed = np.ones(len(values), dtype=bool)
+            changed[1:] = values[1:] != values[:-1]
+            minutes.append(history.minutes[present][changed])
+            codes.append(values[changed])
+            offsets.append(offsets[-1] + int(changed.sum()))
+        return cls(np.concatenate(minutes), np.concatenate(codes), offsets, history.columns)
+
+    @classmethod
+    def from_frame(cls, kalshi_df):
+        return cls.from_compact(CompactHistory.from_frame(kalshi_df))
+
+    @classmethod
+    def from_csv(cls, kalshi_csv):
+        return cls.from_frame(load_price_history(kalshi_csv))
+
+    @property
+    def n_changes(self):
+        return len(self.minutes)
+
+    @property
+    def nbytes(self):
+        return self.minutes.nbytes + self.codes.nbytes + self.offsets.nbytes
+
+    def changes(self, column):
+        """(timestamps, prices in ¢) of one bucket's change events."""
+        b = self.columns.index(column)
+        lo, hi = self.offsets[b], self.offsets[b + 1]
+        return decode_minutes(self.minutes[lo:hi]), decode_prices(self.codes[lo:hi])
+
+    def _lookup(self, buckets, minutes):
+        """Codes as of (bucket, minute) pairs; MISSING before a bucket's first change."""
+        queries = (buckets.astype(np.int64) << 32) | minutes
+        if not len(self._keys):
+            return np.full(queries.shape, MISSING, dtype=np.uint16)
+        idx = np.searchsorted(self._keys, queries, side='right') - 1
+        safe = np.maximum(idx, 0)
+        found = (idx >= 0) & (self._bucket[safe] == buckets)
+        return np.where(found, self.codes[safe], MISSING)
+
+    def asof_many(self, timestamps):
+        """
+        Price of every bucket as of each timestamp.
+
+        Returns:
+            Array (timestamps, buckets) in cents, NaN before a bucket's first price
+        """
+        minutes = _query_minutes(np.atleast_1d(timestamps))
+        buckets = np.arange(len(self.columns), dtype=np.int64)
+        return decode_prices(self._lookup(buckets[None, :], minutes[:, None]))
+
+    def asof(self, timestamp):
+        """Price of every bucket as of one timestamp, as a Series (¢)."""
+        return pd.Series(self.asof_many([timestamp])[0], index=self.columns)
+
+    def panel(self, start, end, freq='1min'):
+        """
+        Forward-filled regular-grid panel for start <= timestamp < end.
+
+        Returns:
+            DataFrame in the load_price_history layout
+        """
+        grid = pd.date_range(pd.Timestamp(start).ceil(freq), end, freq=freq, inclusive='left')
+        df = pd.DataFrame(self.asof_many(grid), columns=self.columns)
+        df.insert(0, 'timestamp', grid.values)
+        return df
+
+
+def main():
+    """Compare dense and change-only storage for every Kalshi file in this repo"""
+    import os
+
+    files = sorted(f for f in os.listdir('.') if f.startswith('kalshi-price-history-') and f.endswith('.csv'))
+    for f in files:
+        df = load_price_history(f)
+        history = CompactHistory.from_frame(df)
+        deltas = DeltaHistory.from_compact(history)
+        filled = df[history.columns].ffill().to_numpy()
+        assert np.array_equal(deltas.asof_many(df['timestamp']), filled, equal_nan=True)
+        cells = history.codes.size
+        print(f"  {f:<55} {cells:>8,} cells -> {deltas.n_changes:>6,} changes "
+              f"({history.nbytes:>7,} B -> {deltas.nbytes:>6,} B)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Exchange Snapshot Crawler
+=========================
+Restartable crawl of the whole exchange (series -> events -> markets) into
+a local snapshot directory, instead of each notebook paging through its own
+slice (Companies, Economics, climate, "15 min" series) from scratch.
+
+Layout of one snapshot (one directory per UTC date by default):
+
+    <store>/<snapshot>/series.jsonl           one series per line
+    <store>/<snapshot>/events/<SERIES>.jsonl  the series' events
+    <store>/<snapshot>/markets/<SERIES>.jsonl the series' markets
+    <store>/<snapshot>/state/...              checkpoints
+    <store>/<snapshot>/manifest.json          written when a run ends
+
+Work is sharded by series ticker: each series is one task, crawled by one
+worker process, which owns that series' files. After every page the worker
+appends the records, then atomically rewrites the series checkpoint (the
+cursor, and the file offset the page ended at). A restarted run truncates
+each file to its checkpointed offset and continues from the saved cursor,
+so a crash never loses or duplicates a page, and finished series are
+skipped.
+
+The series listing is read lazily, and a new series is only pulled from it
+when fewer than max_pending series are in flight (back-pressure between the
+listing and detail stages). Requests go through a token bucket. With a
+pool, the listing process and each of the n_workers processes get
+rate_per_second / (n_workers + 1), so the run as a whole stays inside the
+API rate budget. max_requests caps a run's total requests
+(shared counter); when it is used up the run stops at a checkpoint, and the
+next run carries on.
+
+429 and 5xx responses are retried with backoff (Retry-After when given).
+Any other error fails that series only. Its checkpoint stays, and it is
+retried on the next run.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+
+BASE_URL = "https://api.elections.kalshi.com/trade-api/v2"
+DEFAULT_RATE = 10.0   # requests per second, across all workers
+PAGE_LIMITS = {'series': 200, 'events': 200, 'markets': 1000}
+STAGES = ('events', 'markets')
+
+
+class CrawlError(Exception):
+    pass
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class KalshiClient:
+    """GET against the public trade API; returns (status, json, retry_after)."""
+
+    def __init__(self, base_url=BASE_URL, timeout=30):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def get(self, path, params):
+        import requests
+
+        try:
+            response = requests.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        except requests.RequestException:
+            return 599, None, None
+        if response.status_code != 200:
+            return response.status_code, None, response.headers.get('Retry-After')
+        try:
+            return 200, response.json(), None
+        except ValueError:
+            # A 200 with an HTML or truncated body (proxy / gateway error): retry it
+            return 599, None, None
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` requests per second, bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+
+    def acquire(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens < 1:
+            time.sleep((1 - self._tokens) / self.rate)
+            self._last = time.monotonic()
+            self._tokens = 0.0
+        else:
+            self._tokens -= 1
+
+
+def _atomic_write_json(path, obj):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def _new_stage():
+    return {'cursor': None, 'offset': 0, 'pages': 0, 'records': 0, 'done': False}
+
+
+_SHARED = {}
+
+
+def _init_worker(client, rate_per_second, request_count, max_requests):
+    _SHARED['client'] = client
+    _SHARED['limiter'] = RateLimiter(rate_per_second)
+    _SHARED['request_count'] = request_count
+    _SHARED['max_requests'] = max_requests
+
+
+def _request(path, params, max_retries=6):
+    """One API call under the rate limit and request budget, with retries."""
+    count, limit = _SHARED['request_count'], _SHARED['max_requests']
+    for attempt in range(max_retries):
+        with count.get_lock():
+            if limit is not None and count.value >= limit:
+                raise BudgetExhausted()
+            count.value += 1
+        _SHARED['limiter'].acquire()
+        status, data, retry_after = _SHARED['client'].get(path, params)
+        if status == 200:
+            return data
+        if status == 429 or status >= 500:
+            time.sleep(float(retry_after) if retry_after else min(2 ** attempt, 60))
+            continue
+        raise CrawlError(f"GET {path} {params}: HTTP {status}")
+    raise CrawlError(f"GET {path} {params}: gave up after {max_retries} attempts")
+
+
+def _crawl_pages(path, key, params, out_path, stage, save):
+    """
+    Page through one endpoint, appending records to out_path and
+    checkpointing the cursor and file offset after every page.
+    """
+    mode = 'r+b' if os.path.exists(out_path) else 'wb'
+    with open(out_path, mode) as f:
+        f.truncate(stage['offset'])
+        f.seek(stage['offset'])
+        while not stage['done']:
+            page_params = dict(params, limit=PAGE_LIMITS[key])
+            if stage['cursor']:
+                page_params['cursor'] = stage['cursor']
+            data = _request(path, page_params)
+            records = data.get(key) or []
+            f.write(''.join(json.dumps(r) + '\n' for r in records).encode())
+            f.flush()
+            os.fsync(f.fileno())
+            stage['offset'] = f.tell()
+            stage['cursor'] = data.get('cursor') or None
+            stage['pages'] += 1
+            stage['records'] += len(records)
+            stage['done'] = stage['cursor'] is None
+            save()
+
+
+def crawl_series(ticker, snapshot_dir, market_params=None):
+    """
+    Crawl one series' events and markets, resuming from its checkpoint.
+
+    Returns:
+        dict with ticker, status ('done', 'paused' or 'failed'), events,
+        markets and error
+    """
+    state_path = os.path.join(snapshot_dir, 'state', f'{ticker}.json')
+    state = _read_json(state_path) or {stage: _new_stage() for stage in STAGES}
+    save = lambda: _atomic_write_json(state_path, state)  # noqa: E731
+
+    result = {'ticker': ticker, 'status': 'done', 'error': None}
+    try:
+        for stage in STAGES:
+            params = {'series_ticker': ticker}
+            if stage == 'markets' and market_params:
+                params.update(market_params)
+            _crawl_pages(f'/{stage}', stage, params, os.path.join(snapshot_dir, stage, f'{ticker}.jsonl'),
+                         state[stage], save)
+    except BudgetExhausted:
+        result['status'] = 'paused'
+    except CrawlError as e:
+        result['status'], result['error'] = 'failed', str(e)
+    result.update({stage: state[stage]['records'] for stage in STAGES})
+    return result
+
+
+def _series_done(snapshot_dir, ticker):
+    state = _read_json(os.path.join(snapshot_dir, 'state', f'{ticker}.json'))
+    return state is not None and all(state[stage]['done'] for stage in STAGES)
+
+
+def iter_series(snapshot_dir, series_params=None):
+    """
+    Series tickers in listing order: first those already listed in
+    series.jsonl, then further /series pages fetched only as they are needed.
+    """
+    path = os.path.join(snapshot_dir, 'series.jsonl')
+    state_path = os.path.join(snapshot_dir, 'state', '_series.json')
+    stage = _read_json(state_path) or _new_stage()
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            for line in f.read(stage['offset']).splitlines():
+                yield json.loads(line)['ticker']
+
+    params = dict(series_params or {}, limit=PAGE_LIMITS['series'])
+    while not stage['done']:
+        if stage['cursor']:
+            params['cursor'] = stage['cursor']
+        data = _request('/series', params)
+        records = data.get('series') or []
+        mode = 'r+b' if os.path.exists(path) else 'wb'
+        with open(path, mode) as f:
+            f.truncate(stage['offset'])
+            f.seek(stage['offset'])
+            f.write(''.join(json.dumps(r) + '\n' for r in records).encode())
+            f.flush()
+            os.fsync(f.fileno())
+            stage['offset'] = f.tell()
+        stage['cursor'] = data.get('cursor') or None
+        stage['pages'] += 1
+        stage['records'] += len(records)
+        stage['done'] = stage['cursor'] is None
+        _atomic_write_json(state_path, stage)
+        for record in records:
+            yield record['ticker']
+
+
+def crawl(store_dir='kalshi_snapshots', snapshot=None, client=None, n_workers=4,
+          rate_per_second=DEFAULT_RATE, max_requests=None, max_pending=None,
+          series_params=None, market_params=None):
+    """
+    Snapshot series, events and markets, resuming any earlier run of the
+    same snapshot.
+
+    Parameters:
+    - store_dir: Directory holding the snapshots
+    - snapshot: Snapshot name (default: today's UTC date, one per night)
+    - client: Object with get(path, params) -> (status, json, retry_after)
+      (default KalshiClient(); must be picklable when n_workers > 1)
+    - n_workers: Processes crawling series (1 = run in-process)
+    - rate_per_second: Request budget for the whole run
+    - max_requests: Stop at a checkpoint after this many requests
+    - max_pending: Series in flight before the listing waits (default 2 x n_workers)
+    - series_params / market_params: Extra /series or /markets filters,
+      e.g. {'category': 'Economics'} or {'status': 'settled'}
+
+    Returns:
+        Manifest dict (also written to manifest.json)
+    """
+    snapshot = snapshot or datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    snapshot_dir = os.path.join(store_dir, snapshot)
+    for sub in ('state', *STAGES):
+        os.makedirs(os.path.join(snapshot_dir, sub), exist_ok=True)
+    client = client or KalshiClient()
+    max_pending = max_pending or 2 * n_workers
+    request_count = multiprocessing.Value('q', 0)
+
+    started = time.perf_counter()
+    results = []
+    paused = False
+
+    # With a pool the listing (this process) and every worker get an equal share of the budget
+    share = rate_per_second / (n_workers + 1) if n_workers > 1 else rate_per_second
+    _init_worker(client, share, request_count, max_requests)
+    listing = (t for t in iter_series(snapshot_dir, series_params) if not _series_done(snapshot_dir, t))
+
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(client, share, request_count, max_requests)) as pool:
+            in_flight = set()
+            while True:
+                # Pull from the listing only while there is room in flight
+                while not paused and len(in_flight) < max_pending:
+                    try:
+                        ticker = next(listing)
+                    except StopIteration:
+                        break
+                    except BudgetExhausted:
+                        paused = True
+                        break
+                    in_flight.add(pool.submit(crawl_series, ticker, snapshot_dir, market_params))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results.append(future.result())
+                    paused = paused or results[-1]['status'] == 'paused'
+    else:
+        try:
+            for ticker in listing:
+                results.append(crawl_series(ticker, snapshot_dir, market_params))
+                if results[-1]['status'] == 'paused':
+                    paused = True
+                    break
+        except BudgetExhausted:
+            paused = True
+
+    listing_state = _read_json(os.path.join(snapshot_dir, 'state', '_series.json')) or _new_stage()
+    failed = [r for r in results if r['status'] == 'failed']
+    complete = listing_state['done'] and not paused and not failed
+    manifest = {
+        'snapshot': snapshot,
+        'complete': complete,
+        'finished_at': datetime.now(timezone.utc).isoformat() if complete else None,
+        'series_listed': listing_state['records'],
+        'series_crawled_this_run': sum(r['status'] == 'done' for r in results),
+        'failed': {r['ticker']: r['error'] for r in failed},
+        'requests_this_run': request_count.value,
+        'seconds_this_run': round(time.perf_counter() - started, 3),
+    }
+    _atomic_write_json(os.path.join(snapshot_dir, 'manifest.json'), manifest)
+    return manifest
+
+
+def _read_jsonl(path, offset):
+    """Records in the first `offset` bytes of a JSON-lines file (the checkpointed part)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        return [json.loads(line) for line in f.read(offset).splitlines()]
+
+
+def load_snapshot(snapshot_dir):
+    """
+    Everything crawled into a snapshot so far, up to the last checkpoints.
+
+    Returns:
+        (series, events, markets) as lists of API dicts
+    """
+    listing = _read_json(os.path.join(snapshot_dir, 'state', '_series.json')) or _new_stage()
+    series = _read_jsonl(os.path.join(snapshot_dir, 'series.jsonl'), listing['offset'])
+    records = {stage: [] for stage in STAGES}
+    for s in series:
+        state = _read_json(os.path.join(snapshot_dir, 'state', f"{s['ticker']}.json"))
+        if state is None:
+            continue
+        for stage in STAGES:
+            path = os.path.join(snapshot_dir, stage, f"{s['ticker']}.jsonl")
+            records[stage].extend(_read_jsonl(path, state[stage]['offset']))
+    return series, records['events'], records['markets']
+
+
+def _demo():
+    """Crawl the offline synthetic API, interrupting the run twice, and check the result"""
+    import shutil
+    import tempfile
+
+    from synthetic_data import SyntheticKalshiAPI
+
+    api = SyntheticKalshiAPI(n_markets=20_000, n_series=300)
+    store = tempfile.mkdtemp(prefix='kalshi_snapshots_')
+    try:
+        for run, budget in enumerate([250, 400, None], 1):
+            manifest = crawl(store, snapshot='demo', client=api, n_workers=2, rate_per_second=2000,
+                             max_requests=budget)
+            print(f"  Run {run}: {manifest['series_crawled_this_run']:>3} series finished, "
+                  f"{manifest['requests_this_run']:>4} requests, complete={manifest['complete']}")
+
+        series, events, markets = load_snapshot(os.path.join(store, 'demo'))
+        expected_series, expected_markets = api._catalog()[0], sum(api._catalog()[1].values(), [])
+        assert len(series) == len(expected_series)
+        assert sorted(m['ticker'] for m in markets) == sorted(m['ticker'] for m in expected_markets)
+        print(f"  Snapshot: {len(series)} series, {len(events):,} events, {len(markets):,} markets "
+              f"(matches the source exactly)")
+    finally:
+        shutil.rmtree(store)
+
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Snapshot every series, event and market (resumable)")
+    parser.add_argument('--store', default='kalshi_snapshots')
+    parser.add_argument('--snapshot', help="snapshot name (default: today's UTC date)")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="requests per second, all workers")
+    parser.add_argument('--max-requests', type=int, help="stop (resumably) after this many requests")
+    parser.add_argument('--demo', action='store_true', help="crawl an offline synthetic API instead")
+    args = parser.parse_args()
+    if args.demo:
+        _demo()
+        return
+
+    manifest = crawl(args.store, args.snapshot, n_workers=args.workers, rate_per_second=args.rate,
+                     max_requests=args.max_requests)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
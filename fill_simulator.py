@@ -0,0 +1,347 @@
+"""
+Order Book & Fill Simulator
+===========================
+Replaces the "fill everything at market_price / yes_ask" assumption in the
+hedge scripts and the notebook STEP 6 backtests.
+
+Books are stored as depth arrays indexed by price in cents (0-100), one for
+YES bids and one for YES asks, so a whole set of book snapshots is just a
+pair of (snapshots x 101) arrays. Books can be built from Kalshi orderbook
+snapshots, from candlesticks (yes_bid / yes_ask close), or synthesised around
+a recorded minute price.
+
+Two ways to fill:
+- fill_orders(): vectorised batch of marketable orders against snapshots,
+  with limit prices, partial fills, adverse slippage and per-level fees.
+  This is the one to use inside parameter sweeps.
+- OrderBook: event-driven single-market book with resting limit orders and
+  queue position, advanced by on_trade() prints.
+"""
+
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+from kalshi_fees import FEE_RATE
+
+LEVELS = 101  # price levels 0..100 cents; 0 and 100 never hold depth
+PRICES = np.arange(LEVELS, dtype=float)
+BUY = 1
+SELL = -1
+
+Fill = namedtuple('Fill', ['order_id', 'side', 'quantity', 'avg_price', 'fee'])
+
+
+def _level_fees(take, prices, fee_rate):
+    """Kalshi fee per price level fill, rounded up to the cent, in dollars."""
+    p = prices / 100
+    return np.ceil(fee_rate * take * p * (1 - p) * 100) / 100
+
+
+def book_from_orderbook(orderbook):
+    """
+    Build (bids, asks) depth arrays from a Kalshi /orderbook response.
+
+    The API lists resting YES bids and NO bids as [price, quantity] pairs.
+    A NO bid at p is a YES ask at 100 - p.
+    """
+    bids = np.zeros(LEVELS)
+    asks = np.zeros(LEVELS)
+    for price, quantity in orderbook.get('yes') or []:
+        bids[int(price)] += quantity
+    for price, quantity in orderbook.get('no') or []:
+        asks[100 - int(price)] += quantity
+    return bids, asks
+
+
+def book_from_candlestick(candle, depth=100):
+    """
+    Single-level book from a Kalshi candlestick: `depth` contracts at the
+    closing yes_bid and yes_ask.
+    """
+    bids = np.zeros(LEVELS)
+    asks = np.zeros(LEVELS)
+    bid = (candle.get('yes_bid') or {}).get('close')
+    ask = (candle.get('yes_ask') or {}).get('close')
+    if bid is not None and 0 < bid < 100:
+        bids[int(bid)] = depth
+    if ask is not None and 0 < ask < 100:
+        asks[int(ask)] = depth
+    return bids, asks
+
+
+def synthetic_books(mid_cents, spread_cents=2, top_depth=250, decay=0.6, levels=5):
+    """
+    Books around recorded minute prices, for histories without quotes.
+
+    Best bid/ask sit half a spread either side of the price (rounded away
+    from it); each further level holds `decay` times the depth of the one
+    before, rounded to whole contracts (at least one).
+
+    Args:
+        mid_cents: Array of prices in cents, shape (n,)
+
+    Returns:
+        (bids, asks) arrays of shape (n, 101); NaN prices give empty books
+    """
+    mid = np.asarray(mid_cents, dtype=float)
+    n = len(mid)
+    valid = ~np.isnan(mid)
+    safe = np.where(valid, mid, 50.0)
+    best_bid = np.clip(np.floor(safe - spread_cents / 2), 1, 98).astype(int)
+    best_ask = np.clip(np.ceil(safe + spread_cents / 2), best_bid + 1, 99).astype(int)
+
+    steps = np.arange(levels)
+    sizes = np.maximum(np.round(top_depth * decay ** steps), 1.0)
+    bid_idx = best_bid[:, None] - steps[None, :]
+    ask_idx = best_ask[:, None] + steps[None, :]
+    rows = np.repeat(np.arange(n), levels).reshape(n, levels)
+
+    bids = np.zeros((n, LEVELS))
+    asks = np.zeros((n, LEVELS))
+    ok_bid = (bid_idx >= 1) & valid[:, None]
+    ok_ask = (ask_idx <= 99) & valid[:, None]
+    bids[rows[ok_bid], bid_idx[ok_bid]] = np.broadcast_to(sizes, (n, levels))[ok_bid]
+    asks[rows[ok_ask], ask_idx[ok_ask]] = np.broadcast_to(sizes, (n, levels))[ok_ask]
+    return bids, asks
+
+
+def _walk(depth, quantity, limit, slippage_cents, fee_rate, ascending):
+    """
+    Fill a block of orders against one side of their books.
+
+    depth is (orders, 101). Buys walk asks from the lowest price up, sells walk
+    bids from the highest price down; levels beyond the limit are skipped.
+    """
+    if not ascending:
+        depth = depth[:, ::-1]
+        prices = PRICES[::-1]
+        allowed = prices[None, :] >= limit[:, None]
+        exec_prices = np.clip(prices - slippage_cents, 1, 99)
+    else:
+        prices = PRICES
+        allowed = prices[None, :] <= limit[:, None]
+        exec_prices = np.clip(prices + slippage_cents, 1, 99)
+
+    depth = np.where(allowed, depth, 0.0)
+    before = np.cumsum(depth, axis=1) - depth
+    take = np.clip(quantity[:, None] - before, 0.0, depth)
+
+    filled = take.sum(axis=1)
+    notional = take @ exec_prices
+    fees = _level_fees(take, exec_prices[None, :], fee_rate).sum(axis=1)
+    return filled, notional, fees
+
+
+def fill_orders(bids, asks, book_index, side, quantity, limit_cents=None,
+                slippage_cents=0.0, fee_rate=FEE_RATE, chunk_size=20000):
+    """
+    Fill a batch of marketable orders against book snapshots.
+
+    Each order walks the opposite side of its snapshot (bids for sells, asks
+    for buys) up to its limit. Snapshots are not depleted between orders,
+    i.e. each order sees a fresh book, which is the right model when orders
+    are minutes apart.
+
+    Parameters:
+    - bids, asks: Depth arrays of shape (snapshots, 101)
+    - book_index: Snapshot each order executes against, shape (orders,)
+    - side: +1 buy YES / -1 sell YES, shape (orders,)
+    - quantity: Contracts requested, shape (orders,)
+    - limit_cents: Worst acceptable price per order (default: no limit)
+    - slippage_cents: Adverse price shift applied to every fill
+    - chunk_size: Orders processed per block, to bound memory
+
+    Returns:
+        dict of arrays: filled, unfilled, avg_price (¢, NaN if nothing
+        filled), cost (signed dollars paid, fees excluded), fee (dollars)
+    """
+    book_index = np.asarray(book_index, dtype=np.int64)
+    side = np.asarray(side)
+    quantity = np.asarray(quantity, dtype=float)
+    n = len(book_index)
+    if limit_cents is None:
+        limit = np.where(side > 0, 100.0, 0.0)
+    else:
+        limit = np.asarray(limit_cents, dtype=float) * np.ones(n)
+
+    filled = np.zeros(n)
+    notional = np.zeros(n)
+    fees = np.zeros(n)
+    for start in range(0, n, chunk_size):
+        block = slice(start, start + chunk_size)
+        for is_buy, book in ((True, asks), (False, bids)):
+            mask = (side[block] > 0) if is_buy else (side[block] < 0)
+            if not mask.any():
+                continue
+            idx = np.flatnonzero(mask) + start
+            f, v, c = _walk(book[book_index[idx]], quantity[idx], limit[idx],
+                            slippage_cents, fee_rate, ascending=is_buy)
+            filled[idx] = f
+            notional[idx] = v
+            fees[idx] = c
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_price = np.where(filled > 0, notional / filled, np.nan)
+    return {
+        'filled': filled,
+        'unfilled': quantity - filled,
+        'avg_price': avg_price,
+        'cost': np.sign(side) * notional / 100,
+        'fee': fees,
+    }
+
+
+class OrderBook:
+    """
+    Event-driven book for one market with resting orders and queue position.
+
+    A resting order joins the back of the queue at its price: everything
+    already shown at that level is ahead of it and must trade first.
+
+    Example:
+        book = OrderBook(*book_from_orderbook(snapshot))
+        fill = book.take(BUY, 100, limit_cents=55)
+        oid = book.place(BUY, 52, 200)
+        fills = book.on_trade(52, 500)
+    """
+
+    def __init__(self, bids=None, asks=None, fee_rate=FEE_RATE):
+        self.bids = np.zeros(LEVELS) if bids is None else np.array(bids, dtype=float)
+        self.asks = np.zeros(LEVELS) if asks is None else np.array(asks, dtype=float)
+        self.fee_rate = fee_rate
+        self.resting = {}  # order_id -> [side, price, remaining, queue_ahead]
+        self._ids = itertools.count(1)
+
+    def best_bid(self):
+        levels = np.flatnonzero(self.bids)
+        return int(levels[-1]) if len(levels) else None
+
+    def best_ask(self):
+        levels = np.flatnonzero(self.asks)
+        return int(levels[0]) if len(levels) else None
+
+    def take(self, side, quantity, limit_cents=None, slippage_cents=0.0):
+        """
+        Execute a marketable order immediately, consuming displayed depth.
+
+        Returns:
+            Fill (quantity may be less than requested: partial fill)
+        """
+        if limit_cents is None:
+            limit_cents = 100.0 if side > 0 else 0.0
+        book = self.asks if side > 0 else self.bids
+        filled, notional, fee = _walk(book[None, :], np.array([float(quantity)]),
+                                      np.array([float(limit_cents)]), slippage_cents,
+                                      self.fee_rate, ascending=side > 0)
+        # Deplete the levels that were consumed, best price first
+        remaining = filled[0]
+        order = range(LEVELS) if side > 0 else range(LEVELS - 1, -1, -1)
+        for price in order:
+            if remaining <= 0:
+                break
+            used = min(book[price], remaining)
+            book[price] -= used
+            remaining -= used
+
+        avg = float(notional[0] / filled[0]) if filled[0] > 0 else float('nan')
+        return Fill(None, side, float(filled[0]), avg, float(fee[0]))
+
+    def place(self, side, price_cents, quantity):
+        """Rest a limit order at the back of the queue. Returns its order id."""
+        order_id = next(self._ids)
+        book = self.bids if side > 0 else self.asks
+        self.resting[order_id] = [side, int(price_cents), float(quantity), float(book[int(price_cents)])]
+        book[int(price_cents)] += quantity
+        return order_id
+
+    def cancel(self, order_id):
+        side, price, remaining, _ = self.resting.pop(order_id)
+        book = self.bids if side > 0 else self.asks
+        book[price] = max(book[price] - remaining, 0.0)
+
+    def queue_position(self, order_id):
+        """Contracts ahead of a resting order at its price level."""
+        return self.resting[order_id][3]
+
+    def on_trade(self, price_cents, quantity):
+        """
+        Apply a trade print and fill resting orders it reaches.
+
+        The print's quantity is shared out best price first, then by queue
+        time. Orders priced better than the print fill from what is left of
+        it (the trade went through their level). Orders at the print price
+        fill only with what remains after the queue ahead of them.
+
+        Returns:
+            List of Fill for resting orders that (partially) filled
+        """
+        fills = []
+        for side in (BUY, SELL):
+            orders = sorted(((order_id, state) for order_id, state in self.resting.items() if state[0] == side),
+                            key=lambda item: (-side * item[1][1], item[0]))
+            left = float(quantity)
+            level_left = None
+            for order_id, state in orders:
+                _, price, remaining, ahead = state
+                through = price > price_cents if side > 0 else price < price_cents
+                if through:
+                    executed = min(remaining, left)
+                elif price == price_cents:
+                    # `ahead` already counts our earlier orders at this price,
+                    # so every order here is measured against the same volume
+                    if level_left is None:
+                        level_left = left
+                    executed = min(remaining, max(level_left - ahead, 0.0))
+                    state[3] = max(ahead - level_left, 0.0)
+                else:
+                    break
+                if executed <= 0:
+                    continue
+
+                left -= executed
+                book = self.bids if side > 0 else self.asks
+                book[price] = max(book[price] - executed, 0.0)
+                state[2] -= executed
+                fee = float(_level_fees(executed, float(price), self.fee_rate))
+                fills.append(Fill(order_id, side, executed, float(price), fee))
+                if state[2] <= 0:
+                    del self.resting[order_id]
+        return fills
+
+    def replace_levels(self, bids, asks):
+        """
+        Load a new snapshot (which, like an exchange snapshot, already shows
+        our resting orders). Orders keep their place; the queue ahead can only
+        shrink through cancellations, never grow.
+        """
+        self.bids = np.array(bids, dtype=float)
+        self.asks = np.array(asks, dtype=float)
+        for state in self.resting.values():
+            side, price, remaining, ahead = state
+            book = self.bids if side > 0 else self.asks
+            state[3] = min(ahead, max(book[price] - remaining, 0.0))
+
+
+def main():
+    """Check that one print is shared out over resting orders, best price first"""
+    book = OrderBook()
+    first = book.place(BUY, 52, 100)
+    second = book.place(BUY, 53, 100)
+    fills = book.on_trade(51, 50)
+    assert [(f.order_id, f.quantity) for f in fills] == [(second, 50.0)]
+    assert book.resting[first][2] == 100 and book.resting[second][2] == 50
+
+    # Two of our orders in one queue: the later one is behind the earlier one
+    book = OrderBook(bids=np.where(PRICES == 52, 30.0, 0.0))
+    early = book.place(BUY, 52, 100)
+    late = book.place(BUY, 52, 100)
+    fills = book.on_trade(52, 180)
+    assert [(f.order_id, f.quantity) for f in fills] == [(early, 100.0), (late, 50.0)]
+    assert book.queue_position(late) == 0
+    print("  Trade prints fill at most their own size, best price and earliest order first")
+
+
+if __name__ == "__main__":
+    main()
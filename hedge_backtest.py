@@ -0,0 +1,208 @@
+"""
+BTC Hedge Backtest (library form)
+=================================
+The batch logic of the BTC_hedge_*.py scripts as reusable functions.
+
+The scripts hard-code one market each; this module takes the market, strike,
+expiry and thresholds as a HedgeConfig and reproduces the same pipeline:
+as-of merge of BTC minutes with Kalshi prices, BSM probability, hysteresis
+signal, and Strategy A/B/C P&L including Kalshi fees.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from kalshi_fees import kalshi_fee
+
+NS_PER_DAY = 86400 * 10**9
+
+
+@dataclass
+class HedgeConfig:
+    """Parameters of one hedge backtest (defaults match BTC_hedge_2024.py)."""
+    strike: float = 100000
+    expiry: str = '2024-12-31'
+    volatility: float = 0.60
+    strong_threshold: float = 0.25
+    weak_threshold: float = 0.15
+    neutral_threshold: float = 0.05
+    contracts: int = 100
+    initial_capital: float = 10000
+
+    @property
+    def expiry_ns(self):
+        return pd.Timestamp(self.expiry).value
+
+
+def load_kalshi_strike(kalshi_csv, strike_column):
+    """
+    Load one strike of a Kalshi BTC ladder as timestamp, market_price (0-1).
+    """
+    kalshi = pd.read_csv(kalshi_csv)
+    kalshi['timestamp'] = pd.to_datetime(kalshi['timestamp']).dt.tz_localize(None)
+    kalshi['market_price'] = kalshi[strike_column] / 100
+    return kalshi[['timestamp', 'market_price']].dropna()
+
+
+def load_btc_minutes(btc_csv):
+    """Load BTC_1min_*.csv as timestamp, btc_price, btc_high, btc_low."""
+    btc = pd.read_csv(btc_csv)
+    btc['timestamp'] = pd.to_datetime(btc['timestamp']).dt.tz_localize(None)
+    btc = btc[['timestamp', 'close', 'high', 'low']].copy()
+    btc.columns = ['timestamp', 'btc_price', 'btc_high', 'btc_low']
+    return btc
+
+
+def merge_btc_kalshi(btc, kalshi):
+    """
+    As-of join of Kalshi prices onto BTC minutes (last Kalshi price at or
+    before each BTC timestamp). Rows before the first Kalshi price are dropped.
+    """
+    df = pd.merge_asof(
+        btc.sort_values('timestamp'),
+        kalshi.sort_values('timestamp'),
+        on='timestamp',
+        direction='backward'
+    )
+    return df[df['market_price'].notna()].copy()
+
+
+def days_to_expiry(timestamp_ns, expiry_ns):
+    """Days from timestamp(s) to expiry, from int64 nanoseconds."""
+    return (expiry_ns - timestamp_ns) / NS_PER_DAY
+
+
+def calculate_actual_probability(current_price, strike, days_to_expiry, volatility=0.60):
+    """
+    Probability that BTC finishes above strike at expiry using simplified BSM.
+
+    Same formula as the scripts, but works on scalars or arrays.
+
+    Args:
+        current_price: Current BTC spot price
+        strike: Strike price
+        days_to_expiry: Days until expiry
+        volatility: Annualized volatility (default 60% for crypto)
+
+    Returns:
+        Probability (0-1) that BTC > strike at expiry
+    """
+    current_price = np.asarray(current_price, dtype=float)
+    days = np.asarray(days_to_expiry, dtype=float)
+    live = days > 0
+
+    T = np.where(live, days, 1.0) / 365.0
+    # d2 = [ln(S/K) + (r - 0.5*σ²)T] / (σ√T), r=0
+    d2 = (np.log(current_price / strike) - 0.5 * volatility**2 * T) / (volatility * np.sqrt(T))
+    prob = np.where(live, norm.cdf(d2), (current_price > strike).astype(float))
+    return prob if prob.ndim else float(prob)
+
+
+def step_signal(mispricing, previous_signal, strong, weak, neutral):
+    """
+    One step of the scaled hysteresis signal (-2..2).
+
+    Outside the neutral band and below the weak threshold the previous signal
+    is held.
+    """
+    if mispricing > strong:
+        return 2
+    if mispricing > weak:
+        return 1
+    if mispricing < -strong:
+        return -2
+    if mispricing < -weak:
+        return -1
+    if abs(mispricing) < neutral:
+        return 0
+    return previous_signal
+
+
+def generate_signals(mispricing, strong, weak, neutral):
+    """Hysteresis signal for a whole series; the first row is always 0."""
+    mispricing = np.asarray(mispricing, dtype=float)
+    signal = np.zeros(len(mispricing), dtype=np.int64)
+    for i in range(1, len(mispricing)):
+        signal[i] = step_signal(mispricing[i], signal[i - 1], strong, weak, neutral)
+    return signal
+
+
+def dynamic_kalshi_pnl(prices, signals, contracts):
+    """
+    Strategy C Kalshi P&L: re-enter at every signal change, close at the end.
+
+    Returns:
+        (pnl_after_fees, total_fees, num_trades)
+    """
+    prices = np.asarray(prices, dtype=float)
+    signals = np.asarray(signals)
+    pnl = 0
+    position = 0
+    entry_price = 0
+    total_fees = 0
+    num_trades = 0
+
+    for i in range(1, len(prices)):
+        if position != signals[i]:
+            if position != 0:
+                pnl += (prices[i] - entry_price) * position * contracts
+            position = signals[i]
+            entry_price = prices[i]
+            total_fees += kalshi_fee(prices[i], contracts)
+            num_trades += 1
+
+    if position != 0:
+        pnl += (prices[-1] - entry_price) * position * contracts
+    return pnl - total_fees, total_fees, num_trades
+
+
+def run_backtest(df, config):
+    """
+    Run Strategies A, B and C over a merged BTC/Kalshi frame.
+
+    Parameters:
+    - df: Output of merge_btc_kalshi
+    - config: HedgeConfig
+
+    Returns:
+        (df, results) where df gains days_to_expiry, actual_prob, implied_prob,
+        prob_mispricing, signal, position_change and trade columns, and
+        results is a dict of strategy P&L figures
+    """
+    df = df.copy()
+    stamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    df['days_to_expiry'] = days_to_expiry(stamps, config.expiry_ns)
+    df['actual_prob'] = calculate_actual_probability(
+        df['btc_price'].to_numpy(), config.strike, df['days_to_expiry'].to_numpy(), config.volatility
+    )
+    df['implied_prob'] = df['market_price']
+    df['prob_mispricing'] = df['actual_prob'] - df['implied_prob']
+    df['signal'] = generate_signals(
+        df['prob_mispricing'].to_numpy(),
+        config.strong_threshold, config.weak_threshold, config.neutral_threshold
+    )
+    df['position_change'] = df['signal'].diff()
+    df['trade'] = (df['position_change'] != 0) & (df['position_change'].notna())
+
+    btc_prices = df['btc_price'].to_numpy()
+    market_prices = df['market_price'].to_numpy()
+    btc_return = (btc_prices[-1] - btc_prices[0]) / btc_prices[0]
+    strategy_a_pnl = config.initial_capital * btc_return
+    kalshi_pnl_b = (market_prices[0] - market_prices[-1]) * config.contracts
+    kalshi_pnl_c, total_fees, num_trades = dynamic_kalshi_pnl(
+        market_prices, df['signal'].to_numpy(), config.contracts
+    )
+
+    results = {
+        'strategy_a_pnl': strategy_a_pnl,
+        'strategy_b_pnl': strategy_a_pnl + kalshi_pnl_b,
+        'strategy_c_pnl': strategy_a_pnl + kalshi_pnl_c,
+        'kalshi_pnl_b': kalshi_pnl_b,
+        'kalshi_pnl_c': kalshi_pnl_c,
+        'total_fees': total_fees,
+        'num_trades': num_trades,
+    }
+    return df, results
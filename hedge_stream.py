@@ -0,0 +1,202 @@
+"""
+Live BTC Hedge Engine
+=====================
+Tick-driven version of the BTC hedge signal in hedge_backtest.py.
+
+Consumes interleaved BTC spot ticks and Kalshi price updates and keeps only
+the state needed for the next tick: latest Kalshi price, previous signal,
+open position, entry price and running P&L/fees. Each tick is O(1), and a
+TradeIntent is emitted the moment the signal changes.
+
+Fed the same data, the per-row values and final P&L are bit-identical to
+hedge_backtest.run_backtest, provided the source delivers a Kalshi update
+before a BTC tick with the same timestamp (frame_events does this).
+"""
+
+import heapq
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from hedge_backtest import HedgeConfig, NS_PER_DAY, step_signal
+from kalshi_fees import kalshi_fee
+
+KALSHI = 'kalshi'
+BTC = 'btc'
+_TIE_ORDER = {KALSHI: 0, BTC: 1}
+
+
+@dataclass
+class TradeIntent:
+    """Order the strategy wants to place after a signal change."""
+    timestamp: pd.Timestamp
+    from_signal: int
+    to_signal: int
+    market_price: float
+    contracts: int
+    fee: float
+    mispricing: float
+
+
+def _to_ns(timestamp):
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return pd.Timestamp(timestamp).value
+
+
+def frame_events(btc, kalshi):
+    """
+    Turn stored frames into one time-ordered event stream.
+
+    Args:
+        btc: DataFrame with timestamp, btc_price (load_btc_minutes)
+        kalshi: DataFrame with timestamp, market_price (load_kalshi_strike)
+
+    Yields:
+        (timestamp, kind, value) tuples; Kalshi updates come first on ties,
+        matching merge_asof's backward join
+    """
+    def stream(frame, kind, column):
+        stamps = frame['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        for ns, value in zip(stamps.tolist(), frame[column].tolist()):
+            yield (ns, _TIE_ORDER[kind], kind, value)
+
+    merged = heapq.merge(
+        stream(kalshi.sort_values('timestamp', kind='stable'), KALSHI, 'market_price'),
+        stream(btc.sort_values('timestamp', kind='stable'), BTC, 'btc_price'),
+        key=lambda event: (event[0], event[1]),
+    )
+    for ns, _, kind, value in merged:
+        yield ns, kind, value
+
+
+class HedgeStreamEngine:
+    """
+    Constant-memory hedge signal and Strategy A/B/C P&L.
+
+    Example:
+        engine = HedgeStreamEngine(HedgeConfig(strike=130000, expiry='2025-08-31'))
+        for intent in engine.run(frame_events(btc, kalshi)):
+            send(intent)
+        print(engine.results())
+    """
+
+    def __init__(self, config=None):
+        self.config = config or HedgeConfig()
+        self._expiry_ns = self.config.expiry_ns
+        self.market_price = np.nan
+        self.rows = 0
+        self.signal = 0
+        self.position = 0
+        self.entry_price = 0
+        self.kalshi_pnl = 0
+        self.total_fees = 0
+        self.num_trades = 0
+        self.first_btc = self.last_btc = None
+        self.first_market = self.last_market = None
+        self.last_row = None
+
+    def on_kalshi(self, timestamp, market_price):
+        """Record a Kalshi price update (probability 0-1). NaN updates are ignored."""
+        if market_price == market_price:
+            self.market_price = market_price
+
+    def on_btc(self, timestamp, btc_price):
+        """
+        Process one BTC spot tick against the latest Kalshi price.
+
+        Returns:
+            TradeIntent if the signal changed on this tick, else None
+        """
+        market_price = self.market_price
+        if market_price != market_price:
+            return None  # no Kalshi price yet, same as dropping unmatched rows
+
+        cfg = self.config
+        ts_ns = _to_ns(timestamp)
+        days = (self._expiry_ns - ts_ns) / NS_PER_DAY
+        if days <= 0:
+            prob = 1.0 if btc_price > cfg.strike else 0.0
+        else:
+            T = days / 365.0
+            d2 = (np.log(btc_price / cfg.strike) - 0.5 * cfg.volatility**2 * T) / (cfg.volatility * np.sqrt(T))
+            prob = ndtr(d2)
+        mispricing = prob - market_price
+
+        previous = self.signal
+        if self.rows > 0:
+            self.signal = step_signal(mispricing, previous, cfg.strong_threshold,
+                                      cfg.weak_threshold, cfg.neutral_threshold)
+        else:
+            self.first_btc = btc_price
+            self.first_market = market_price
+        self.rows += 1
+        self.last_btc = btc_price
+        self.last_market = market_price
+        self.last_row = {
+            'timestamp': ts_ns, 'btc_price': btc_price, 'market_price': market_price,
+            'days_to_expiry': days, 'actual_prob': prob, 'prob_mispricing': mispricing,
+            'signal': self.signal,
+        }
+
+        if self.position == self.signal:
+            return None
+
+        if self.position != 0:
+            self.kalshi_pnl += (market_price - self.entry_price) * self.position * cfg.contracts
+        fee = kalshi_fee(market_price, cfg.contracts)
+        self.total_fees += fee
+        self.num_trades += 1
+        intent = TradeIntent(
+            timestamp=pd.Timestamp(ts_ns), from_signal=self.position, to_signal=self.signal,
+            market_price=market_price, contracts=(self.signal - self.position) * cfg.contracts,
+            fee=fee, mispricing=mispricing,
+        )
+        self.position = self.signal
+        self.entry_price = market_price
+        return intent
+
+    def on_event(self, timestamp, kind, value):
+        """Dispatch one (timestamp, kind, value) event from a source."""
+        if kind == KALSHI:
+            self.on_kalshi(timestamp, value)
+            return None
+        if kind == BTC:
+            return self.on_btc(timestamp, value)
+        raise ValueError(f"Unknown event kind: {kind!r}")
+
+    def run(self, source):
+        """Consume an event source, yielding TradeIntents as they happen."""
+        for timestamp, kind, value in source:
+            intent = self.on_event(timestamp, kind, value)
+            if intent is not None:
+                yield intent
+
+    def results(self):
+        """
+        Strategy P&L as if the stream ended now (open position marked at the
+        last Kalshi price). Same keys as hedge_backtest.run_backtest.
+        """
+        cfg = self.config
+        if self.rows == 0:
+            raise ValueError("No aligned ticks processed yet")
+
+        btc_return = (self.last_btc - self.first_btc) / self.first_btc
+        strategy_a_pnl = cfg.initial_capital * btc_return
+        kalshi_pnl_b = (self.first_market - self.last_market) * cfg.contracts
+        kalshi_pnl_c = self.kalshi_pnl
+        if self.position != 0:
+            kalshi_pnl_c += (self.last_market - self.entry_price) * self.position * cfg.contracts
+        kalshi_pnl_c -= self.total_fees
+
+        return {
+            'strategy_a_pnl': strategy_a_pnl,
+            'strategy_b_pnl': strategy_a_pnl + kalshi_pnl_b,
+            'strategy_c_pnl': strategy_a_pnl + kalshi_pnl_c,
+            'kalshi_pnl_b': kalshi_pnl_b,
+            'kalshi_pnl_c': kalshi_pnl_c,
+            'total_fees': self.total_fees,
+            'num_trades': self.num_trades,
+        }
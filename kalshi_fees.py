@@ -0,0 +1,32 @@
+"""
+Kalshi Fee Schedule
+===================
+Trading fee used by the backtests: 7% of C * P * (1 - P), rounded up to the cent.
+"""
+
+import numpy as np
+
+FEE_RATE = 0.07
+
+
+def kalshi_fee(price, contracts, fee_rate=FEE_RATE):
+    """
+    Fee in dollars for one fill.
+
+    Same formula as the fee line in the BTC hedge scripts; works on scalars
+    or numpy arrays.
+
+    Args:
+        price: Contract price as a probability (0-1)
+        contracts: Number of contracts in the fill
+        fee_rate: Fee multiplier (0.07 for standard markets)
+
+    Returns:
+        Fee in dollars, rounded up to the cent
+    """
+    return np.ceil(fee_rate * contracts * price * (1 - price) * 100) / 100
+
+
+def fee_per_contract_cents(price, contracts, fee_rate=FEE_RATE):
+    """Fee for a fill of `contracts`, expressed in cents per contract."""
+    return kalshi_fee(price, contracts, fee_rate) * 100 / contracts
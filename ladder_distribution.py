@@ -0,0 +1,203 @@
+"""
+Implied Outcome Distributions
+=============================
+Turns a Kalshi bucket ladder into a per-minute probability distribution.
+
+Exclusive ladders (temperature "65° to 66°" buckets) are normalised directly.
+Cumulative ladders ("Above X inches", "$X or above") are read as survival
+probabilities P(X >= t), made non-increasing, and differenced into interval
+masses. Everything is computed on (minutes x buckets) arrays, so one call
+gives the PMF, CDF, implied mean/variance and quantiles for the whole history.
+
+Each bin is treated as uniform between its edges. Open-ended tail bins get the
+same width as their neighbouring bin, which is a convention, not market data.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ladders import bucket_bounds, bucket_columns, ladder_kind, load_price_history
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _tail_width(widths, default=1.0):
+    widths = [w for w in widths if w > 0]
+    return float(np.median(widths)) if widths else default
+
+
+def ladder_bins(columns):
+    """
+    Work out the outcome bins implied by a ladder.
+
+    Args:
+        columns: Bucket column headers
+
+    Returns:
+        (kind, order, edges, labels) where order sorts the columns by value,
+        edges has one more entry than there are bins, and labels names each bin
+    """
+    if not len(columns):
+        raise ValueError("a ladder needs at least one bucket column")
+    bounds = bucket_bounds(columns)
+    kind = ladder_kind(columns)
+
+    if kind == 'cumulative':
+        order = np.argsort([bounds[c][0] for c in columns], kind='stable')
+        thresholds = np.array([bounds[columns[i]][0] for i in order])
+        width = _tail_width(np.diff(thresholds))
+        edges = np.concatenate([[thresholds[0] - width], thresholds, [thresholds[-1] + width]])
+        labels = [f"below {thresholds[0]:g}"]
+        labels += [f"{lo:g} to {hi:g}" for lo, hi in zip(thresholds[:-1], thresholds[1:])]
+        labels += [f"{thresholds[-1]:g} or above"]
+        return kind, order, edges, labels
+
+    def sort_key(col):
+        low, high = bounds[col]
+        return -np.inf if low is None else low
+
+    order = np.array(sorted(range(len(columns)), key=lambda i: sort_key(columns[i])))
+    lows = [bounds[columns[i]][0] for i in order]
+    highs = [bounds[columns[i]][1] for i in order]
+    # Buckets are inclusive integer ranges, so the boundary sits halfway
+    # between one bucket's high and the next bucket's low
+    inner = [(h + l) / 2 for h, l in zip(highs[:-1], lows[1:])]
+    width = _tail_width(np.diff(inner))
+    # A single bucket has no inner edge: its open side (if any) gets the default width
+    first_inner = inner[0] if inner else highs[0] + 0.5 if highs[0] is not None else None
+    last_inner = inner[-1] if inner else lows[0] - 0.5 if lows[0] is not None else None
+    first = first_inner - width if lows[0] is None else lows[0] - 0.5
+    last = last_inner + width if highs[-1] is None else highs[-1] + 0.5
+    edges = np.array([first] + inner + [last], dtype=float)
+    return kind, order, edges, [columns[i] for i in order]
+
+
+def _as_of_prices(kalshi_df, columns, order):
+    """Forward-filled prices as probabilities, columns sorted by value."""
+    prices = kalshi_df[columns].ffill().to_numpy(dtype=float) / 100.0
+    return np.clip(prices[:, order], 0.0, 1.0)
+
+
+def implied_pmf(kalshi_df):
+    """
+    Per-minute implied probability mass over the ladder's bins.
+
+    Parameters:
+    - kalshi_df: Price history from ladders.load_price_history
+
+    Returns:
+        (pmf, edges, labels) where pmf has shape (minutes, bins) and rows with
+        no usable quotes are NaN
+    """
+    columns = bucket_columns(kalshi_df)
+    kind, order, edges, labels = ladder_bins(columns)
+    prices = _as_of_prices(kalshi_df, columns, order)
+
+    if kind == 'exclusive':
+        # Unquoted buckets carry no mass; rows are rescaled to sum to one
+        mass = np.nan_to_num(prices)
+        total = mass.sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pmf = np.where(total > 0, mass / total, np.nan)
+        return pmf, edges, labels
+
+    # Survival curve: unquoted thresholds borrow the next quoted value to the
+    # left (or right, for leading gaps), then it is forced non-increasing
+    survival = pd.DataFrame(prices).ffill(axis=1).bfill(axis=1).to_numpy()
+    survival = np.minimum.accumulate(survival, axis=1)
+    ones = np.ones((len(survival), 1))
+    padded = np.hstack([ones, survival, np.zeros_like(ones)])
+    pmf = padded[:, :-1] - padded[:, 1:]
+    pmf[np.isnan(survival).all(axis=1)] = np.nan
+    return pmf, edges, labels
+
+
+def pmf_moments(pmf, edges):
+    """
+    Mean and variance of per-row PMFs with uniform mass inside each bin.
+
+    Returns:
+        (mean, variance), each shape (minutes,)
+    """
+    lo, hi = edges[:-1], edges[1:]
+    mid = (lo + hi) / 2
+    mean = pmf @ mid
+    second = pmf @ ((lo**2 + lo * hi + hi**2) / 3)
+    return mean, np.maximum(second - mean**2, 0.0)
+
+
+def pmf_quantiles(pmf, edges, quantiles=DEFAULT_QUANTILES):
+    """
+    Quantiles of per-row PMFs by linear interpolation inside bins.
+
+    Returns:
+        Array of shape (minutes, len(quantiles))
+    """
+    cdf = np.cumsum(pmf, axis=1)
+    q = np.asarray(quantiles, dtype=float)
+    # Bin holding each quantile: number of bins whose CDF is still below q
+    idx = (cdf[:, :, None] < q[None, None, :] - 1e-12).sum(axis=1)
+    idx = np.minimum(idx, pmf.shape[1] - 1)
+    rows = np.arange(len(pmf))[:, None]
+
+    cdf_before = np.where(idx > 0, cdf[rows, np.maximum(idx - 1, 0)], 0.0)
+    mass = pmf[rows, idx]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        frac = np.where(mass > 0, (q[None, :] - cdf_before) / mass, 0.0)
+    frac = np.clip(frac, 0.0, 1.0)
+    out = edges[idx] + frac * (edges[idx + 1] - edges[idx])
+    out[np.isnan(pmf).any(axis=1)] = np.nan
+    return out
+
+
+def implied_distribution(kalshi_df):
+    """
+    Per-minute implied PMF and CDF as DataFrames indexed by timestamp.
+
+    Returns:
+        (pmf_df, cdf_df) with one column per outcome bin
+    """
+    pmf, edges, labels = implied_pmf(kalshi_df)
+    index = pd.DatetimeIndex(kalshi_df['timestamp'], name='timestamp')
+    pmf_df = pd.DataFrame(pmf, index=index, columns=labels)
+    return pmf_df, pmf_df.cumsum(axis=1, skipna=False)
+
+
+def implied_summary(kalshi_df, quantiles=DEFAULT_QUANTILES):
+    """
+    Compact per-minute summary of the implied distribution.
+
+    Returns:
+        DataFrame indexed by timestamp with mean, variance, std, one q<pct>
+        column per quantile, and quoted_sum (raw sum of as-of prices in ¢,
+        useful for spotting overround on exclusive ladders)
+    """
+    columns = bucket_columns(kalshi_df)
+    pmf, edges, labels = implied_pmf(kalshi_df)
+    mean, var = pmf_moments(pmf, edges)
+    qs = pmf_quantiles(pmf, edges, quantiles)
+
+    summary = pd.DataFrame({'mean': mean, 'variance': var, 'std': np.sqrt(var)},
+                           index=pd.DatetimeIndex(kalshi_df['timestamp'], name='timestamp'))
+    for j, q in enumerate(quantiles):
+        summary[f"q{round(q * 100):02d}"] = qs[:, j]
+    summary['quoted_sum'] = kalshi_df[columns].ffill().sum(axis=1, min_count=1).to_numpy()
+    return summary
+
+
+def main():
+    """Print the final implied distribution summary for every ladder in this repo"""
+    files = [
+        'kalshi-price-history-kxhighlax-25dec15-minute.csv',
+        'kalshi-price-history-kxhighchi-25jul26-minute.csv',
+        'kalshi-price-history-kxnycsnowm-26jan-minute.csv',
+        'kalshi-price-history-btcmaxy-24dec31-minute.csv',
+    ]
+    for kalshi_csv in files:
+        summary = implied_summary(load_price_history(kalshi_csv))
+        print(f"\n{kalshi_csv}")
+        print(summary.dropna().iloc[[0, -1]].round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
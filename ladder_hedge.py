@@ -0,0 +1,196 @@
+"""
+Multi-Strike Ladder Hedging
+===========================
+Portfolio version of the BTC hedge backtest: every strike of a Kalshi BTC
+ladder (btcmaxy-24dec31 has seven, kxbtcmaxm-aug25 five) is evaluated at once
+as (minutes x strikes) arrays instead of one SELECTED_STRIKE per run.
+
+Per strike the signals follow hedge_backtest.run_backtest: the first minute
+with a price is always flat and the hysteresis signal holds between zones.
+Kalshi P&L is computed in mark-to-market form, which equals the scripts'
+entry/exit bookkeeping up to float rounding. Fees are charged on the
+contracts each fill actually trades (|change in units| x `contracts`,
+rounded up per fill), so a flip from long to short pays on twice
+`contracts`, where the scripts charge one fee per signal change.
+
+Cross-strike limits scale every strike's position down proportionally when
+the gross (sum of |units|) or net (|sum of units|) exposure would exceed them.
+The rebalances this causes pay fees on their size but are not counted as
+trades: num_trades counts signal changes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from hedge_backtest import HedgeConfig, calculate_actual_probability, days_to_expiry, load_btc_minutes
+from kalshi_fees import kalshi_fee
+from ladders import bucket_columns, ladder_thresholds, load_price_history
+
+
+def load_kalshi_ladder(kalshi_csv):
+    """
+    Load every strike of a BTC ladder.
+
+    Returns:
+        (kalshi, strikes) where kalshi has timestamp plus one 0-1 price column
+        per strike (named by header), and strikes holds the numeric strikes
+    """
+    kalshi = load_price_history(kalshi_csv)
+    columns = bucket_columns(kalshi)
+    kalshi[columns] = kalshi[columns] / 100
+    return kalshi, ladder_thresholds(columns)
+
+
+def merge_btc_ladder(btc, kalshi):
+    """
+    As-of join of a whole ladder onto BTC minutes.
+
+    Each strike is forward-filled first, so every cell holds that strike's
+    last price at or before the BTC minute, exactly as merging the strike on
+    its own would. Cells before a strike's first price stay NaN.
+    """
+    columns = bucket_columns(kalshi)
+    ladder = kalshi.copy()
+    ladder[columns] = ladder[columns].ffill()
+    df = pd.merge_asof(
+        btc.sort_values('timestamp'),
+        ladder.sort_values('timestamp'),
+        on='timestamp',
+        direction='backward'
+    )
+    return df[df[columns].notna().any(axis=1)].reset_index(drop=True)
+
+
+def ladder_signals(mispricing, strong, weak, neutral):
+    """
+    Hysteresis signal for every strike at once.
+
+    Rows falling in a decisive zone set the signal; rows in the hold band
+    repeat the last decisive value. The first priced row of each strike is
+    forced to 0, matching generate_signals.
+
+    Args:
+        mispricing: (minutes, strikes) array, NaN where the strike is unpriced
+
+    Returns:
+        int array of the same shape (0 where unpriced)
+    """
+    m = np.asarray(mispricing, dtype=float)
+    priced = ~np.isnan(m)
+    decided = np.select(
+        [m > strong, m > weak, m < -strong, m < -weak, np.abs(m) < neutral],
+        [2, 1, -2, -1, 0],
+        default=0,
+    )
+    decisive = (m > weak) | (m < -weak) | (np.abs(m) < neutral)
+
+    first = priced & ~np.vstack([np.zeros((1, m.shape[1]), dtype=bool), priced[:-1]])
+    decided = np.where(first, 0, decided)
+    decisive = (decisive & priced) | first
+
+    rows = np.arange(len(m))[:, None]
+    last = np.maximum.accumulate(np.where(decisive, rows, -1), axis=0)
+    signal = np.take_along_axis(decided, np.maximum(last, 0), axis=0)
+    return np.where(priced & (last >= 0), signal, 0).astype(np.int64)
+
+
+def apply_position_limits(signals, max_gross_units=None, max_net_units=None):
+    """
+    Scale positions so ladder-wide exposure stays within limits.
+
+    Returns:
+        float array of position units, same shape as signals
+    """
+    positions = signals.astype(float)
+    scale = np.ones(len(positions))
+    if max_gross_units is not None:
+        gross = np.abs(positions).sum(axis=1)
+        scale = np.minimum(scale, np.where(gross > max_gross_units, max_gross_units / np.maximum(gross, 1e-12), 1.0))
+    if max_net_units is not None:
+        net = np.abs(positions.sum(axis=1))
+        scale = np.minimum(scale, np.where(net > max_net_units, max_net_units / np.maximum(net, 1e-12), 1.0))
+    return positions * scale[:, None]
+
+
+def run_ladder_backtest(df, strikes, config=None, max_gross_units=None, max_net_units=None):
+    """
+    Backtest every strike of a ladder in one pass.
+
+    Parameters:
+    - df: Output of merge_btc_ladder
+    - strikes: Numeric strikes, in the same order as the ladder columns
+    - config: HedgeConfig (strike is ignored; thresholds, vol, expiry used)
+    - max_gross_units / max_net_units: Optional cross-strike limits
+
+    Returns:
+        (arrays, summary, portfolio) where arrays holds the (minutes x strikes)
+        matrices, summary is one row per strike, and portfolio totals the ladder
+    """
+    config = config or HedgeConfig()
+    columns = [c for c in df.columns if c not in ('timestamp', 'btc_price', 'btc_high', 'btc_low')]
+    strikes = np.asarray(strikes, dtype=float)
+    prices = df[columns].to_numpy(dtype=float)
+
+    stamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    days = days_to_expiry(stamps, config.expiry_ns)
+    btc = df['btc_price'].to_numpy(dtype=float)
+    prob = calculate_actual_probability(btc[:, None], strikes[None, :], days[:, None], config.volatility)
+    mispricing = prob - prices
+
+    signals = ladder_signals(mispricing, config.strong_threshold, config.weak_threshold,
+                             config.neutral_threshold)
+    positions = apply_position_limits(signals, max_gross_units, max_net_units)
+
+    priced = ~np.isnan(prices)
+    held = np.vstack([np.zeros((1, len(columns))), positions[:-1]])
+    price_moves = np.diff(np.nan_to_num(prices), axis=0, prepend=np.nan_to_num(prices[:1]))
+    kalshi_pnl = (held * price_moves * config.contracts).sum(axis=0)
+
+    # Fees are charged on the contracts each fill actually trades, so the
+    # small rebalances caused by cross-strike limits pay for their own size
+    traded = np.where(priced, np.abs(positions - held), 0.0) * config.contracts
+    fees = np.where(traded > 0, kalshi_fee(np.nan_to_num(prices), traded), 0.0).sum(axis=0)
+    held_signals = np.vstack([np.zeros((1, len(columns)), dtype=signals.dtype), signals[:-1]])
+    trades = (signals != held_signals) & priced
+
+    btc_return = (btc[-1] - btc[0]) / btc[0]
+    strategy_a_pnl = config.initial_capital * btc_return
+
+    summary = pd.DataFrame({
+        'strike': strikes,
+        'num_trades': trades.sum(axis=0),
+        'total_fees': fees,
+        'kalshi_pnl_c': kalshi_pnl - fees,
+        'mean_mispricing': np.nanmean(np.where(priced, mispricing, np.nan), axis=0),
+    }, index=pd.Index(columns, name='market'))
+    portfolio = {
+        'strategy_a_pnl': strategy_a_pnl,
+        'kalshi_pnl_c': summary['kalshi_pnl_c'].sum(),
+        'strategy_c_pnl': strategy_a_pnl + summary['kalshi_pnl_c'].sum(),
+        'total_fees': fees.sum(),
+        'num_trades': int(trades.sum()),
+    }
+    arrays = {
+        'actual_prob': prob,
+        'implied_prob': prices,
+        'prob_mispricing': mispricing,
+        'signal': signals,
+        'position': positions,
+        'trade': trades,
+    }
+    return arrays, summary, portfolio
+
+
+def main():
+    """Run the whole 2024 BTC max ladder (needs BTC_1min_2024.csv)"""
+    kalshi, strikes = load_kalshi_ladder('kalshi-price-history-btcmaxy-24dec31-minute.csv')
+    df = merge_btc_ladder(load_btc_minutes('BTC_1min_2024.csv'), kalshi)
+    _, summary, portfolio = run_ladder_backtest(df, strikes, HedgeConfig(expiry='2024-12-31'),
+                                                max_gross_units=6)
+    print(summary.to_string())
+    print(f"\n  Ladder Kalshi P&L (after fees): ${portfolio['kalshi_pnl_c']:,.2f}")
+    print(f"  Total P&L: ${portfolio['strategy_c_pnl']:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Ladder Consistency & Arbitrage Scanner
+======================================
+Flags minutes where a Kalshi ladder is internally inconsistent.
+
+- Exclusive ladders (temperature buckets): the as-of prices of all buckets
+  should sum to about 100¢. Above that, selling YES on every quoted bucket
+  locks in sum - 100 even if some buckets have no price yet; below it,
+  buying every bucket locks in 100 - sum, which needs all of them quoted.
+- Cumulative ladders ("Above X", "$X or above"): a higher threshold can never
+  be worth more than a lower one. If it is, buying YES on the lower threshold
+  and NO on the higher one pays at least 100¢ for less than 100¢.
+
+Edges are computed on recorded prices, not tradeable quotes, and are reported
+in cents per contract after the Kalshi fee on every leg.
+
+scan_ladder() runs over a whole stored history at once. LadderScanner runs the
+same checks incrementally, one bucket update at a time.
+"""
+
+import numpy as np
+import pandas as pd
+
+from kalshi_fees import fee_per_contract_cents
+from ladders import bucket_columns, ladder_kind, ladder_thresholds, load_price_history
+
+DEFAULT_SUM_TOLERANCE = 5.0  # cents
+DEFAULT_CONTRACTS = 100
+
+
+def _scan_exclusive(prices, sum_tolerance, contracts):
+    """
+    Row-wise checks on an exclusive ladder. prices: (rows, buckets) in cents.
+
+    Selling YES on every quoted bucket collects the quoted sum and pays out
+    at most 100¢ whatever buckets are missing, so an overround is flagged on
+    the quoted buckets alone. Buying every bucket only pays 100¢ if every
+    bucket is quoted, so an underround needs a complete row.
+    """
+    complete = ~np.isnan(prices).any(axis=1)
+    quoted_sum = np.nansum(prices, axis=1)
+    fees = np.nansum(fee_per_contract_cents(prices / 100, contracts), axis=1)
+
+    sell = quoted_sum - 100 > sum_tolerance
+    buy = complete & (100 - quoted_sum > sum_tolerance)
+    flagged = sell | buy
+    gross = np.abs(quoted_sum - 100)
+    return {
+        'quoted_sum': quoted_sum,
+        'flagged': flagged,
+        'action': np.where(sell, 'sell_all_yes', np.where(buy, 'buy_all_yes', '')),
+        'gross_edge': np.where(flagged, gross, 0.0),
+        'net_edge': np.where(flagged, gross - fees, 0.0),
+        'buy_leg': np.full(len(prices), -1),
+        'sell_leg': np.full(len(prices), -1),
+    }
+
+
+def _scan_cumulative(prices, contracts):
+    """
+    Row-wise monotonicity check on a cumulative ladder.
+
+    prices must be sorted by ascending threshold. The worst violation in each
+    row is max over j of p[j] - min(p[:j]), found with a running minimum.
+    """
+    rows, width = prices.shape
+    filled = np.where(np.isnan(prices), np.inf, prices)
+    running_min = np.minimum.accumulate(filled, axis=1)
+    prev_min = np.hstack([np.full((rows, 1), np.inf), running_min[:, :-1]])
+    gaps = np.where(np.isnan(prices), -np.inf, prices - prev_min)
+
+    sell = gaps.argmax(axis=1)
+    gross = gaps[np.arange(rows), sell]
+    # Index of the cheapest lower threshold behind the worst gap
+    masked = np.where(np.arange(width)[None, :] < sell[:, None], filled, np.inf)
+    buy = masked.argmin(axis=1)
+
+    flagged = np.isfinite(gross) & (gross > 0)
+    p_buy = np.take_along_axis(prices, buy[:, None], axis=1)[:, 0] / 100
+    p_sell = np.take_along_axis(prices, sell[:, None], axis=1)[:, 0] / 100
+    # NO on the higher threshold costs 1 - p_sell, so its fee is symmetric
+    fees = fee_per_contract_cents(p_buy, contracts) + fee_per_contract_cents(p_sell, contracts)
+
+    return {
+        'quoted_sum': np.nansum(prices, axis=1),
+        'flagged': flagged,
+        'action': np.where(flagged, 'buy_low_yes_buy_high_no', ''),
+        'gross_edge': np.where(flagged, gross, 0.0),
+        'net_edge': np.where(flagged, gross - fees, 0.0),
+        'buy_leg': np.where(flagged, buy, -1),
+        'sell_leg': np.where(flagged, sell, -1),
+    }
+
+
+def _ladder_layout(columns):
+    """Column order used by the checks: by threshold for cumulative ladders."""
+    kind = ladder_kind(columns)
+    if kind == 'cumulative':
+        order = np.argsort(ladder_thresholds(columns), kind='stable')
+    else:
+        order = np.arange(len(columns))
+    return kind, order
+
+
+def _scan_arrays(prices, kind, sum_tolerance, contracts):
+    if kind == 'cumulative':
+        return _scan_cumulative(prices, contracts)
+    return _scan_exclusive(prices, sum_tolerance, contracts)
+
+
+def scan_ladder(kalshi_df, sum_tolerance=DEFAULT_SUM_TOLERANCE, contracts=DEFAULT_CONTRACTS):
+    """
+    Check every minute of a stored price history.
+
+    Parameters:
+    - kalshi_df: Price history from ladders.load_price_history
+    - sum_tolerance: Allowed distance of an exclusive ladder's sum from 100¢
+    - contracts: Fill size used to round fees
+
+    Returns:
+        DataFrame indexed by timestamp with quoted_sum, flagged, action,
+        gross_edge and net_edge (¢ per contract), and buy_leg / sell_leg
+        bucket names for cumulative violations
+    """
+    columns = bucket_columns(kalshi_df)
+    kind, order = _ladder_layout(columns)
+    prices = kalshi_df[columns].ffill().to_numpy(dtype=float)[:, order]
+    result = _scan_arrays(prices, kind, sum_tolerance, contracts)
+
+    names = np.array([columns[i] for i in order] + [''], dtype=object)
+    result['buy_leg'] = names[result['buy_leg']]
+    result['sell_leg'] = names[result['sell_leg']]
+    return pd.DataFrame(result, index=pd.DatetimeIndex(kalshi_df['timestamp'], name='timestamp'))
+
+
+class LadderScanner:
+    """
+    Incremental version of scan_ladder for live ticks.
+
+    Holds the latest price of every bucket; each update changes one bucket and
+    re-runs the row check on that single ladder, which is O(buckets).
+
+    Example:
+        scanner = LadderScanner(columns)
+        alert = scanner.update(timestamp, "65° to 66°", 18.0)
+        if alert is not None: ...
+    """
+
+    def __init__(self, columns, sum_tolerance=DEFAULT_SUM_TOLERANCE, contracts=DEFAULT_CONTRACTS):
+        self.columns = list(columns)
+        self.kind, order = _ladder_layout(self.columns)
+        self._slot = {self.columns[i]: pos for pos, i in enumerate(order)}
+        self._names = [self.columns[i] for i in order]
+        self._prices = np.full((1, len(self.columns)), np.nan)
+        self.sum_tolerance = sum_tolerance
+        self.contracts = contracts
+
+    def prices(self):
+        """Current as-of prices (¢) keyed by bucket."""
+        return {name: self._prices[0, self._slot[name]] for name in self.columns}
+
+    def update(self, timestamp, bucket, price):
+        """
+        Apply one price update and re-check the ladder.
+
+        Returns:
+            dict describing the violation (same fields as a scan_ladder row),
+            or None if the ladder is consistent
+        """
+        if price is not None and not np.isnan(price):
+            self._prices[0, self._slot[bucket]] = price
+        return self._check(timestamp)
+
+    def update_row(self, timestamp, row):
+        """Apply a whole minute row (bucket -> price, NaN = unchanged) and re-check."""
+        for bucket, price in row.items():
+            if bucket in self._slot and not pd.isna(price):
+                self._prices[0, self._slot[bucket]] = price
+        return self._check(timestamp)
+
+    def _check(self, timestamp):
+        row = _scan_arrays(self._prices, self.kind, self.sum_tolerance, self.contracts)
+        if not row['flagged'][0]:
+            return None
+
+        alert = {key: value[0] for key, value in row.items()}
+        alert['timestamp'] = timestamp
+        alert['buy_leg'] = self._names[alert['buy_leg']] if alert['buy_leg'] >= 0 else ''
+        alert['sell_leg'] = self._names[alert['sell_leg']] if alert['sell_leg'] >= 0 else ''
+        return alert
+
+
+def main():
+    """Scan every ladder in this repo and report flagged minutes"""
+    files = [
+        'kalshi-price-history-kxhighaus-25jul26-minute.csv',
+        'kalshi-price-history-kxhighchi-25jul26-minute.csv',
+        'kalshi-price-history-kxhighhou-25jul26-minute.csv',
+        'kalshi-price-history-kxhighlax-25dec15-minute.csv',
+        'kalshi-price-history-kxhighmia-25dec15-minute.csv',
+        'kalshi-price-history-kxhighny-25dec15-minute.csv',
+        'kalshi-price-history-kxnycsnowm-26jan-minute.csv',
+        'kalshi-price-history-kxsnowstorm-26jannyc-minute.csv',
+        'kalshi-price-history-btcmaxy-24dec31-minute.csv',
+        'kalshi-price-history-kxbtcmaxm-aug25-minute.csv',
+    ]
+    print(f"{'File':<55} {'Minutes':>8} {'Flagged':>8} {'Net>0':>6} {'Max net (¢)':>12}")
+    for kalshi_csv in files:
+        scan = scan_ladder(load_price_history(kalshi_csv))
+        flagged = scan[scan['flagged']]
+        profitable = flagged[flagged['net_edge'] > 0]
+        best = profitable['net_edge'].max() if len(profitable) else 0.0
+        print(f"{kalshi_csv:<55} {len(scan):>8} {len(flagged):>8} {len(profitable):>6} {best:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
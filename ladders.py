@@ -0,0 +1,114 @@
+"""
+Kalshi Ladder Helpers
+=====================
+Shared loading and bucket-header parsing for Kalshi minute price histories.
+
+The exported price-history CSVs have a 'timestamp' column followed by one
+column per bucket. Bucket headers come in a few styles:
+
+    "64° or below", "65° to 66°", "73° or above"   (exclusive temperature ranges)
+    "Above 3.0 inches"                              (cumulative snow thresholds)
+    "$75000 or above", "Above $100000"              (cumulative BTC strikes)
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+_NUMBER = r'\$?(-?[\d,]+(?:\.\d+)?)'
+
+_BUCKET_PATTERNS = [
+    (re.compile(rf'^{_NUMBER}°? or below$'), 'below'),
+    (re.compile(rf'^{_NUMBER}°? to {_NUMBER}°?$'), 'range'),
+    (re.compile(rf'^{_NUMBER}°? or above$'), 'above'),
+    (re.compile(rf'^Above {_NUMBER}(?: inches)?$'), 'above'),
+]
+
+
+def _to_float(text):
+    return float(text.replace(',', ''))
+
+
+def load_price_history(kalshi_csv):
+    """
+    Load a Kalshi minute price history CSV.
+
+    Timestamps are converted to naive UTC (same convention as the hedge
+    scripts) and rows are guaranteed to be in time order.
+
+    Args:
+        kalshi_csv: Path to Kalshi price history CSV
+
+    Returns:
+        DataFrame with a 'timestamp' column and one float column per bucket (¢)
+    """
+    df = pd.read_csv(kalshi_csv)
+    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize(None)
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+    return df
+
+
+def bucket_columns(kalshi_df):
+    """Return the bucket columns of a price history (everything but 'timestamp')."""
+    return [col for col in kalshi_df.columns if col != 'timestamp']
+
+
+def parse_bucket(name):
+    """
+    Parse a bucket header into (low, high) bounds.
+
+    Uses the same format as the temperature bucket dictionaries in
+    compare_kalshi_vs_era5.py: None means no bound on that side.
+
+    Args:
+        name: Bucket column header, e.g. "65° to 66°" or "Above 3.0 inches"
+
+    Returns:
+        Tuple (low, high)
+    """
+    for pattern, kind in _BUCKET_PATTERNS:
+        match = pattern.match(name.strip())
+        if match is None:
+            continue
+        if kind == 'below':
+            return (None, _to_float(match.group(1)))
+        if kind == 'above':
+            return (_to_float(match.group(1)), None)
+        return (_to_float(match.group(1)), _to_float(match.group(2)))
+    raise ValueError(f"Unrecognised bucket header: {name!r}")
+
+
+def bucket_bounds(columns):
+    """Map each bucket header to its (low, high) bounds."""
+    return {col: parse_bucket(col) for col in columns}
+
+
+def ladder_kind(columns):
+    """
+    Classify a ladder as 'cumulative' or 'exclusive'.
+
+    A cumulative ladder ("Above X inches", "$X or above") only has open-ended
+    lower bounds, so its buckets overlap. Anything with a closed range or an
+    "or below" bucket is treated as a set of mutually exclusive buckets.
+    """
+    bounds = bucket_bounds(columns).values()
+    if all(high is None for low, high in bounds):
+        return 'cumulative'
+    return 'exclusive'
+
+
+def ladder_thresholds(columns):
+    """
+    Return the numeric thresholds of a cumulative ladder, in column order.
+
+    Raises:
+        ValueError: if any column is not an "above" style threshold
+    """
+    thresholds = []
+    for col, (low, high) in bucket_bounds(columns).items():
+        if high is not None:
+            raise ValueError(f"{col!r} is not a cumulative threshold bucket")
+        thresholds.append(low)
+    return np.asarray(thresholds, dtype=float)
@@ -0,0 +1,343 @@
+"""
+BTC / Kalshi Lead-Lag
+=====================
+Does Kalshi follow spot with a delay? The hedge scripts only compare the
+model and market probabilities minute by minute. This module measures the
+cross-correlation of minute returns between BTC (log returns of btc_price)
+and every Kalshi price column (changes in the 0-1 price) at lags from -N to
++N minutes:
+
+    ccf[lag] = corr(btc_return[t], kalshi_change[t + lag])
+
+A peak at a positive lag means Kalshi moves `lag` minutes after BTC.
+
+Each pair is computed with one zero-padded real FFT instead of one shift
+and dot product per lag, so the cost is O(n log n) whatever N is. Every
+strike of every period goes through the same FFT call: the series are
+stacked as rows of one padded matrix. Rolling windows work the same way,
+with each (period, strike, window) slice as a row, in chunks to bound
+memory.
+
+Returns are taken on a complete minute grid. Minutes missing from the
+merged frame, and minutes before a strike's first price, count as zero
+returns (the forward-filled price did not move), so lags are always in
+minutes. Normalisation is the usual biased estimator (sums over the
+overlap divided by the full-series norms), which equals the correlation at
+lag 0 and shrinks towards zero at long lags.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import fft as sp_fft
+
+from hedge_backtest import load_btc_minutes
+from ladder_hedge import load_kalshi_ladder, merge_btc_ladder
+
+NS_PER_MINUTE = 60 * 10**9
+
+PERIODS = {
+    '2024': ('kalshi-price-history-btcmaxy-24dec31-minute.csv', 'BTC_1min_2024.csv'),
+    'Aug 2025': ('kalshi-price-history-kxbtcmaxm-aug25-minute.csv', 'BTC_1min_2025.csv'),
+    'Nov-Dec 2025': ('kalshi-price-history-kxbtc2025100-25dec31-minute.csv', 'BTC_1min_2025.csv'),
+}
+
+_BTC_COLUMNS = ('timestamp', 'btc_price', 'btc_high', 'btc_low')
+
+
+def price_columns(df):
+    """Kalshi price columns of a merged frame (everything but timestamp and btc_*)."""
+    return [col for col in df.columns if col not in _BTC_COLUMNS]
+
+
+def minute_returns(df, columns=None):
+    """
+    BTC log returns and Kalshi price changes on a complete minute grid.
+
+    Args:
+        df: Merged frame from merge_btc_kalshi or merge_btc_ladder
+        columns: Kalshi price columns (default: price_columns(df))
+
+    Returns:
+        (timestamps, btc, kalshi): datetime64 grid of shape (minutes,), BTC
+        returns (minutes,) and Kalshi changes (minutes, columns)
+    """
+    columns = price_columns(df) if columns is None else list(columns)
+    stamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    if np.any(stamps % NS_PER_MINUTE):
+        raise ValueError("timestamps must be whole minutes")
+    minute = (stamps - stamps[0]) // NS_PER_MINUTE
+    n = int(minute[-1]) + 1
+
+    btc = np.zeros(n)
+    btc[minute[1:]] = np.diff(np.log(df['btc_price'].to_numpy(dtype=float)))
+    prices = df[columns].to_numpy(dtype=float)
+    kalshi = np.zeros((n, len(columns)))
+    kalshi[minute[1:]] = np.nan_to_num(np.diff(prices, axis=0))
+    timestamps = (stamps[0] + np.arange(n) * NS_PER_MINUTE).astype('datetime64[ns]')
+    return timestamps, btc, kalshi
+
+
+def _raw_ccf(x_fft, y_rows, max_lag, n_fft):
+    """Lagged sums sum_t x[t] y[t + lag] for lag -max_lag..max_lag, one row per y row."""
+    y_fft = sp_fft.rfft(y_rows, n=n_fft, axis=-1)
+    full = sp_fft.irfft(np.conj(x_fft) * y_fft, n=n_fft, axis=-1)
+    # Negative lags wrap to the end of the circular result
+    return np.concatenate([full[:, n_fft - max_lag:], full[:, :max_lag + 1]], axis=1)
+
+
+def _normalised(raw, x_rows, y_rows):
+    scale = np.sqrt((x_rows**2).sum(axis=-1) * (y_rows**2).sum(axis=-1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(scale[:, None] > 0, raw / scale[:, None], np.nan)
+
+
+def cross_correlation(x, y, max_lag=60):
+    """
+    Cross-correlation of x with every column of y at lags -max_lag..max_lag.
+
+    Args:
+        x: Series of shape (n,)
+        y: Series of shape (n,) or (n, k)
+
+    Returns:
+        Array (2 * max_lag + 1,) or (2 * max_lag + 1, k); row i is lag i - max_lag
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    y_rows = np.atleast_2d(y.T) if y.ndim == 2 else y[None, :]
+    n = len(x)
+    max_lag = min(max_lag, n - 1)
+    n_fft = sp_fft.next_fast_len(n + max_lag, real=True)
+    x = x - x.mean()
+    y_rows = y_rows - y_rows.mean(axis=1, keepdims=True)
+    raw = _raw_ccf(sp_fft.rfft(x, n=n_fft)[None, :], y_rows, max_lag, n_fft)
+    ccf = _normalised(raw, x[None, :], y_rows).T
+    return ccf if y.ndim == 2 else ccf[:, 0]
+
+
+def cross_correlation_direct(x, y, max_lag=60):
+    """Reference cross_correlation with one shifted dot product per lag (O(n N))."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    y2 = y[:, None] if y.ndim == 1 else y
+    x = x - x.mean()
+    y2 = y2 - y2.mean(axis=0)
+    n = len(x)
+    out = np.empty((2 * max_lag + 1, y2.shape[1]))
+    for i, lag in enumerate(range(-max_lag, max_lag + 1)):
+        if lag >= 0:
+            out[i] = x[:n - lag] @ y2[lag:]
+        else:
+            out[i] = x[-lag:] @ y2[:n + lag]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = out / np.sqrt((x**2).sum() * (y2**2).sum(axis=0))
+    return out if y.ndim == 2 else out[:, 0]
+
+
+def load_periods(periods=None):
+    """
+    Merged BTC/ladder frames of each period (needs the BTC_1min_*.csv files).
+
+    Returns:
+        Dict of period name -> merged frame
+    """
+    periods = PERIODS if periods is None else periods
+    btc_cache = {}
+    frames = {}
+    for name, (kalshi_csv, btc_csv) in periods.items():
+        if btc_csv not in btc_cache:
+            btc_cache[btc_csv] = load_btc_minutes(btc_csv)
+        kalshi, _ = load_kalshi_ladder(kalshi_csv)
+        frames[name] = merge_btc_ladder(btc_cache[btc_csv], kalshi)
+    return frames
+
+
+def _period_returns(frames):
+    """Minute returns of every period, with one (period, column) entry per Kalshi series."""
+    series = []
+    for period, df in frames.items():
+        timestamps, btc, kalshi = minute_returns(df)
+        series.append((period, price_columns(df), timestamps, btc, kalshi))
+    return series
+
+
+def lead_lag(frames, max_lag=60):
+    """
+    Full-period cross-correlations of every strike of every period.
+
+    All series are zero-padded to one FFT length and transformed in a
+    single batch; each BTC series is transformed once and shared by its
+    period's strikes.
+
+    Args:
+        frames: Dict of period name -> merged frame (e.g. load_periods())
+        max_lag: Largest lag in minutes, both directions
+
+    Returns:
+        (keys, lags, ccf): keys DataFrame with period, column, minutes;
+        lags array (2 * max_lag + 1,); ccf array (rows of keys, lags)
+    """
+    series = _period_returns(frames)
+    n_max = max(len(btc) for _, _, _, btc, _ in series)
+    n_fft = sp_fft.next_fast_len(n_max + max_lag, real=True)
+
+    x_rows = np.zeros((len(series), n_max))
+    y_rows, which, keys = [], [], []
+    for p, (period, columns, _, btc, kalshi) in enumerate(series):
+        n = len(btc)
+        x_rows[p, :n] = btc - btc.mean()
+        padded = np.zeros((len(columns), n_max))
+        padded[:, :n] = (kalshi - kalshi.mean(axis=0)).T
+        y_rows.append(padded)
+        which += [p] * len(columns)
+        keys += [{'period': period, 'column': col, 'minutes': n} for col in columns]
+    y_rows = np.vstack(y_rows)
+    which = np.asarray(which)
+
+    x_fft = sp_fft.rfft(x_rows, n=n_fft, axis=-1)
+    raw = _raw_ccf(x_fft[which], y_rows, max_lag, n_fft)
+    ccf = _normalised(raw, x_rows[which], y_rows)
+    return pd.DataFrame(keys), np.arange(-max_lag, max_lag + 1), ccf
+
+
+def rolling_lead_lag(frames, max_lag=30, window_minutes=1440, step_minutes=60,
+                     max_chunk_elements=8_000_000):
+    """
+    Cross-correlations over rolling windows of every strike of every period.
+
+    Each window is demeaned and normalised on its own, so it is exactly
+    cross_correlation() of that slice. All (period, strike, window) slices
+    share one FFT length and are transformed in chunks of rows.
+
+    Args:
+        frames: Dict of period name -> merged frame
+        max_lag: Largest lag in minutes, both directions
+        window_minutes: Window length
+        step_minutes: Distance between window starts
+        max_chunk_elements: Bound on rows x FFT length per chunk
+
+    Returns:
+        (keys, lags, ccf): keys DataFrame with period, column, window_end
+        (timestamp of the window's last minute); ccf array (rows, lags)
+    """
+    series = _period_returns(frames)
+    n_fft = sp_fft.next_fast_len(window_minutes + max_lag, real=True)
+    offsets = np.arange(window_minutes)
+
+    # Flat banks of every BTC and Kalshi series; a window row is a start offset into each
+    x_bank, y_bank, x_starts, y_starts, keys = [], [], [], [], []
+    x_base = y_base = 0
+    for period, columns, timestamps, btc, kalshi in series:
+        n = len(btc)
+        starts = np.arange(0, n - window_minutes + 1, step_minutes)
+        x_bank.append(btc)
+        for j, col in enumerate(columns):
+            y_bank.append(kalshi[:, j])
+            x_starts.append(x_base + starts)
+            y_starts.append(y_base + starts)
+            keys.append(pd.DataFrame({'period': period, 'column': col,
+                                      'window_end': timestamps[starts + window_minutes - 1]}))
+            y_base += n
+        x_base += n
+    lags = np.arange(-max_lag, max_lag + 1)
+    if not keys:
+        return pd.DataFrame(columns=['period', 'column', 'window_end']), lags, np.empty((0, len(lags)))
+    x_bank = np.concatenate(x_bank)
+    y_bank = np.concatenate(y_bank)
+    x_starts = np.concatenate(x_starts)
+    y_starts = np.concatenate(y_starts)
+
+    chunk = max(1, max_chunk_elements // n_fft)
+    ccf = np.empty((len(x_starts), len(lags)))
+    for lo in range(0, len(x_starts), chunk):
+        x = x_bank[x_starts[lo:lo + chunk, None] + offsets]
+        y = y_bank[y_starts[lo:lo + chunk, None] + offsets]
+        x -= x.mean(axis=1, keepdims=True)
+        y -= y.mean(axis=1, keepdims=True)
+        raw = _raw_ccf(sp_fft.rfft(x, n=n_fft, axis=-1), y, max_lag, n_fft)
+        ccf[lo:lo + chunk] = _normalised(raw, x, y)
+    return pd.concat(keys, ignore_index=True), lags, ccf
+
+
+def lag_summary(keys, lags, ccf):
+    """
+    Peak of each cross-correlation row.
+
+    Returns:
+        keys plus peak_lag (lag of the largest |ccf|), peak_corr, corr_lag0,
+        and band (approximate 95% white-noise band, 1.96 / sqrt(minutes))
+    """
+    filled = np.nan_to_num(np.abs(ccf), nan=-1.0)
+    peak = filled.argmax(axis=1)
+    summary = keys.copy()
+    summary['peak_lag'] = lags[peak]
+    summary['peak_corr'] = ccf[np.arange(len(ccf)), peak]
+    summary['corr_lag0'] = ccf[:, np.flatnonzero(lags == 0)[0]]
+    if 'minutes' in summary:
+        summary['band'] = 1.96 / np.sqrt(summary['minutes'])
+    return summary
+
+
+def _synthetic_frames():
+    """Three periods of synthetic BTC with ladders that trail spot by 0, 3 and 7 minutes."""
+    from synthetic_data import synthetic_btc_ladder, synthetic_btc_minutes
+
+    frames = {}
+    specs = [('2024', '2024-01-01', 60, 42000.0, (50000, 60000, 75000, 100000), '2024-12-31', 0),
+             ('Aug 2025', '2025-07-16', 47, 118000.0, (110000, 120000, 125000, 130000, 135000), '2025-08-31', 3),
+             ('Nov-Dec 2025', '2025-11-27', 34, 91000.0, (100000,), '2025-12-31', 7)]
+    for seed, (name, start, days, spot, strikes, expiry, delay) in enumerate(specs):
+        btc = synthetic_btc_minutes(start=start, days=days, spot=spot, seed=10 + seed)
+        ladder = synthetic_btc_ladder(btc, strikes=strikes, expiry=expiry, row_rate=0.8,
+                                      fill_rate=0.9, noise_cents=0.5, seed=20 + seed)
+        ladder['timestamp'] += pd.Timedelta(minutes=delay)
+        kalshi = ladder.copy()
+        columns = price_columns(kalshi)
+        kalshi[columns] = kalshi[columns] / 100
+        btc = btc.rename(columns={'close': 'btc_price', 'high': 'btc_high', 'low': 'btc_low'})
+        btc['timestamp'] = btc['timestamp'].astype('datetime64[ns]')
+        frames[name] = merge_btc_ladder(btc[list(_BTC_COLUMNS)], kalshi)
+    return frames
+
+
+def main():
+    """Lead-lag of every strike and period (synthetic data if BTC_1min_*.csv are missing)"""
+    import time
+
+    if all(os.path.exists(btc_csv) for _, btc_csv in PERIODS.values()):
+        frames = load_periods()
+    else:
+        print("BTC_1min_*.csv not found; using synthetic periods where Kalshi trails spot by 0, 3 and 7 minutes\n")
+        frames = _synthetic_frames()
+
+    start = time.perf_counter()
+    keys, lags, ccf = lead_lag(frames, max_lag=60)
+    elapsed = time.perf_counter() - start
+    summary = lag_summary(keys, lags, ccf)
+    print(summary.to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+    print(f"\n  {len(keys)} series, lags -60..60, one FFT batch: {elapsed:.2f}s")
+
+    # Check one period against the shift-per-lag reference
+    first = next(iter(frames))
+    _, btc, kalshi = minute_returns(frames[first])
+    start = time.perf_counter()
+    direct = cross_correlation_direct(btc, kalshi, max_lag=60)
+    direct_elapsed = time.perf_counter() - start
+    rows = (keys['period'] == first).to_numpy()
+    assert np.allclose(ccf[rows].T, direct, atol=1e-10, equal_nan=True)
+    assert np.allclose(cross_correlation(btc, kalshi, max_lag=60), direct, atol=1e-10, equal_nan=True)
+    print(f"  {first}: matches one shift per lag ({direct_elapsed:.2f}s for {kalshi.shape[1]} strikes)")
+
+    start = time.perf_counter()
+    keys, lags, ccf = rolling_lead_lag(frames, max_lag=30, window_minutes=1440, step_minutes=60)
+    elapsed = time.perf_counter() - start
+    rolling = lag_summary(keys, lags, ccf)
+    print(f"\n  Rolling 1-day windows every hour: {len(keys):,} windows in {elapsed:.2f}s")
+    print(rolling.groupby(['period', 'column'], sort=False)['peak_lag']
+          .agg(['median', lambda s: s.mode().iloc[0]]).rename(columns={'<lambda_0>': 'mode'}).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Cross-Market Correlations
+=========================
+How related markets move together: city temperature ladders for the same
+day (kxhigh*-25jul26), the two overlapping NYC snow markets, BTC ladders
+and BTC spot.
+
+Every bucket column is one series. Kalshi exports only have rows on active
+minutes, with empty cells in between, so a series is kept as its price
+changes only: (minute, change) wherever a new price differs from the
+previous one. On a common minute grid with forward-filled prices the
+change is 0 on every other minute, so no dense grid is ever built:
+
+    sums, sums of squares   per series, prefix sums over its changes
+    cross products          only at minutes where both series changed
+
+A pair's Pearson correlation is taken over the minutes both series were
+live, from the later first price to the earlier last price. That window
+only needs the prefix sums at its edges, and every cross product already
+falls inside it.
+
+Cross products are accumulated in row blocks of change minutes. A block
+that is densely filled uses one BLAS product over the columns present;
+otherwise it uses a sparse product. Updates are incremental: only the
+minutes touched by new changes are added (and, when an earlier feed
+already covered those minutes, their old rows swapped out). Markets can
+therefore be fed in any order and in pieces, and the result matches one
+pass over everything.
+
+Kalshi prices are differenced in cents. Series added with log=True (BTC
+spot) use log returns.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from compact_prices import encode_minutes
+from ladders import bucket_columns
+
+BLOCK_ROWS = 4096
+DENSE_FILL = 0.10  # share of filled cells above which a block is multiplied densely
+
+
+def _gram(minutes, columns, values, n_series, block_rows=BLOCK_ROWS, dense_fill=DENSE_FILL):
+    """
+    Sum over minutes of outer(changes, changes), from (minute, column, value)
+    triplets sorted by minute.
+    """
+    out = np.zeros((n_series, n_series))
+    if not len(values):
+        return out
+    rows = np.concatenate([[0], np.cumsum(minutes[1:] != minutes[:-1])])
+    edges = np.searchsorted(rows, np.arange(0, rows[-1] + 1 + block_rows, block_rows))
+    for start, end in zip(edges[:-1], edges[1:]):
+        if start == end:
+            continue
+        r = rows[start:end] - rows[start]
+        present, c = np.unique(columns[start:end], return_inverse=True)
+        shape = (r[-1] + 1, len(present))
+        if end - start >= dense_fill * shape[0] * shape[1]:
+            block = np.zeros(shape)
+            block[r, c] = values[start:end]
+            out[np.ix_(present, present)] += block.T @ block
+        else:
+            block = sparse.csr_matrix((values[start:end], (r, c)), shape=shape)
+            out[np.ix_(present, present)] += (block.T @ block).toarray()
+    return out
+
+
+class CorrelationEngine:
+    """
+    Incrementally updated correlations of sparse minute price series.
+
+    Example:
+        engine = CorrelationEngine()
+        engine.add_frame(load_price_history(hou_csv), 'KXHIGHHOU-25JUL26')
+        engine.add_frame(load_price_history(chi_csv), 'KXHIGHCHI-25JUL26')
+        engine.matrix()                        # DataFrame, names x names
+        engine.add_frame(newer_rows, 'KXHIGHHOU-25JUL26')   # later minutes
+        engine.correlation(a, b)
+    """
+
+    def __init__(self, block_rows=BLOCK_ROWS, dense_fill=DENSE_FILL):
+        self.block_rows = block_rows
+        self.dense_fill = dense_fill
+        self.names = []
+        self._index = {}
+        self._log = []
+        self._first = []          # minute of the first price
+        self._last = []           # minute of the latest price
+        self._last_price = []
+        self._events = []         # per series: (minutes, changes, prefix sums, prefix sums of squares)
+        self._pending = []        # (series, minutes, changes) not yet in the cross products
+        self._cross = np.zeros((0, 0))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _series(self, name, log):
+        i = self._index.get(name)
+        if i is None:
+            i = self._index[name] = len(self.names)
+            self.names.append(name)
+            self._log.append(log)
+            self._first.append(None)
+            self._last.append(None)
+            self._last_price.append(np.nan)
+            self._events.append((np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(1), np.zeros(1)))
+            cross = np.zeros((i + 1, i + 1))
+            cross[:i, :i] = self._cross
+            self._cross = cross
+        return i
+
+    # -- updates -----------------------------------------------------------
+
+    def update(self, timestamps, prices, names, log=False):
+        """
+        Add observations of one or more series.
+
+        Args:
+            timestamps: Whole-minute naive-UTC timestamps, shape (rows,)
+            prices: Array (rows, len(names)), NaN where a series has no price
+            names: Series names; unknown names start new series
+            log: Use log returns for new series (e.g. BTC spot)
+
+        Minutes at or before a series' latest minute are skipped, so feeds
+        can overlap. The cross products are brought up to date on the next
+        read, so a batch of updates costs one pass.
+        """
+        minutes = encode_minutes(timestamps).astype(np.int64)
+        prices = np.asarray(prices, dtype=float).reshape(len(minutes), len(names))
+        order = np.argsort(minutes, kind='stable')
+        minutes, prices = minutes[order], prices[order]
+
+        for j, name in enumerate(names):
+            i = self._series(name, log)
+            values = prices[:, j]
+            keep = ~np.isnan(values)
+            if self._last[i] is not None:
+                keep &= minutes > self._last[i]
+            m, v = minutes[keep], values[keep]
+            if not len(m):
+                continue
+            if self._log[i]:
+                v = np.log(v)
+            change = np.diff(v, prepend=self._last_price[i])
+            if self._first[i] is None:
+                self._first[i] = int(m[0])
+            moved = ~np.isnan(change) & (change != 0)
+            self._last[i], self._last_price[i] = int(m[-1]), v[-1]
+            if moved.any():
+                self._pending.append((i, m[moved], change[moved]))
+
+    def _flush(self):
+        """Fold pending changes into the cross products, replacing rows they extend."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        new_minutes = np.concatenate([m for _, m, _ in pending])
+        new_columns = np.concatenate([np.full(len(m), i) for i, m, _ in pending])
+        new_values = np.concatenate([d for _, _, d in pending])
+        at = np.unique(new_minutes)
+        old_minutes, old_columns, old_values = [], [], []
+        for i, (minutes, changes, _, _) in enumerate(self._events):
+            # Series whose changes all precede the update have no rows to swap
+            if not len(minutes) or minutes[-1] < at[0]:
+                continue
+            lo, hi = np.searchsorted(minutes, [at[0], at[-1] + 1])
+            hit = lo + np.flatnonzero(np.isin(minutes[lo:hi], at))
+            old_minutes.append(minutes[hit])
+            old_columns.append(np.full(len(hit), i))
+            old_values.append(changes[hit])
+
+        n = len(self.names)
+        if old_minutes:
+            old = [np.concatenate(a) for a in (old_minutes, old_columns, old_values)]
+            order = np.argsort(old[0], kind='stable')
+            old = [a[order] for a in old]
+            self._cross -= _gram(*old, n, self.block_rows, self.dense_fill)
+            new_minutes = np.concatenate([new_minutes, old[0]])
+            new_columns = np.concatenate([new_columns, old[1]])
+            new_values = np.concatenate([new_values, old[2]])
+        order = np.argsort(new_minutes, kind='stable')
+        self._cross += _gram(new_minutes[order], new_columns[order], new_values[order], n,
+                             self.block_rows, self.dense_fill)
+
+        by_series = {}
+        for i, minutes, changes in pending:
+            by_series.setdefault(i, []).append((minutes, changes))
+        for i, pieces in by_series.items():
+            minutes, changes, prefix, prefix_sq = self._events[i]
+            added = np.concatenate([d for _, d in pieces])
+            self._events[i] = (np.concatenate([minutes] + [m for m, _ in pieces]),
+                               np.concatenate([changes, added]),
+                               np.concatenate([prefix, prefix[-1] + np.cumsum(added)]),
+                               np.concatenate([prefix_sq, prefix_sq[-1] + np.cumsum(added * added)]))
+
+    def add_frame(self, frame, prefix, columns=None):
+        """
+        Add a load_price_history frame (or newer rows of one).
+
+        Series are named '<prefix>: <bucket>'.
+        """
+        columns = bucket_columns(frame) if columns is None else columns
+        self.update(frame['timestamp'], frame[columns].to_numpy(dtype=float),
+                    [f'{prefix}: {c}' for c in columns])
+
+    def add_btc(self, btc, name='BTC'):
+        """Add BTC spot (load_btc_minutes frame) as log returns of close."""
+        self.update(btc['timestamp'], btc[['close']].to_numpy(dtype=float), [name], log=True)
+
+    # -- results -----------------------------------------------------------
+
+    def _window_sums(self, idx):
+        """
+        Pairwise overlap length and each series' sum / sum of squares of
+        changes within the overlap, as (k, k) arrays ([a, b] is series a
+        over the window it shares with b).
+        """
+        self._flush()
+        first = np.array([np.nan if self._first[i] is None else self._first[i] for i in idx], dtype=float)
+        last = np.array([np.nan if self._last[i] is None else self._last[i] for i in idx], dtype=float)
+        lo = np.maximum.outer(first, first)
+        hi = np.minimum.outer(last, last)
+        overlap = np.nan_to_num(hi - lo, nan=0.0)
+        lo, hi = np.nan_to_num(lo, nan=0.0), np.nan_to_num(hi, nan=0.0)
+        sums = np.zeros((len(idx), len(idx)))
+        squares = np.zeros((len(idx), len(idx)))
+        for a, i in enumerate(idx):
+            if self._first[i] is None:
+                continue
+            minutes, _, prefix, prefix_sq = self._events[i]
+            lo_at = np.searchsorted(minutes, lo[a], side='right')
+            hi_at = np.maximum(np.searchsorted(minutes, hi[a], side='right'), lo_at)
+            sums[a] = prefix[hi_at] - prefix[lo_at]
+            squares[a] = prefix_sq[hi_at] - prefix_sq[lo_at]
+        return overlap, sums, squares
+
+    def matrix(self, names=None, min_overlap=60, psd=False):
+        """
+        Correlation matrix of price changes.
+
+        Args:
+            names: Series to include (default: all)
+            min_overlap: Pairs live together for fewer minutes get NaN
+            psd: Return the nearest valid correlation matrix instead (NaN
+                 treated as 0, negative eigenvalues clipped, unit diagonal).
+                 Pairwise windows differ, so the raw matrix need not be
+                 positive semi-definite; a risk model needs one that is.
+
+        Returns:
+            DataFrame indexed and columned by series name
+        """
+        names = list(self.names) if names is None else list(names)
+        idx = [self._index[n] for n in names]
+        n, sums, squares = self._window_sums(idx)
+        cross = self._cross[np.ix_(idx, idx)]
+        spread = n * squares - sums * sums
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = (n * cross - sums * sums.T) / np.sqrt(spread * spread.T)
+        corr[(n < min_overlap) | ~(spread > 0) | ~(spread.T > 0)] = np.nan
+        corr = np.clip(corr, -1.0, 1.0)
+
+        if psd:
+            corr = np.nan_to_num(corr, nan=0.0)
+            np.fill_diagonal(corr, 1.0)
+            values, vectors = np.linalg.eigh(corr)
+            corr = (vectors * np.maximum(values, 0.0)) @ vectors.T
+            scale = np.sqrt(np.maximum(np.diag(corr), 1e-12))
+            corr = corr / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=names, columns=names)
+
+    def correlation(self, a, b, min_overlap=60):
+        """Correlation of two series' price changes over the minutes they share."""
+        return float(self.matrix([a, b], min_overlap).iloc[0, 1])
+
+    def pair_summary(self, min_overlap=60, min_shared_changes=5):
+        """
+        One row per pair: overlap minutes, shared change minutes and correlation.
+
+        Pairs that changed price in the same minute fewer than
+        min_shared_changes times get a NaN correlation: a couple of
+        co-moving minutes give a large |correlation| that is only noise.
+        """
+        names = list(self.names)
+        idx = list(range(len(names)))
+        n, _, _ = self._window_sums(idx)
+        corr = self.matrix(names, min_overlap).to_numpy()
+        a, b = np.triu_indices(len(names), k=1)
+        self._flush()
+        shared = np.zeros(len(a), dtype=np.int64)
+        for k, (i, j) in enumerate(zip(a, b)):
+            shared[k] = len(np.intersect1d(self._events[i][0], self._events[j][0], assume_unique=True))
+        return pd.DataFrame({'a': np.array(names)[a], 'b': np.array(names)[b], 'overlap_minutes': n[a, b].astype(int),
+                             'shared_changes': shared,
+                             'correlation': np.where(shared >= min_shared_changes, corr[a, b], np.nan)})
+
+
+def dense_correlation(engine, names=None, min_overlap=60):
+    """
+    Reference result on an explicit minute grid: forward-filled prices,
+    differenced, Pearson per pair over the minutes both are live. Slow;
+    for checking the engine.
+    """
+    names = list(engine.names) if names is None else list(names)
+    idx = [engine._index[n] for n in names]
+    engine._flush()
+    events = [engine._events[i][:2] for i in idx]
+    start = min(engine._first[i] for i in idx)
+    end = max(engine._last[i] for i in idx)
+    grid = np.zeros((end - start + 1, len(idx)))
+    for k, (minutes, changes) in enumerate(events):
+        grid[minutes - start, k] = changes
+    corr = np.full((len(idx), len(idx)), np.nan)
+    for a, i in enumerate(idx):
+        for b, j in enumerate(idx):
+            lo, hi = max(engine._first[i], engine._first[j]), min(engine._last[i], engine._last[j])
+            if hi - lo < min_overlap:
+                continue
+            x, y = grid[lo + 1 - start:hi + 1 - start, a], grid[lo + 1 - start:hi + 1 - start, b]
+            if x.std() > 0 and y.std() > 0:
+                corr[a, b] = np.corrcoef(x, y)[0, 1]
+    return pd.DataFrame(corr, index=names, columns=names)
+
+
+def main():
+    """Correlations of this repo's markets, then a few hundred synthetic series fed in pieces"""
+    from dataset_registry import DatasetRegistry
+    from synthetic_data import synthetic_btc_ladder, synthetic_btc_minutes
+
+    registry = DatasetRegistry()
+    engine = CorrelationEngine()
+    registry.scan(('kalshi-price-history-*.csv',))
+    for info in registry.datasets.values():  # one entry per distinct content
+        if info.kind == 'kalshi':
+            engine.add_frame(registry.load(info.paths[0], copy=False), info.event)
+    pairs = engine.pair_summary(min_shared_changes=10).dropna(subset=['correlation'])
+    pairs = pairs[pairs['a'].str.split(':').str[0] != pairs['b'].str.split(':').str[0]]
+    print(f"  {len(engine)} bucket series; most correlated pairs across markets:")
+    top = pairs.reindex(pairs['correlation'].abs().sort_values(ascending=False).index).head(8)
+    print(top.to_string(index=False, float_format=lambda x: f'{x:.3f}'))
+
+    btc = synthetic_btc_minutes(days=30)
+    ladders = [synthetic_btc_ladder(btc, strikes=tuple(40000 + 1000 * np.arange(k, k + 7)), seed=k)
+               for k in range(50)]
+    start = time.perf_counter()
+    batch = CorrelationEngine()
+    batch.add_btc(btc)
+    for k, ladder in enumerate(ladders):
+        batch.add_frame(ladder, f'LADDER{k:02d}')
+    full = batch.matrix()
+    print(f"\n  Batch: {len(batch)} series over {len(btc):,} minutes in {time.perf_counter() - start:.2f}s")
+
+    # The same data as daily updates, with BTC arriving a day behind the
+    # ladders (so its minutes land on rows the ladders already filled)
+    days = pd.date_range(btc['timestamp'].iloc[0].normalize(), periods=32, freq='D')
+    streamed = CorrelationEngine()
+    start = time.perf_counter()
+    for d, (lo, hi) in enumerate(zip(days[:-1], days[1:])):
+        for k, ladder in enumerate(ladders):
+            streamed.add_frame(ladder[(ladder['timestamp'] >= lo) & (ladder['timestamp'] < hi)], f'LADDER{k:02d}')
+        if d:
+            streamed.add_btc(btc[(btc['timestamp'] >= days[d - 1]) & (btc['timestamp'] < lo)])
+        streamed.matrix()
+    streamed.add_btc(btc[btc['timestamp'] >= days[-2]])
+    elapsed = time.perf_counter() - start
+    assert np.allclose(streamed.matrix(full.index).to_numpy(), full.to_numpy(), equal_nan=True)
+    print(f"  Streamed as 31 daily updates, each followed by a full matrix ({elapsed:.2f}s); "
+          f"matches the batch result")
+    sample = list(full.index[:4])
+    assert np.allclose(dense_correlation(batch, sample).to_numpy(), full.loc[sample, sample].to_numpy(),
+                       equal_nan=True)
+    print(f"  Spot check against a dense minute grid: ok")
+    print(full.iloc[:5, :5].round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Streaming Market Rankings
+=========================
+Top-K markets by volume, liquidity and open interest, kept up to date while
+/markets pages are still arriving.
+
+mostLiquid.ipynb collects every market into markets_with_details and then
+sorts the list. MarketRanker instead takes each page as it comes and keeps
+one bounded min-heap of size K per metric, overall and per category and
+series. Memory is O(K x metrics x groups) no matter how many markets go
+through it, and each market costs O(log K) per heap.
+
+Ties are broken by arrival order (earlier first), so the final rankings are
+identical to sorted(markets, key=metric, reverse=True)[:K] over everything
+consumed. Every market should be consumed once; the heaps do not
+de-duplicate tickers.
+"""
+
+import heapq
+import itertools
+
+import pandas as pd
+
+METRICS = {
+    'volume': 'volume',
+    'liquidity': 'liquidity_dollars',
+    'open_interest': 'open_interest',
+}
+GROUPS = ('category', 'series')
+
+
+def _number(value):
+    """API numbers arrive as ints, floats or strings ('12345.67'); missing is 0."""
+    if value is None or value == '':
+        return 0.0
+    return float(value)
+
+
+def market_series(market):
+    """Series ticker of a market (series_ticker, else the event ticker's prefix)."""
+    series = market.get('series_ticker')
+    if series:
+        return series
+    return market.get('event_ticker', market.get('ticker', '')).split('-')[0]
+
+
+class TopK:
+    """
+    Largest K items by value, ties broken by arrival order.
+
+    The heap holds (value, -arrival, record): its root is the entry a new
+    item has to beat, i.e. the smallest value and, among equal values, the
+    latest arrival.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, value, arrival, record):
+        item = (value, -arrival, record)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+
+    def items(self):
+        """(value, record) pairs, largest first."""
+        return [(value, record) for value, _, record in sorted(self._heap, key=lambda i: (-i[0], -i[1]))]
+
+
+class MarketRanker:
+    """
+    Streaming top-K rankings of markets.
+
+    Args:
+        k: Markets kept per ranking
+        metrics: Names from METRICS to rank by
+        groups: Also rank within each 'category' and/or 'series'
+
+    Example:
+        ranker = MarketRanker(k=20)
+        for page in pages:                 # e.g. each /markets response
+            ranker.consume(page)
+            print(ranker.report('volume', n=5))
+    """
+
+    def __init__(self, k=10, metrics=tuple(METRICS), groups=GROUPS):
+        unknown = set(metrics) - set(METRICS)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {sorted(unknown)}")
+        self.k = k
+        self.metrics = tuple(metrics)
+        self.groups = tuple(groups)
+        self.seen = 0
+        self._arrival = itertools.count()
+        self._overall = {m: TopK(k) for m in self.metrics}
+        self._grouped = {g: {} for g in self.groups}  # group -> value -> metric -> TopK
+
+    def _group_value(self, group, market):
+        return market_series(market) if group == 'series' else market.get(group) or 'N/A'
+
+    def add(self, market):
+        arrival = next(self._arrival)
+        self.seen += 1
+        rankings = [self._overall]
+        for group in self.groups:
+            by_value = self._grouped[group]
+            value = self._group_value(group, market)
+            if value not in by_value:
+                by_value[value] = {m: TopK(self.k) for m in self.metrics}
+            rankings.append(by_value[value])
+        for metric in self.metrics:
+            value = _number(market.get(METRICS[metric]))
+            for ranking in rankings:
+                ranking[metric].push(value, arrival, market)
+
+    def consume(self, page):
+        """Add one page of markets (a list, or a /markets response dict)."""
+        markets = page.get('markets', []) if isinstance(page, dict) else page
+        for market in markets:
+            self.add(market)
+        return len(markets)
+
+    def top(self, metric='volume', category=None, series=None):
+        """
+        Current top-K market records for a metric, largest first.
+
+        Pass category or series for the ranking within that group.
+        """
+        if category is not None and series is not None:
+            raise ValueError("pass category or series, not both")
+        if category is not None or series is not None:
+            group, value = ('category', category) if category is not None else ('series', series)
+            if group not in self._grouped:
+                raise ValueError(f"ranker was not built with group {group!r}")
+            ranking = self._grouped[group].get(value)
+            if ranking is None:
+                return []
+            return [record for _, record in ranking[metric].items()]
+        return [record for _, record in self._overall[metric].items()]
+
+    def group_values(self, group):
+        """Categories or series seen so far."""
+        return sorted(self._grouped[group])
+
+    def report(self, metric='volume', n=None, category=None, series=None):
+        """Ranking as a DataFrame (the columns mostLiquid.ipynb prints)."""
+        rows = []
+        for rank, market in enumerate(self.top(metric, category, series)[:n], 1):
+            rows.append({
+                'rank': rank,
+                'ticker': market.get('ticker'),
+                'title': market.get('title', 'N/A'),
+                'category': market.get('category', 'N/A'),
+                'volume': _number(market.get('volume')),
+                'liquidity': _number(market.get('liquidity_dollars')),
+                'open_interest': _number(market.get('open_interest')),
+            })
+        return pd.DataFrame(rows)
+
+
+def main():
+    """Stream a synthetic catalog page by page and check against a full sort"""
+    from synthetic_data import synthetic_catalog
+
+    _, markets = synthetic_catalog()
+    ranker = MarketRanker(k=10)
+    for start in range(0, len(markets), 1000):
+        ranker.consume({'markets': markets[start:start + 1000], 'cursor': None})
+        if start == 20_000:
+            print(f"After {ranker.seen:,} markets, top 3 by liquidity:")
+            print(ranker.report('liquidity', n=3).to_string(index=False))
+
+    for metric, field in METRICS.items():
+        expected = sorted(markets, key=lambda m: _number(m.get(field)), reverse=True)[:10]
+        assert [m['ticker'] for m in ranker.top(metric)] == [m['ticker'] for m in expected]
+    print(f"\nFinal ({ranker.seen:,} markets; matches a full sort):")
+    print(ranker.report('volume').to_string(index=False))
+    category = ranker.group_values('category')[0]
+    print(f"\nTop 5 by open interest in {category}:")
+    print(ranker.report('open_interest', n=5, category=category).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
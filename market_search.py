@@ -0,0 +1,262 @@
+"""
+Market Search Index
+===================
+Local inverted index over the /series and /markets catalogs, so finding
+"every Fed / Powell market" is a query instead of a scan of every series
+title for every keyword (mostLiquid.ipynb) or another round of API calls.
+
+Indexed fields: ticker, event_ticker, series_ticker, title, subtitle,
+yes_sub_title, category and tags. Text is lower-cased and split into
+alphanumeric words; tickers are split on '-' and their 'KX' prefix is also
+indexed without it, so 'fed' finds KXFEDDECISION-25DEC as well as "Fed
+decision in December?".
+
+Queries (all parts must match):
+
+    fomc rate           both words, in any indexed field
+    "jerome powell"     the words next to each other, in the same field
+    powe*               any word starting with "powe"
+    "fed chair*"        phrase whose last word is a prefix
+
+Postings are sets of document ids, so a query is a smallest-first set
+intersection followed, for phrases only, by a check of the candidates'
+stored text. Records can be added, replaced or removed at any time;
+re-adding a ticker replaces its old entry.
+"""
+
+import bisect
+import re
+
+SERIES = 'series'
+MARKET = 'market'
+
+FIELDS = ('ticker', 'event_ticker', 'series_ticker', 'title', 'subtitle', 'yes_sub_title', 'category', 'tags')
+TICKER_FIELDS = ('ticker', 'event_ticker', 'series_ticker')
+
+_WORD = re.compile(r'[a-z0-9]+')
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    """Lower-case alphanumeric words of a string."""
+    return _WORD.findall(str(text).lower())
+
+
+def _field_words(record):
+    """Per-field word lists of a record, with ticker aliases."""
+    fields = []
+    for name in FIELDS:
+        value = record.get(name)
+        if not value:
+            continue
+        if isinstance(value, (list, tuple)):
+            fields.extend(tokenize(v) for v in value)
+            continue
+        words = tokenize(value)
+        if name in TICKER_FIELDS:
+            words += [w[2:] for w in words if w.startswith('kx') and len(w) > 2]
+        fields.append(words)
+    return fields
+
+
+def parse_query(query):
+    """
+    Split a query into terms.
+
+    Returns:
+        List of (words, prefix) tuples; prefix means the last word is a prefix
+    """
+    terms = []
+    for phrase, word in _QUERY_PART.findall(query):
+        text = phrase if phrase else word
+        prefix = text.rstrip().endswith('*')
+        words = tokenize(text)
+        if words:
+            terms.append((words, prefix))
+    return terms
+
+
+class MarketIndex:
+    """
+    Inverted index over series and market records.
+
+    Example:
+        index = MarketIndex.from_catalog(all_series, all_markets)
+        index.search('"jerome powell"', kind=MARKET)
+        index.match_any(['fed', 'federal reserve', 'fomc'], kind=SERIES)
+    """
+
+    def __init__(self):
+        self._postings = {}     # kind -> {word -> set of doc ids}
+        self._docs = []         # doc id -> (kind, ticker, record, text) or None once removed
+        self._ids = {}          # (kind, ticker) -> doc id
+        self._vocabulary = []   # sorted words of every kind, for prefix lookups
+        self._vocabulary_dirty = False
+
+    @classmethod
+    def from_catalog(cls, series=(), markets=()):
+        index = cls()
+        index.add(series, SERIES)
+        index.add(markets, MARKET)
+        return index
+
+    def __len__(self):
+        return len(self._ids)
+
+    # -- updates -----------------------------------------------------------
+
+    def add(self, records, kind=MARKET):
+        """Index records (API dicts with at least a 'ticker'), replacing earlier versions."""
+        postings = self._postings.setdefault(kind, {})
+        for record in records:
+            key = (kind, record['ticker'])
+            if key in self._ids:
+                self._unindex(self._ids[key])
+            doc = len(self._docs)
+            fields = _field_words(record)
+            # Fields are kept apart by '|' so a phrase cannot span two of them
+            text = ' | '.join(' '.join(words) for words in fields)
+            self._docs.append((kind, record['ticker'], record, f' {text} '))
+            self._ids[key] = doc
+            for words in fields:
+                for word in words:
+                    posting = postings.get(word)
+                    if posting is None:
+                        posting = postings[word] = set()
+                        self._vocabulary_dirty = True
+                    posting.add(doc)
+
+    def remove(self, ticker, kind=MARKET):
+        doc = self._ids.pop((kind, ticker), None)
+        if doc is not None:
+            self._unindex(doc)
+
+    def _unindex(self, doc):
+        kind, _, record, _ = self._docs[doc]
+        postings = self._postings[kind]
+        for words in _field_words(record):
+            for word in words:
+                posting = postings.get(word)
+                if posting is not None:
+                    posting.discard(doc)
+                    if not posting:
+                        del postings[word]
+                        self._vocabulary_dirty = True
+        self._docs[doc] = None
+
+    # -- lookups -----------------------------------------------------------
+
+    def _prefix_words(self, prefix):
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(set().union(*self._postings.values()))
+            self._vocabulary_dirty = False
+        lo = bisect.bisect_left(self._vocabulary, prefix)
+        hi = bisect.bisect_left(self._vocabulary, prefix + '\x7f')
+        return self._vocabulary[lo:hi]
+
+    def _word_docs(self, word, prefix, kinds):
+        words = self._prefix_words(word) if prefix else [word]
+        sets = [p[w] for p in kinds for w in words if w in p]
+        if len(sets) == 1:
+            return sets[0]
+        return set().union(*sets)
+
+    def _term_docs(self, words, prefix, kinds, within=None):
+        """Doc ids matching one term (word, prefix or phrase), limited to `within`."""
+        sets = [self._word_docs(w, prefix and i == len(words) - 1, kinds) for i, w in enumerate(words)]
+        if within is not None:
+            sets.append(within)
+        docs = set.intersection(*sorted(sets, key=len)) if len(sets) > 1 else set(sets[0])
+        if len(words) > 1 and docs:
+            pattern = ' ' + ' '.join(words) + (r'[a-z0-9]* ' if prefix else ' ')
+            phrase = re.compile(pattern) if prefix else None
+            docs = {d for d in docs
+                    if (phrase.search(self._docs[d][3]) if prefix else pattern in self._docs[d][3])}
+        return docs
+
+    def _kinds(self, kind):
+        if kind is None:
+            return list(self._postings.values())
+        return [self._postings[kind]] if kind in self._postings else []
+
+    def _select(self, docs, category, limit):
+        results = []
+        for doc in sorted(docs):
+            record = self._docs[doc][2]
+            if category is not None and record.get('category') != category:
+                continue
+            results.append(record)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def search(self, query, kind=None, category=None, limit=None):
+        """
+        Records matching every term of a query, in the order they were added.
+
+        Args:
+            query: Words, "quoted phrases" and prefix* terms
+            kind: SERIES or MARKET to restrict the results (default: both)
+            category: Only records with this category
+            limit: Most records returned
+        """
+        terms = parse_query(query)
+        kinds = self._kinds(kind)
+        if not terms or not kinds:
+            return []
+        # Narrowest term first, so later terms only filter a small candidate set
+        terms.sort(key=lambda t: len(self._word_docs(t[0][0], t[1] and len(t[0]) == 1, kinds)))
+        docs = None
+        for words, prefix in terms:
+            docs = self._term_docs(words, prefix, kinds, docs)
+            if not docs:
+                return []
+        return self._select(docs, category, limit)
+
+    def match_any(self, keywords, kind=None, category=None, prefix=True, limit=None):
+        """
+        Records matching at least one keyword, like the notebooks' keyword loops.
+
+        Multi-word keywords are phrases. With prefix=True the last word of
+        each keyword may be the start of a longer word ('fed' also finds
+        'federal'), which is close to the notebooks' substring test.
+        """
+        kinds = self._kinds(kind)
+        docs = set()
+        for keyword in keywords:
+            words = tokenize(keyword)
+            if words:
+                docs |= self._term_docs(words, prefix, kinds)
+        return self._select(docs, category, limit)
+
+
+def main():
+    """Index a synthetic 120k-market catalog and time some queries"""
+    import time
+
+    from synthetic_data import synthetic_catalog
+
+    series, markets = synthetic_catalog()
+    start = time.perf_counter()
+    index = MarketIndex.from_catalog(series, markets)
+    print(f"  Indexed {len(index):,} records in {time.perf_counter() - start:.2f}s")
+
+    search_keywords = ["fed", "federal reserve", "jerome powell", "powell", "fomc", "federal funds",
+                       "interest rate", "fed decision", "monetary policy", "fed chair"]
+    queries = [
+        ('match_any(search_keywords, kind=SERIES)', lambda: index.match_any(search_keywords, kind=SERIES)),
+        ("search('\"jerome powell\"', kind=SERIES)", lambda: index.search('"jerome powell"', kind=SERIES)),
+        ("search('snowfall nyc')", lambda: index.search('snowfall nyc')),
+        ("search('bitcoin max*', limit=20)", lambda: index.search('bitcoin max*', limit=20)),
+    ]
+    for label, query in queries:
+        elapsed = float('inf')
+        for _ in range(3):  # the first prefix query also sorts the vocabulary
+            start = time.perf_counter()
+            found = query()
+            elapsed = min(elapsed, time.perf_counter() - start)
+        print(f"  {label:<45} {len(found):>7,} records  {elapsed * 1e6:>10,.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Multi-Resolution OHLC Pyramid
+=============================
+work.ipynb and economics.ipynb fetch the same market at several
+period_interval values (1, 60, 1440) as separate API calls, and the CSV
+analyses scan full minute data even for daily questions. OHLCPyramid
+derives 5m / 15m / 1h / 1d bars locally from the finest data held (1-minute
+candles, a Kalshi minute price column or BTC_1min OHLC), keeps them up to
+date as new minutes are appended, and answers each query from the coarsest
+level that still has the requested resolution.
+
+Bars are left-labelled: a bar stamped 10:00 at the 1h level covers
+[10:00, 11:00). Bins are aligned to the Unix epoch, so daily bars run from
+UTC midnight. Within a bar: open is the first open, high the max, low the
+min, close the last close, volume the sum and open_interest the last value.
+
+Each level is a set of growable numpy arrays. Appending n minutes costs
+O(n) per level: new minutes are aggregated with ufunc.reduceat and the
+first new bar is merged into the level's last (possibly still open) bar.
+"""
+
+import numpy as np
+import pandas as pd
+
+from compact_prices import NS_PER_MINUTE
+
+LEVELS = (1, 5, 15, 60, 1440)  # bar sizes in minutes
+FIELDS = ('open', 'high', 'low', 'close', 'volume', 'open_interest')
+
+
+def bars_from_prices(timestamps, prices):
+    """
+    Minute bars from a single price column (e.g. one Kalshi bucket).
+
+    Empty minutes are dropped; each remaining minute is a flat bar.
+    """
+    prices = np.asarray(prices, dtype=float)
+    keep = ~np.isnan(prices)
+    p = prices[keep]
+    return pd.DataFrame({
+        'timestamp': np.asarray(timestamps).astype('datetime64[ns]')[keep],
+        'open': p, 'high': p, 'low': p, 'close': p,
+    })
+
+
+def bars_from_candles(candles, field='price', period_minutes=1):
+    """
+    Bars from a Kalshi /candlesticks response.
+
+    Kalshi stamps candles with end_period_ts; bars here are stamped with the
+    period start. field picks the OHLC object ('price', 'yes_bid' or
+    'yes_ask'); candles without a value for it (no trades) are dropped.
+    """
+    rows = []
+    for candle in candles:
+        ohlc = candle.get(field) or {}
+        if ohlc.get('close') is None:
+            continue
+        rows.append((candle['end_period_ts'] - 60 * period_minutes,
+                     ohlc.get('open'), ohlc.get('high'), ohlc.get('low'), ohlc.get('close'),
+                     candle.get('volume', 0), candle.get('open_interest')))
+    bars = pd.DataFrame(rows, columns=['timestamp', *FIELDS], dtype=float)
+    bars['timestamp'] = pd.to_datetime(bars['timestamp'].astype('int64'), unit='s')
+    return bars
+
+
+class _Level:
+    """Growable column arrays for one bar size."""
+
+    def __init__(self, minutes):
+        self.minutes = minutes
+        self.size = 0
+        self.start = np.empty(16, dtype=np.int64)  # bar start, minutes since epoch
+        self.data = {f: np.empty(16) for f in FIELDS}
+
+    def _reserve(self, extra):
+        need = self.size + extra
+        if need <= len(self.start):
+            return
+        capacity = max(need, 2 * len(self.start))
+        self.start = np.resize(self.start, capacity)
+        for f in FIELDS:
+            self.data[f] = np.resize(self.data[f], capacity)
+
+    def extend(self, start, values):
+        """Append aggregated bars, merging the first into the last if they share a bin."""
+        if self.size and len(start) and start[0] == self.start[self.size - 1]:
+            last = self.size - 1
+            d = self.data
+            # fmax / fmin like the reduceat build, so a NaN gap bar on either side is ignored
+            d['high'][last] = np.fmax(d['high'][last], values['high'][0])
+            d['low'][last] = np.fmin(d['low'][last], values['low'][0])
+            d['close'][last] = values['close'][0]
+            d['volume'][last] += values['volume'][0]
+            d['open_interest'][last] = values['open_interest'][0]
+            start = start[1:]
+            values = {f: v[1:] for f, v in values.items()}
+        self._reserve(len(start))
+        end = self.size + len(start)
+        self.start[self.size:end] = start
+        for f in FIELDS:
+            self.data[f][self.size:end] = values[f]
+        self.size = end
+
+    def frame(self, lo=0, hi=None):
+        hi = self.size if hi is None else hi
+        df = pd.DataFrame({f: self.data[f][lo:hi].copy() for f in FIELDS})
+        df.insert(0, 'timestamp', (self.start[lo:hi] * NS_PER_MINUTE).astype('datetime64[ns]'))
+        return df
+
+
+def _aggregate(minutes, values, size):
+    """Aggregate time-sorted bars into `size`-minute bins with reduceat."""
+    bins = minutes // size
+    cuts = np.flatnonzero(np.diff(bins)) + 1
+    first = np.concatenate([[0], cuts])
+    last = np.append(cuts, len(bins)) - 1
+    return bins[first] * size, {
+        'open': values['open'][first],
+        'high': np.fmax.reduceat(values['high'], first),
+        'low': np.fmin.reduceat(values['low'], first),
+        'close': values['close'][last],
+        'volume': np.add.reduceat(np.nan_to_num(values['volume']), first),
+        'open_interest': values['open_interest'][last],
+    }
+
+
+class OHLCPyramid:
+    """
+    OHLC bars at several resolutions, built from the finest level.
+
+    Args:
+        levels: Bar sizes in minutes; the first is the resolution of the
+            data that will be appended, each must be a multiple of it
+
+    Example:
+        pyramid = OHLCPyramid()
+        pyramid.append(bars_from_prices(kalshi['timestamp'], kalshi['73° or above']))
+        pyramid.query('2025-07-25', '2025-07-27', '1h')
+    """
+
+    def __init__(self, levels=LEVELS):
+        levels = sorted(levels)
+        if any(size % levels[0] for size in levels):
+            raise ValueError("every level must be a multiple of the finest level")
+        self.levels = {size: _Level(size) for size in levels}
+        self.base = levels[0]
+
+    @classmethod
+    def from_bars(cls, bars, levels=LEVELS):
+        pyramid = cls(levels)
+        pyramid.append(bars)
+        return pyramid
+
+    def append(self, bars):
+        """
+        Add finest-level bars (DataFrame with timestamp and OHLC columns;
+        volume and open_interest are optional). They must come after, or
+        within the still-open bin of, everything appended so far.
+        """
+        if not len(bars):
+            return
+        ns = bars['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        minutes = ns // NS_PER_MINUTE
+        if np.any(np.diff(minutes) < 0):
+            raise ValueError("bars must be in time order")
+        base = self.levels[self.base]
+        if base.size and (minutes[0] // self.base) * self.base < base.start[base.size - 1]:
+            raise ValueError("bars must not precede data already in the pyramid")
+
+        n = len(bars)
+        values = {f: (bars[f].to_numpy(dtype=float) if f in bars else np.full(n, 0.0 if f == 'volume' else np.nan))
+                  for f in FIELDS}
+        for size, level in self.levels.items():
+            start, agg = _aggregate(minutes, values, size)
+            level.extend(start, agg)
+
+    def level_for(self, resolution_minutes):
+        """Coarsest level whose bar size divides the requested resolution."""
+        usable = [size for size in self.levels if resolution_minutes % size == 0]
+        if not usable:
+            raise ValueError(f"no level fine enough for {resolution_minutes}-minute bars")
+        return max(usable)
+
+    def query(self, start=None, end=None, resolution='1min'):
+        """
+        Bars with start <= timestamp < end at the requested resolution.
+
+        Reads from the coarsest level that fits; resolutions that are not a
+        level (e.g. '30min', '4h') are aggregated from it on the fly.
+        """
+        resolution_minutes = int(pd.Timedelta(resolution) / pd.Timedelta(minutes=1))
+        size = self.level_for(resolution_minutes)
+        level = self.levels[size]
+        starts = level.start[:level.size]
+        lo = 0 if start is None else int(np.searchsorted(starts, pd.Timestamp(start).value // NS_PER_MINUTE))
+        hi = level.size if end is None else int(np.searchsorted(starts, pd.Timestamp(end).value // NS_PER_MINUTE))
+        if resolution_minutes == size:
+            return level.frame(lo, hi)
+
+        values = {f: level.data[f][lo:hi] for f in FIELDS}
+        bar_start, agg = _aggregate(starts[lo:hi], values, resolution_minutes)
+        df = pd.DataFrame(agg)
+        df.insert(0, 'timestamp', (bar_start * NS_PER_MINUTE).astype('datetime64[ns]'))
+        return df
+
+    def sizes(self):
+        """Number of bars held at each level."""
+        return {size: level.size for size, level in self.levels.items()}
+
+
+def main():
+    """Build a pyramid for the longest Kalshi minute file and query it"""
+    from ladders import load_price_history
+
+    kalshi = load_price_history('kalshi-price-history-kxbtc2025100-25dec31-minute.csv')
+    column = kalshi.columns[1]
+    bars = bars_from_prices(kalshi['timestamp'], kalshi[column])
+
+    pyramid = OHLCPyramid()
+    half = len(bars) // 2
+    pyramid.append(bars.iloc[:half])
+    pyramid.append(bars.iloc[half:])
+    print(f"  {column}: bars per level {pyramid.sizes()}")
+    print(pyramid.query(resolution='1D').to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Bootstrap Confidence Intervals for Backtest P&L
+===============================================
+The hedge scripts print one Total P&L per strategy and call the largest one
+the "Best Strategy". This module resamples the per-period (or per-trade)
+P&L behind those totals to put confidence intervals on total P&L, Sharpe
+ratio and maximum drawdown.
+
+Resampling is a circular moving-block bootstrap, so short-range dependence
+(a position held over many minutes) survives inside each block. Block starts
+are drawn as a 2-D (resamples x blocks) array, and every block is summarised
+once up front (sum, sum of squares, running high/low, internal drawdown), so
+the metrics of all resamples come from array operations on those summaries
+without building the resampled paths. Resamples are processed in chunks,
+each with its own SeedSequence child, so results depend only on the seed and
+chunk size and not on how chunks are spread over worker processes.
+
+All strategies are resampled with the same indices (paired bootstrap), which
+makes "C beat A in x% of resamples" a meaningful statement.
+
+block_indices / path_metrics give the same figures by gathering the paths
+explicitly, which is handy for checking but far slower on minute data.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from kalshi_fees import kalshi_fee
+
+METRICS = ('total_pnl', 'sharpe', 'max_drawdown')
+
+
+def strategy_pnl_series(df, config):
+    """
+    Per-minute P&L of Strategies A, B and C from a run_backtest frame.
+
+    Kalshi legs are marked to market each minute and fees are charged on
+    trade minutes, so each column sums to the matching run_backtest total
+    (up to float rounding).
+
+    Parameters:
+    - df: First output of hedge_backtest.run_backtest
+    - config: The HedgeConfig used for that run
+
+    Returns:
+        DataFrame indexed by timestamp with columns strategy_a/b/c
+    """
+    btc = df['btc_price'].to_numpy(dtype=float)
+    prices = df['market_price'].to_numpy(dtype=float)
+    signal = df['signal'].to_numpy()
+
+    btc_moves = np.diff(btc, prepend=btc[0])
+    price_moves = np.diff(prices, prepend=prices[0])
+    held = np.concatenate([[0], signal[:-1]])
+    trades = np.concatenate([[False], signal[1:] != signal[:-1]])
+
+    strategy_a = config.initial_capital * btc_moves / btc[0]
+    kalshi_b = -price_moves * config.contracts
+    kalshi_c = held * price_moves * config.contracts - np.where(trades, kalshi_fee(prices, config.contracts), 0.0)
+    return pd.DataFrame({
+        'strategy_a': strategy_a,
+        'strategy_b': strategy_a + kalshi_b,
+        'strategy_c': strategy_a + kalshi_c,
+    }, index=pd.DatetimeIndex(df['timestamp'], name='timestamp'))
+
+
+def trade_pnl(prices, signals, contracts):
+    """
+    Strategy C Kalshi P&L per closed position, net of the fee paid to open it.
+
+    Follows dynamic_kalshi_pnl, so the values sum to its pnl_after_fees.
+
+    Returns:
+        Array with one entry per position change
+    """
+    prices = np.asarray(prices, dtype=float)
+    signals = np.asarray(signals)
+    changes = np.flatnonzero(signals[1:] != signals[:-1]) + 1
+    if len(changes) == 0:
+        return np.zeros(0)
+    exits = np.append(changes[1:], len(prices) - 1)
+    position = signals[changes]
+    gross = (prices[exits] - prices[changes]) * position * contracts
+    return gross - kalshi_fee(prices[changes], contracts)
+
+
+def period_pnl(pnl, freq='D'):
+    """Sum per-minute P&L (Series or DataFrame on a DatetimeIndex) into bars."""
+    return pnl.resample(freq).sum()
+
+
+def block_indices(rng, n_periods, n_resamples, block_length):
+    """
+    Circular moving-block bootstrap indices, shape (n_resamples, n_periods).
+
+    Each row is built from blocks of `block_length` consecutive periods with
+    uniformly drawn starts, wrapping around the end of the series.
+    """
+    block_length = max(1, min(int(block_length), n_periods))
+    n_blocks = -(-n_periods // block_length)
+    starts = rng.integers(0, n_periods, size=(n_resamples, n_blocks, 1))
+    idx = (starts + np.arange(block_length)) % n_periods
+    return idx.reshape(n_resamples, -1)[:, :n_periods]
+
+
+def path_metrics(pnl, initial_capital, periods_per_year):
+    """
+    Total P&L, annualised Sharpe and max drawdown along the last-but-one axis.
+
+    Args:
+        pnl: Array (..., periods, strategies)
+
+    Returns:
+        dict of arrays shaped (..., strategies)
+    """
+    total = pnl.sum(axis=-2)
+    std = pnl.std(axis=-2, ddof=1) if pnl.shape[-2] > 1 else np.zeros_like(total)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, pnl.mean(axis=-2) / std * np.sqrt(periods_per_year), np.nan)
+    equity = initial_capital + np.cumsum(pnl, axis=-2)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=-2), initial_capital)
+    return {
+        'total_pnl': total,
+        'sharpe': sharpe,
+        'max_drawdown': (peak - equity).max(axis=-2),
+    }
+
+
+def block_stats(pnl, block_length):
+    """
+    Summary of every circular block of `block_length` periods.
+
+    For the block starting at each period: its sum, sum of squares, highest
+    and lowest running total (relative to the block start; the highest
+    includes the start itself) and its internal max drawdown. These are all
+    a bootstrap needs to combine blocks without materialising the paths.
+
+    Args:
+        pnl: Array (periods, strategies)
+
+    Returns:
+        Array (5, periods, strategies)
+    """
+    n, k = pnl.shape
+    extended = np.vstack([pnl, pnl[np.arange(block_length) % n]])
+    cum = np.vstack([np.zeros((1, k)), np.cumsum(extended, axis=0)])
+    cum_sq = np.vstack([np.zeros((1, k)), np.cumsum(extended**2, axis=0)])
+
+    stats = np.empty((5, n, k))
+    stats[0] = cum[block_length:block_length + n] - cum[:n]
+    stats[1] = cum_sq[block_length:block_length + n] - cum_sq[:n]
+    # (starts, strategies, block_length + 1) views, taken a slab of starts at a time
+    windows = np.lib.stride_tricks.sliding_window_view(cum, block_length + 1, axis=0)
+    step = max(1, 2_000_000 // ((block_length + 1) * k))
+    for lo in range(0, n, step):
+        hi = min(lo + step, n)
+        rel = windows[lo:hi] - cum[lo:hi, :, None]
+        stats[2, lo:hi] = rel.max(axis=2)
+        stats[3, lo:hi] = rel[:, :, 1:].min(axis=2)
+        stats[4, lo:hi] = (np.maximum.accumulate(rel, axis=2) - rel).max(axis=2)
+    return stats
+
+
+def combine_blocks(stats, last_stats, starts, n_periods, initial_capital, periods_per_year):
+    """
+    Metrics of bootstrap paths assembled from block summaries.
+
+    Args:
+        stats: block_stats for the full block length
+        last_stats: block_stats for the (possibly shorter) final block
+        starts: Block starts, shape (resamples, blocks)
+
+    Returns:
+        dict of arrays shaped (resamples, strategies)
+    """
+    blocks = np.concatenate([stats[:, starts[:, :-1]], last_stats[:, starts[:, -1:]]], axis=2)
+    sums, squares, highs, lows, inner = blocks  # each (resamples, blocks, strategies)
+
+    total = sums.sum(axis=1)
+    offset = np.cumsum(sums, axis=1) - sums
+    # Highest equity (relative to initial capital) before each block starts
+    peak = np.maximum.accumulate(offset + highs, axis=1)
+    peak = np.maximum(np.concatenate([np.zeros_like(peak[:, :1]), peak[:, :-1]], axis=1), 0.0)
+    drawdown = np.maximum(inner, peak - (offset + lows)).max(axis=1)
+
+    mean = total / n_periods
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = (squares.sum(axis=1) - total * mean) / (n_periods - 1)
+        std = np.sqrt(np.maximum(var, 0.0))
+        sharpe = np.where(std > 1e-12 * np.maximum(np.abs(mean), 1.0), mean / std * np.sqrt(periods_per_year), np.nan)
+    return {'total_pnl': total, 'sharpe': sharpe, 'max_drawdown': drawdown}
+
+
+_SHARED = {}
+
+
+def _init_worker(stats, last_stats):
+    _SHARED['stats'] = stats
+    _SHARED['last_stats'] = last_stats
+
+
+def _chunk_metrics(args):
+    """Metrics for one chunk of resamples."""
+    seed, n_resamples, n_periods, block_length, initial_capital, periods_per_year = args
+    rng = np.random.default_rng(seed)
+    n_blocks = -(-n_periods // block_length)
+    starts = rng.integers(0, n_periods, size=(n_resamples, n_blocks))
+    return combine_blocks(_SHARED['stats'], _SHARED['last_stats'], starts, n_periods,
+                          initial_capital, periods_per_year)
+
+
+def bootstrap_metrics(pnl, n_resamples=10000, block_length=None, initial_capital=10000,
+                      periods_per_year=365, chunk_resamples=None, max_chunk_elements=20_000_000,
+                      seed=0, n_workers=1):
+    """
+    Bootstrap distributions of total P&L, Sharpe and max drawdown.
+
+    Resampled paths are never materialised: each block is represented by its
+    block_stats summary, so a resample costs O(periods / block_length).
+
+    Parameters:
+    - pnl: Per-period P&L, DataFrame (one column per strategy), Series or array
+    - n_resamples: Number of bootstrap resamples
+    - block_length: Periods per block (default: about n ** (1/3))
+    - initial_capital: Starting equity for drawdowns
+    - periods_per_year: Annualisation for Sharpe (365 daily, 8760 hourly,
+      525600 minutely)
+    - chunk_resamples: Resamples per chunk (default: sized so one chunk's
+      block arrays hold at most max_chunk_elements values)
+    - seed: Seed for the SeedSequence that spawns one stream per chunk
+    - n_workers: Processes to spread chunks over (1 = run in-process)
+
+    Returns:
+        (point, samples): point holds the metrics of the original series and
+        samples the (n_resamples, strategies) arrays, both keyed by METRICS
+    """
+    values = pd.DataFrame(pnl).to_numpy(dtype=float)
+    n, k = values.shape
+    if n < 2:
+        raise ValueError("need at least two P&L periods to resample")
+    if block_length is None:
+        block_length = round(n ** (1 / 3))
+    block_length = max(1, min(int(block_length), n))
+    n_blocks = -(-n // block_length)
+    if chunk_resamples is None:
+        chunk_resamples = max(1, max_chunk_elements // (5 * n_blocks * k))
+
+    stats = block_stats(values, block_length)
+    last_length = n - (n_blocks - 1) * block_length
+    last_stats = stats if last_length == block_length else block_stats(values, last_length)
+
+    sizes = [chunk_resamples] * (n_resamples // chunk_resamples)
+    if n_resamples % chunk_resamples:
+        sizes.append(n_resamples % chunk_resamples)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(s, size, n, block_length, initial_capital, periods_per_year)
+            for s, size in zip(seeds, sizes)]
+
+    if n_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(stats, last_stats)) as pool:
+            parts = list(pool.map(_chunk_metrics, jobs))
+    else:
+        _init_worker(stats, last_stats)
+        parts = [_chunk_metrics(job) for job in jobs]
+
+    samples = {m: np.concatenate([p[m] for p in parts]) for m in METRICS}
+    point = path_metrics(values, initial_capital, periods_per_year)
+    return point, samples
+
+
+def confidence_intervals(point, samples, columns, level=0.95):
+    """
+    Percentile intervals as a tidy table.
+
+    Returns:
+        DataFrame indexed by (metric, strategy) with estimate, lower, upper
+        and the bootstrap standard error
+    """
+    tail = (1 - level) / 2 * 100
+    rows = []
+    for metric in METRICS:
+        s = samples[metric]
+        lower, upper = np.nanpercentile(s, [tail, 100 - tail], axis=0)
+        se = np.nanstd(s, axis=0, ddof=1)
+        for j, name in enumerate(columns):
+            rows.append((metric, name, point[metric][j], lower[j], upper[j], se[j]))
+    table = pd.DataFrame(rows, columns=['metric', 'strategy', 'estimate', 'lower', 'upper', 'std_error'])
+    return table.set_index(['metric', 'strategy'])
+
+
+def prob_best(samples, columns, metric='total_pnl'):
+    """Share of resamples in which each strategy has the highest metric."""
+    winners = np.nanargmax(samples[metric], axis=1)
+    return pd.Series(np.bincount(winners, minlength=len(columns)) / len(winners), index=columns)
+
+
+def main():
+    """Confidence intervals for the 2024 BTC hedge (needs BTC_1min_2024.csv)"""
+    from hedge_backtest import HedgeConfig, load_btc_minutes, load_kalshi_strike, merge_btc_kalshi, run_backtest
+
+    config = HedgeConfig(strike=100000, expiry='2024-12-31')
+    kalshi = load_kalshi_strike('kalshi-price-history-btcmaxy-24dec31-minute.csv', '$100000 or above')
+    df, results = run_backtest(merge_btc_kalshi(load_btc_minutes('BTC_1min_2024.csv'), kalshi), config)
+
+    daily = period_pnl(strategy_pnl_series(df, config), 'D')
+    point, samples = bootstrap_metrics(daily, n_resamples=10000, block_length=5,
+                                       initial_capital=config.initial_capital, n_workers=4)
+    print(confidence_intervals(point, samples, daily.columns).to_string(float_format='{:,.2f}'.format))
+    print("\nShare of resamples where each strategy has the highest P&L:")
+    print(prob_best(samples, daily.columns).to_string(float_format='{:.1%}'.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Position Sizing
+===============
+Stakes for the STEP 6 event strategy (companies.ipynb, work.ipynb). Instead
+of the fixed 70% YES / 30% NO split of an even DAILY_BUDGET share, the
+sizes of all events that enter on a day are solved for together.
+
+Every trade is a leg: YES on an event's favourite, NO on its other markets,
+or one side of a single binary market, bought at the ask. A leg costs c per
+contract (0-1) and wins with probability p. Each staked dollar then returns
+1/c - 1 with probability p and -1 otherwise, an expected return of
+mu = p/c - 1.
+
+Two objectives:
+
+    kelly           Exact log growth (Kelly) of fraction x bankroll, with legs
+                    treated as independent bets. The stake at which a leg's
+                    marginal growth equals a multiplier m is the root of a
+                    quadratic, so each leg has a closed form. At m = 0 this
+                    is the textbook f* = (p - c) / (1 - c).
+    mean_variance   mu'x - x'Sx / (2 x fraction x bankroll). This is the
+                    quadratic approximation of the same fractional Kelly
+                    growth. S covers the mutually exclusive outcomes inside
+                    an event; different events are independent. S is
+                    diagonal minus rank one per event, so once the scalar
+                    s = q'x of an event is known every leg again has a
+                    closed form, and s is a 1-D root per event.
+
+Constraints are stakes >= 0, an optional per-leg cap (what the book can
+fill), an optional per-event cap and the daily budget. Their multipliers
+are roots of monotone spend functions, searched for all days (the budget)
+and all capped events at once. A year of entries therefore costs a few
+hundred array passes, not a Python loop over days or a generic QP solver.
+
+The probabilities carry the strategy's edge, and they are an input here.
+The legs' mid prices carry no edge, so sizing with them gives every stake 0.
+calibrated_probability estimates win rates by price bucket. It uses only
+legs that settled before each entry, so it can be used in a backtest.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('kelly', 'mean_variance')
+
+_EPS = 1e-6
+
+
+def _leg(market, side):
+    """Ask price (cents) and bid/ask midpoint of one side, with STEP 6's fallbacks."""
+    if side == 'YES':
+        price = market.get('yes_ask', market.get('yes_bid', 50))
+        bid = market.get('yes_bid')
+    else:
+        price = market.get('no_ask', market.get('no_bid', 100 - market.get('yes_bid', 50)))
+        bid = market.get('no_bid')
+    mid = (bid + price) / 2 if bid is not None and 0 < bid <= price else price
+    return price, mid
+
+
+def event_legs(events_by_entry_date):
+    """
+    The legs STEP 6 trades, one row each.
+
+    Multi-market events buy YES on the favourite (highest yes_bid) and NO on
+    every other market. Single markets buy YES when yes_bid >= 50, else NO.
+
+    Args:
+        events_by_entry_date: STEP 5 output, date -> list of event dicts
+
+    Returns:
+        DataFrame with day, event, ticker, side, market_type, entry_time,
+        close_time, price and implied (bid/ask midpoint) as probabilities,
+        result and liquidity
+    """
+    rows = []
+    for date in sorted(events_by_entry_date):
+        for event in events_by_entry_date[date]:
+            markets = event['markets']
+            if len(markets) >= 2:
+                favorite = max(markets, key=lambda m: m.get('yes_bid', 0))
+                picks = [(favorite, 'YES', 'multi_favorite')]
+                picks += [(m, 'NO', 'multi_other') for m in markets if m is not favorite]
+            else:
+                market = markets[0]
+                picks = [(market, 'YES' if market.get('yes_bid', 50) >= 50 else 'NO', 'binary')]
+            for market, side, market_type in picks:
+                price, mid = _leg(market, side)
+                rows.append({
+                    'day': date,
+                    'event': event['event_ticker'],
+                    'ticker': market['ticker'],
+                    'side': side,
+                    'market_type': market_type,
+                    'entry_time': event['entry_time'],
+                    'close_time': market.get('close_time_dt'),
+                    'price': price / 100,
+                    'implied': mid / 100,
+                    'result': market.get('result', 'unknown'),
+                    'liquidity': market.get('liquidity_dollars_float', 0),
+                })
+    return pd.DataFrame(rows)
+
+
+def leg_outcomes(legs):
+    """1.0 for a won leg, 0.0 for a lost one, NaN when void or not settled."""
+    result = legs['result'].to_numpy()
+    won = np.where(legs['side'].to_numpy() == 'YES', result == 'yes', result == 'no')
+    return np.where(np.isin(result, ('yes', 'no')), won.astype(float), np.nan)
+
+
+def leg_pnl(legs, stakes):
+    """
+    P&L in dollars of each leg for the given stakes, as STEP 6 books it.
+
+    A win pays stake / price - stake, a loss costs the stake, and void or
+    unsettled legs are 0.
+    """
+    stakes = np.asarray(stakes, dtype=float)
+    price = legs['price'].to_numpy(dtype=float)
+    won = leg_outcomes(legs)
+    pnl = np.where(won == 1, stakes * (1 / price - 1), -stakes)
+    return np.where(np.isnan(won), 0.0, pnl)
+
+
+def calibrated_probability(legs, bins=10, prior=20):
+    """
+    Win probability of each leg from the record of earlier legs.
+
+    Legs are bucketed by price. A leg's probability is its price plus the
+    average excess win rate (won - price) of the legs in its bucket that
+    closed before its entry_time. The excess is shrunk towards 0 as if
+    `prior` extra legs had won exactly at their price. Legs with no
+    history get their price back.
+
+    Args:
+        legs: event_legs output (needs price, entry_time, close_time, result)
+        bins: Equal-width price buckets over 0-1
+        prior: Pseudo-count of the shrinkage
+
+    Returns:
+        Array of probabilities, aligned with legs
+    """
+    price = legs['price'].to_numpy(dtype=float)
+    bucket = np.minimum((price * bins).astype(int), bins - 1)
+    won = leg_outcomes(legs)
+    settled = ~np.isnan(won) & legs['close_time'].notna().to_numpy()
+
+    close = pd.to_datetime(legs['close_time'][settled], utc=True).to_numpy()
+    order = np.argsort(close, kind='stable')
+    close = close[order]
+    # Running totals per bucket, as of each settled leg in close order
+    excess = np.zeros((len(close) + 1, bins))
+    count = np.zeros((len(close) + 1, bins))
+    rows = np.arange(1, len(close) + 1)
+    excess[rows, bucket[settled][order]] = (won - price)[settled][order]
+    count[rows, bucket[settled][order]] = 1
+    excess = np.cumsum(excess, axis=0)
+    count = np.cumsum(count, axis=0)
+
+    known = np.searchsorted(close, pd.to_datetime(legs['entry_time'], utc=True).to_numpy(), side='left')
+    shift = excess[known, bucket] / (count[known, bucket] + prior)
+    return np.clip(price + shift, _EPS, 1 - _EPS)
+
+
+def kelly_fraction(prob, price):
+    """Kelly fraction of bankroll for one binary contract bought at `price`."""
+    return np.maximum((np.asarray(prob) - price) / (1 - np.asarray(price)), 0.0)
+
+
+def _kelly_stakes(m, p, c, scale):
+    """
+    Stakes at which each leg's marginal log growth equals m.
+
+    With b = (1 - c) / c, the fraction f solves
+    p b / (1 + f b) - (1 - p) / (1 - f) = m, which rearranges to
+    m b f^2 - (m (b - 1) + b) f + (p (b + 1) - 1 - m) = 0. The wanted
+    root is the smaller one, written in the form that stays finite at m = 0.
+    """
+    b = (1 - c) / c
+    quad = m * b
+    lin = m * (b - 1) + b
+    const = p * (b + 1) - 1 - m
+    root = np.sqrt(np.maximum(lin * lin - 4 * quad * const, 0.0))
+    return scale * np.maximum(2 * const / (lin + root), 0.0)
+
+
+def _decreasing_root(func, lo, hi, f_lo, f_hi, ftol, iterations, rtol=1e-9):
+    """
+    Batched root of non-increasing functions with f(lo) >= 0 >= f(hi).
+
+    The functions here are piecewise linear (or close to it), so an Illinois
+    (modified regula falsi) search usually lands on the right piece in a
+    few passes, where plain bisection needs ~40. Returns points where
+    f <= 0, within ftol of 0 or rtol of the starting bracket (lo itself
+    when f(lo) is already 0).
+    """
+    width = rtol * (hi - lo)
+    side = np.zeros(len(lo), dtype=np.int8)
+    for _ in range(iterations):
+        todo = (f_hi < -ftol) & (f_lo > 0) & (hi - lo > width)
+        if not todo.any():
+            break
+        step = f_hi - f_lo
+        m = np.where(todo, np.where(step < 0, hi - f_hi * (hi - lo) / np.where(step < 0, step, 1), hi), hi)
+        f = func(m)
+        above = todo & (f > 0)
+        below = todo & ~above
+        # Illinois step: halve the end that survived twice in a row
+        f_hi = np.where(above & (side == 1), f_hi / 2, f_hi)
+        f_lo = np.where(below & (side == -1), f_lo / 2, f_lo)
+        lo, f_lo = np.where(above, m, lo), np.where(above, f, f_lo)
+        hi, f_hi = np.where(below, m, hi), np.where(below, f, f_hi)
+        side = np.where(above, 1, np.where(below, -1, side))
+    return np.where(f_lo <= 0, lo, hi)
+
+
+def _fill(response, m_hi, day, event, event_day, budget, event_cap, iterations):
+    """
+    Stakes under the daily budget and per-event caps.
+
+    response(m) gives every leg's stake when each event's legs face the
+    multiplier m. Stakes are non-increasing in m and 0 once m >= m_hi. The
+    daily multiplier is solved against the day's spend, with each event's
+    spend counted as at most its cap. That is exact, because an event over
+    its cap gets its own extra multiplier, which brings it down to the cap.
+    Those are solved afterwards, with the daily multipliers fixed.
+    """
+    n_days, n_events = len(budget), len(event_day)
+
+    def event_spend(m):
+        return np.bincount(event, response(m), n_events)
+
+    def day_excess(lam):
+        spent = event_spend(lam[day])
+        if event_cap is not None:
+            spent = np.minimum(spent, event_cap)
+        return np.bincount(event_day, spent, n_days) - budget
+
+    lam = np.zeros(n_days)
+    excess = day_excess(lam)
+    if (excess > 0).any():
+        lam = _decreasing_root(day_excess, lam, np.where(excess > 0, m_hi, 0.0), excess, -budget,
+                               1e-6 * budget, iterations)
+    base = lam[day]
+    if event_cap is not None:
+        caps = np.full(n_events, float(event_cap))
+        excess = event_spend(base) - caps
+        if (excess > 0).any():
+            nu = _decreasing_root(lambda m: event_spend(base + m[event]) - caps, np.zeros(n_events),
+                                  np.where(excess > 0, m_hi, 0.0), excess, -caps, 1e-6 * caps, iterations)
+            base = base + nu[event]
+    return response(base)
+
+
+def size_positions(legs, daily_budget=10000, bankroll=100000, fraction=0.5, method='kelly',
+                   event_cap=None, leg_cap=None, prob='prob', iterations=60):
+    """
+    Dollar stake of every leg, solved jointly for each entry day.
+
+    Args:
+        legs: One row per leg with day, event, side, price (0-1) and a
+              probability column (event_legs output plus probabilities)
+        daily_budget: Most dollars staked per day (scalar, or a Series by day)
+        bankroll: Capital the Kelly growth is measured against
+        fraction: Fractional Kelly multiplier (0.5 = half Kelly)
+        method: 'kelly' or 'mean_variance' (see the module docstring)
+        event_cap: Most dollars staked on one event
+        leg_cap: Most dollars on one leg (scalar or array aligned with legs)
+        prob: Column holding each leg's win probability
+        iterations: Most root-finding passes per multiplier
+
+    Returns:
+        Array of stakes in dollars, aligned with legs
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    if len(legs) == 0:
+        return np.zeros(0)
+
+    day, days = pd.factorize(legs['day'])
+    event = legs.groupby(['day', 'event'], sort=False).ngroup().to_numpy()
+    event_day = np.zeros(event.max() + 1, dtype=np.int64)
+    event_day[event] = day
+    if isinstance(daily_budget, pd.Series):
+        budget = daily_budget.reindex(days).to_numpy(dtype=float)
+    else:
+        budget = np.full(len(days), float(daily_budget))
+
+    c = np.clip(legs['price'].to_numpy(dtype=float), _EPS, 1 - _EPS)
+    p = np.clip(legs[prob].to_numpy(dtype=float), _EPS, 1 - _EPS)
+    cap = np.full(len(c), np.inf) if leg_cap is None else np.broadcast_to(np.asarray(leg_cap, dtype=float), c.shape)
+    scale = fraction * bankroll
+    mu = p / c - 1
+    m_hi = max(mu.max(), 0.0)
+
+    if method == 'kelly':
+        return _fill(lambda m: np.minimum(_kelly_stakes(m, p, c, scale), cap),
+                     m_hi, day, event, event_day, budget, event_cap, iterations)
+
+    # Leg return per dollar is a + b * Y, with Y the market's YES indicator,
+    # so within an event S = diag(b^2 p_yes) - q q' with q = b p_yes. The
+    # covariance takes the YES probabilities rescaled to sum to at most 1
+    # per event, which keeps S a covariance matrix.
+    yes = legs['side'].to_numpy() == 'YES'
+    p_yes = np.where(yes, p, 1 - p)
+    p_yes = p_yes / np.maximum(np.bincount(event, p_yes)[event], 1.0)
+    b = np.where(yes, 1 / c, -1 / c)
+    diag = b * b * p_yes / scale
+    q = b * p_yes / np.sqrt(scale)
+    n_events = len(event_day)
+    # No leg can take more than its day's budget, which also bounds the
+    # riskless combinations (NO on every outcome) S cannot see
+    cap = np.minimum(cap, budget[day] if event_cap is None else np.minimum(budget[day], event_cap))
+    s_lo = np.bincount(event, np.minimum(q, 0) * cap, n_events)
+    s_hi = np.bincount(event, np.maximum(q, 0) * cap, n_events)
+    # A leg can hold stake at multipliers above its mu when it hedges others;
+    # past this bound nothing can
+    m_hi = max((mu + np.maximum(q * s_lo[event], q * s_hi[event])).max(), 0.0)
+
+    def stakes(m):
+        # With s = q'x fixed, each leg's optimum is a clipped closed form.
+        # q'x(s) - s is non-increasing (slope: sum of free p_yes, minus 1),
+        # so the consistent s is a 1-D root per event
+        def at(s):
+            return np.clip((mu - m + q * s[event]) / diag, 0.0, cap)
+
+        def gap(s):
+            return np.bincount(event, q * at(s), n_events) - s
+
+        s = _decreasing_root(gap, s_lo, s_hi, gap(s_lo), gap(s_hi), 1e-9 * (s_hi - s_lo), iterations)
+        return at(s)
+
+    return _fill(stakes, m_hi, day, event, event_day, budget, event_cap, iterations)
+
+
+def sizing_report(legs, stakes):
+    """Staked, P&L and ROI per entry day."""
+    frame = pd.DataFrame({'day': legs['day'].to_numpy(), 'staked': stakes, 'pnl': leg_pnl(legs, stakes)})
+    daily = frame.groupby('day').sum()
+    daily['roi'] = daily['pnl'] / daily['staked'].where(daily['staked'] > 0)
+    return daily
+
+
+def main():
+    """Size a year of synthetic entries with both objectives and the fixed split"""
+    from synthetic_data import synthetic_event_entries
+
+    events_by_entry_date = synthetic_event_entries()
+    legs = event_legs(events_by_entry_date)
+    legs['prob'] = calibrated_probability(legs)
+    print(f"  {len(legs):,} legs in {legs['event'].nunique():,} events over {legs['day'].nunique()} days")
+
+    fixed = legs.groupby('day')['event'].transform('nunique').rdiv(10000).to_numpy()
+    multi = legs['market_type'].to_numpy() != 'binary'
+    others = legs.groupby('event')['side'].transform(lambda s: (s == 'NO').sum()).to_numpy()
+    fixed = np.where(legs['market_type'] == 'multi_favorite', fixed * 0.70,
+                     np.where(multi, fixed * 0.30 / np.maximum(others, 1), fixed))
+
+    results = {'fixed 70/30': (fixed, 0.0)}
+    for method in METHODS:
+        start = time.perf_counter()
+        stakes = size_positions(legs, 10000, 100000, method=method, event_cap=5000)
+        results[method] = (stakes, time.perf_counter() - start)
+
+    print(f"\n  {'Sizing':<14} {'Staked':>12} {'P&L':>12} {'ROI':>8} {'Max day':>10} {'Time':>9}")
+    for name, (stakes, elapsed) in results.items():
+        daily = sizing_report(legs, stakes)
+        print(f"  {name:<14} ${stakes.sum():>11,.0f} ${daily['pnl'].sum():>11,.0f} "
+              f"{daily['pnl'].sum() / stakes.sum():>8.2%} ${daily['staked'].max():>9,.0f} "
+              f"{elapsed * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
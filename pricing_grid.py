@@ -0,0 +1,243 @@
+"""
+Precomputed Probability Grid
+============================
+Lookup table for the strike probabilities the hedge engine and the barrier
+models evaluate over and over (norm.cdf(d2) for the same strikes as spot and
+time-to-expiry drift).
+
+The grid spans (log-moneyness, time-to-expiry, vol). Log-moneyness is stored
+standardised, z = ln(S/K) / (sigma * sqrt(T)), so the sharp step a probability
+takes near expiry stays a few grid cells wide instead of needing thousands of
+nodes; time is stored as sqrt(days) for the same reason. Lookups are trilinear
+interpolation over whole arrays of quotes.
+
+After building, the table is checked against the exact model at every cell
+centre (where multilinear interpolation error peaks) and refined until the
+worst error is within `tolerance`; that figure is kept as error_bound.
+Both models rise from 0 to 1 in z, so quotes beyond the z range get the
+limit (0 or 1); the largest gap between the table edge and that limit is
+folded into error_bound. Quotes too close to expiry, or with a per-quote vol
+outside the built band, are priced exactly, and a scalar vol that drifts
+outside the band triggers a lazy rebuild around it on the next lookup.
+"""
+
+import math
+import time
+
+import numpy as np
+
+from barrier_mc import barrier_probability_closed_form
+from hedge_backtest import calculate_actual_probability
+
+_SQRT_YEAR = math.sqrt(365.0)
+
+
+def terminal_model(spot, strike, days, vol):
+    """Terminal BSM probability (the hedge scripts' model)."""
+    return calculate_actual_probability(spot, strike, days, vol)
+
+
+def barrier_model(spot, strike, days, vol):
+    """Continuous-monitoring max-reaches probability."""
+    return barrier_probability_closed_form(spot, strike, days, vol)
+
+
+class ProbabilityGrid:
+    """
+    Interpolated probability lookup with a checked error bound.
+
+    Args:
+        model: f(spot, strike, days, vol) -> probability, vectorised and
+            increasing in spot from 0 to 1
+        z_range: Standardised log-moneyness covered by the table
+        days_range: Days to expiry covered (below the minimum, price exactly)
+        vol: Centre of the vol band to build first
+        vol_width: Half-width of the vol band
+        shape: Initial (z, days, vol) node counts
+        tolerance: Target max absolute interpolation error
+        max_nodes: Refinement stops before the table exceeds this many nodes
+
+    Example:
+        grid = ProbabilityGrid(vol=0.60)
+        probs = grid(btc_prices, 130000, days_left, 0.60)
+    """
+
+    def __init__(self, model=terminal_model, z_range=(-8.0, 8.0), days_range=(0.25, 400.0),
+                 vol=0.60, vol_width=0.15, shape=(161, 33, 7), tolerance=1e-4, max_nodes=4_000_000):
+        self.model = model
+        self.z_range = z_range
+        self.days_range = days_range
+        self.vol_width = vol_width
+        self.shape = shape
+        self.tolerance = tolerance
+        self.max_nodes = max_nodes
+        self.rebuilds = 0
+        self.build(vol)
+
+    def _exact(self, z, sqrt_days, vol):
+        days = sqrt_days**2
+        x = z * vol * np.sqrt(days / 365.0)
+        return self.model(np.exp(x), 1.0, days, vol)
+
+    def build(self, vol):
+        """(Re)build the table for the vol band centred on `vol`."""
+        lo = max(vol - self.vol_width, 1e-3)
+        self.vol_range = (lo, vol + self.vol_width)
+        shape = self.shape
+        while True:
+            self.axes = (
+                np.linspace(*self.z_range, shape[0]),
+                np.linspace(np.sqrt(self.days_range[0]), np.sqrt(self.days_range[1]), shape[1]),
+                np.linspace(*self.vol_range, shape[2]),
+            )
+            Z, D, V = np.meshgrid(*self.axes, indexing='ij')
+            self.table = self._exact(Z, D, V)
+            tail_error = max(float(self.table[0].max()), float(1 - self.table[-1].min()))
+            self.error_bound = max(self._check_error(), tail_error)
+            refined = tuple(2 * n - 1 for n in shape)
+            if self.error_bound <= self.tolerance or np.prod(refined) > self.max_nodes:
+                break
+            shape = refined
+        self.rebuilds += 1
+
+        # Plain-Python copy of the table and axis constants for the scalar path
+        (z0, d0, v0), (nz, nd, nv) = (tuple(float(a[0]) for a in self.axes),
+                                      tuple(len(a) for a in self.axes))
+        inv_steps = tuple(1.0 / float(a[1] - a[0]) for a in self.axes)
+        self._scalar = (self.vol_range[0], self.vol_range[1], self.days_range[0], self.days_range[1],
+                        self.z_range[0], self.z_range[1], z0, d0, v0, *inv_steps,
+                        nz - 2, nd - 2, nv - 2, nd * nv, nv, self.table.ravel().tolist())
+
+    def _check_error(self):
+        """Worst interpolation error over all cell centres."""
+        mids = [(a[:-1] + a[1:]) / 2 for a in self.axes]
+        Z, D, V = np.meshgrid(*mids, indexing='ij')
+        approx = self._interpolate(Z.ravel(), D.ravel(), V.ravel())
+        return float(np.max(np.abs(approx - self._exact(Z, D, V).ravel())))
+
+    def _interpolate(self, z, sqrt_days, vol):
+        """Trilinear interpolation; inputs must lie inside the table."""
+        idx, frac = [], []
+        for values, axis in zip((z, sqrt_days, vol), self.axes):
+            pos = (values - axis[0]) / (axis[1] - axis[0])
+            i = np.clip(np.floor(pos).astype(np.int64), 0, len(axis) - 2)
+            idx.append(i)
+            frac.append(pos - i)
+        (i, j, k), (fz, fd, fv) = idx, frac
+        t = self.table
+        c00 = t[i, j, k] * (1 - fz) + t[i + 1, j, k] * fz
+        c01 = t[i, j, k + 1] * (1 - fz) + t[i + 1, j, k + 1] * fz
+        c10 = t[i, j + 1, k] * (1 - fz) + t[i + 1, j + 1, k] * fz
+        c11 = t[i, j + 1, k + 1] * (1 - fz) + t[i + 1, j + 1, k + 1] * fz
+        c0 = c00 * (1 - fd) + c10 * fd
+        c1 = c01 * (1 - fd) + c11 * fd
+        return c0 * (1 - fv) + c1 * fv
+
+    def quote(self, spot, strike, days, vol):
+        """
+        Scalar lookup for one quote, in plain Python floats.
+
+        This is the per-tick path for streaming engines: it avoids numpy call
+        overhead entirely; only quotes too close to expiry use the exact model.
+        """
+        if not self._scalar[0] <= vol <= self._scalar[1]:
+            self.build(vol)
+        (_, _, d_lo, d_hi, z_lo, z_hi, z0, d0, v0, iz, idd, iv,
+         imax, jmax, kmax, sz, sd, t) = self._scalar
+        if not d_lo <= days <= d_hi:
+            return float(self.model(spot, strike, days, vol))
+        sqrt_days = math.sqrt(days)
+        z = math.log(spot / strike) * _SQRT_YEAR / (vol * sqrt_days)
+        if z < z_lo:
+            return 0.0
+        if z > z_hi:
+            return 1.0
+
+        pz, pd, pv = (z - z0) * iz, (sqrt_days - d0) * idd, (vol - v0) * iv
+        i, j, k = int(pz), int(pd), int(pv)
+        if i > imax:
+            i = imax
+        if j > jmax:
+            j = jmax
+        if k > kmax:
+            k = kmax
+        fz, fd, fv = pz - i, pd - j, pv - k
+
+        base = i * sz + j * sd + k
+        c00 = t[base] + (t[base + sz] - t[base]) * fz
+        c01 = t[base + 1] + (t[base + sz + 1] - t[base + 1]) * fz
+        c10 = t[base + sd] + (t[base + sz + sd] - t[base + sd]) * fz
+        c11 = t[base + sd + 1] + (t[base + sz + sd + 1] - t[base + sd + 1]) * fz
+        c0 = c00 + (c10 - c00) * fd
+        c1 = c01 + (c11 - c01) * fd
+        return c0 + (c1 - c0) * fv
+
+    def __call__(self, spot, strike, days, vol):
+        """
+        Probabilities for arrays of quotes (broadcast together).
+
+        A scalar vol outside the built band rebuilds the table around it
+        first; per-quote vols outside the band are priced exactly.
+        """
+        spot, strike, days, vol = np.broadcast_arrays(
+            np.asarray(spot, dtype=float), np.asarray(strike, dtype=float),
+            np.asarray(days, dtype=float), np.asarray(vol, dtype=float))
+        if vol.size and np.all(vol == vol.flat[0]):
+            v = float(vol.flat[0])
+            if not self.vol_range[0] <= v <= self.vol_range[1]:
+                self.build(v)
+
+        out = np.empty(spot.shape)
+        live = days >= self.days_range[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.log(spot / strike) / (vol * np.sqrt(np.where(live, days, 1.0) / 365.0))
+        on_table = (live & (days <= self.days_range[1])
+                    & (vol >= self.vol_range[0]) & (vol <= self.vol_range[1]))
+        below = on_table & (z < self.z_range[0])
+        above = on_table & (z > self.z_range[1])
+        inside = on_table & ~below & ~above
+
+        out[below] = 0.0
+        out[above] = 1.0
+        out[inside] = self._interpolate(z[inside], np.sqrt(days[inside]), vol[inside])
+        if not on_table.all():
+            rest = ~on_table
+            out[rest] = self.model(spot[rest], strike[rest], days[rest], vol[rest])
+        return out if out.ndim else float(out)
+
+
+def main():
+    """Report grid accuracy and lookup speed against the exact models"""
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    spot = rng.uniform(60000, 140000, n)
+    days = rng.uniform(0, 365, n)
+    strikes = rng.choice([75000, 90000, 100000, 130000], n)
+
+    for name, model in [('terminal', terminal_model), ('barrier', barrier_model)]:
+        grid = ProbabilityGrid(model)
+        start = time.perf_counter()
+        approx = grid(spot, strikes, days, 0.60)
+        lookup = time.perf_counter() - start
+        start = time.perf_counter()
+        exact = model(spot, strikes, days, 0.60)
+        direct = time.perf_counter() - start
+        print(f"{name:>9}: table {grid.table.shape}, bound {grid.error_bound:.1e}, "
+              f"observed {np.max(np.abs(approx - exact)):.1e}")
+        print(f"           batch: {lookup / n * 1e9:.0f} ns/quote grid vs {direct / n * 1e9:.0f} ns/quote exact")
+
+        m = 100_000
+        start = time.perf_counter()
+        quotes = list(zip(spot[:m].tolist(), strikes[:m].tolist(), days[:m].tolist()))
+        for s, k, d in quotes:
+            grid.quote(s, k, d, 0.60)
+        scalar = time.perf_counter() - start
+        start = time.perf_counter()
+        for q in range(m // 100):
+            model(spot[q], strikes[q], days[q], 0.60)
+        scalar_exact = (time.perf_counter() - start) * 100
+        print(f"           single quote: {scalar / m * 1e9:.0f} ns grid vs {scalar_exact / m * 1e9:.0f} ns exact")
+
+
+if __name__ == "__main__":
+    main()
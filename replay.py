@@ -0,0 +1,193 @@
+"""
+Historical Replay Harness
+=========================
+Feeds stored price histories through live components as one event stream.
+
+Any number of Kalshi minute files and BTC_1min_*.csv files are turned into
+per-source event iterators and merged with a k-way heap merge, so memory is
+one pending event per source plus whatever the loaders hold. The stream can
+be paced in real time, N x accelerated, or as fast as possible, and each run
+reports throughput (events/sec) and consumer lag (how far behind schedule
+the consumer fell).
+
+Example:
+    replay = Replay([kalshi_file_events('kalshi-...csv'),
+                     btc_file_events('BTC_1min_2024.csv')], speed=600)
+    stats = replay.run(my_consumer)
+    print(stats.summary())
+"""
+
+import heapq
+import os
+import time
+from collections import namedtuple
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from ladders import bucket_columns, load_price_history
+
+ReplayEvent = namedtuple('ReplayEvent', ['timestamp', 'source', 'field', 'value'])
+
+
+def _source_name(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.replace('kalshi-price-history-', '').replace('-minute', '')
+
+
+def frame_events(frame, source, columns, time_column='timestamp'):
+    """
+    Yield one ReplayEvent per non-missing cell of a time-sorted frame.
+
+    Events come out row by row (time order) and in column order within a row.
+    Timestamps are int64 nanoseconds.
+    """
+    stamps = frame[time_column].to_numpy(dtype='datetime64[ns]').astype(np.int64).tolist()
+    values = frame[columns].to_numpy(dtype=float)
+    rows, cols = np.nonzero(~np.isnan(values))
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        yield ReplayEvent(stamps[r], source, columns[c], values[r, c])
+
+
+def kalshi_file_events(kalshi_csv, source=None):
+    """Events for every bucket price in a Kalshi minute file (prices in ¢)."""
+    kalshi_df = load_price_history(kalshi_csv)
+    return frame_events(kalshi_df, source or _source_name(kalshi_csv), bucket_columns(kalshi_df))
+
+
+def btc_file_events(btc_csv, fields=('close',), source='BTC'):
+    """Events for the chosen OHLC fields of a BTC_1min_*.csv file."""
+    btc = pd.read_csv(btc_csv, usecols=['timestamp', *fields])
+    btc['timestamp'] = pd.to_datetime(btc['timestamp']).dt.tz_localize(None)
+    if not btc['timestamp'].is_monotonic_increasing:
+        btc = btc.sort_values('timestamp', kind='stable')
+    return frame_events(btc, source, list(fields))
+
+
+def merge_events(sources):
+    """
+    k-way merge of time-ordered event iterators.
+
+    On equal timestamps, events from earlier sources in the list come first.
+    """
+    keyed = [((event.timestamp, priority, event) for event in source)
+             for priority, source in enumerate(sources)]
+    for _, _, event in heapq.merge(*keyed, key=lambda item: (item[0], item[1])):
+        yield event
+
+
+def as_hedge_source(events, kalshi_source, strike_column, btc_source='BTC', btc_field='close'):
+    """
+    Adapt a replay stream to the (timestamp, kind, value) events used by
+    hedge_stream.HedgeStreamEngine. Kalshi prices are converted to 0-1.
+    """
+    for event in events:
+        if event.source == kalshi_source and event.field == strike_column:
+            yield event.timestamp, 'kalshi', event.value / 100
+        elif event.source == btc_source and event.field == btc_field:
+            yield event.timestamp, 'btc', event.value
+
+
+@dataclass
+class ReplayStats:
+    """Throughput and lag figures for one replay run."""
+    events: int = 0
+    elapsed: float = 0.0
+    stream_seconds: float = 0.0
+    max_lag: float = 0.0
+    total_lag: float = 0.0
+
+    @property
+    def events_per_sec(self):
+        return self.events / self.elapsed if self.elapsed > 0 else float('inf')
+
+    @property
+    def mean_lag(self):
+        return self.total_lag / self.events if self.events else 0.0
+
+    def summary(self):
+        return (f"{self.events:,} events in {self.elapsed:.3f}s "
+                f"({self.events_per_sec:,.0f} events/sec, "
+                f"{self.stream_seconds / 86400:.2f} days of data), "
+                f"consumer lag mean {self.mean_lag * 1e3:.3f} ms / max {self.max_lag * 1e3:.3f} ms")
+
+
+class Replay:
+    """
+    Paced replay of merged event sources.
+
+    Args:
+        sources: List of time-ordered event iterators (e.g. kalshi_file_events)
+        speed: 1.0 for real time, N for N x accelerated, None for as fast as possible
+        clock: Monotonic clock in seconds (injectable for tests)
+        sleep: Sleep function matching time.sleep
+    """
+
+    def __init__(self, sources, speed=None, clock=time.perf_counter, sleep=time.sleep):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive or None")
+        self.sources = sources
+        self.speed = speed
+        self.clock = clock
+        self.sleep = sleep
+
+    def run(self, consumer, limit=None):
+        """
+        Deliver events to consumer(event) in time order.
+
+        Lag is measured after each consumer call as wall time past the event's
+        scheduled time. With speed=None every event is due immediately, so lag
+        is just the consumer's own latency.
+
+        Returns:
+            ReplayStats
+        """
+        stats = ReplayStats()
+        start_wall = self.clock()
+        first_ts = last_ts = None
+
+        for event in merge_events(self.sources):
+            if first_ts is None:
+                first_ts = event.timestamp
+            last_ts = event.timestamp
+
+            if self.speed is None:
+                due = self.clock()
+            else:
+                due = start_wall + (event.timestamp - first_ts) / 1e9 / self.speed
+                ahead = due - self.clock()
+                if ahead > 0:
+                    self.sleep(ahead)
+
+            consumer(event)
+            lag = self.clock() - due
+            stats.events += 1
+            stats.total_lag += lag
+            if lag > stats.max_lag:
+                stats.max_lag = lag
+            if limit is not None and stats.events >= limit:
+                break
+
+        stats.elapsed = self.clock() - start_wall
+        if first_ts is not None:
+            stats.stream_seconds = (last_ts - first_ts) / 1e9
+        return stats
+
+
+def main():
+    """Replay every Kalshi file in this repo as fast as possible"""
+    files = sorted(f for f in os.listdir('.') if f.startswith('kalshi-price-history-') and f.endswith('.csv'))
+    counts = {}
+
+    def consumer(event):
+        counts[event.source] = counts.get(event.source, 0) + 1
+
+    stats = Replay([kalshi_file_events(f) for f in files]).run(consumer)
+    print(stats.summary())
+    for source, count in sorted(counts.items()):
+        print(f"  {source:<30} {count:>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Snow Ladder Settlement
+======================
+Settles "Above X inches" snow ladders against ERA5 hourly data.
+
+The running cumulative snowfall path is compared against every threshold of
+the ladder at once (an hours x thresholds outer comparison), which gives both
+the final outcome and the first hour each threshold was crossed. Crossing
+times can then be joined against the minute price history for event studies.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ladders import bucket_columns, ladder_thresholds, load_price_history
+
+DEFAULT_EVENT_OFFSETS = (-120, -60, -30, 0, 30, 60, 120)
+
+
+def load_snow_hourly(era5_csv):
+    """Load an ERA5 hourly snow CSV (time, precipitation_inches, temperature_c, is_snow)."""
+    era5_df = pd.read_csv(era5_csv)
+    era5_df['time'] = pd.to_datetime(era5_df['time'])
+    return era5_df.sort_values('time', kind='stable').reset_index(drop=True)
+
+
+def cumulative_snowfall(era5_df):
+    """
+    Running cumulative snowfall path.
+
+    Only hours flagged is_snow count; if the flag is missing all precipitation
+    is treated as snow (same rule as analyze_snow_market).
+
+    Returns:
+        (times, cum_snow) as numpy arrays of equal length
+    """
+    precip = era5_df['precipitation_inches'].to_numpy(dtype=float)
+    if 'is_snow' in era5_df.columns:
+        precip = np.where(era5_df['is_snow'].to_numpy(dtype=bool), precip, 0.0)
+    precip = np.clip(np.nan_to_num(precip), 0.0, None)  # ERA5 accumulations can dip below 0
+    return era5_df['time'].to_numpy(), np.cumsum(precip)
+
+
+def threshold_crossings(times, cum_snow, thresholds):
+    """
+    Evaluate every threshold of a ladder against the cumulative path.
+
+    Args:
+        times: Hourly timestamps, shape (hours,)
+        cum_snow: Cumulative snowfall in inches, shape (hours,)
+        thresholds: Ladder thresholds in inches, shape (buckets,)
+
+    Returns:
+        DataFrame with one row per threshold: threshold, settled_yes,
+        first_crossing (NaT if never crossed)
+    """
+    thresholds = np.asarray(thresholds, dtype=float)
+    crossed = cum_snow[:, None] >= thresholds[None, :]
+    # The path never decreases, so any crossing means YES and the first True
+    # in each column is the crossing hour
+    settled = crossed.any(axis=0)
+    first_crossing = np.full(len(thresholds), np.datetime64('NaT'), dtype='datetime64[ns]')
+    if settled.any():
+        first_idx = crossed[:, settled].argmax(axis=0)
+        first_crossing[settled] = np.asarray(times, dtype='datetime64[ns]')[first_idx]
+
+    return pd.DataFrame({
+        'threshold': thresholds,
+        'settled_yes': settled,
+        'first_crossing': first_crossing,
+    })
+
+
+def settle_snow_ladder(kalshi_df, era5_df):
+    """
+    Settle every bucket of a snow ladder.
+
+    Parameters:
+    - kalshi_df: Price history from ladders.load_price_history
+    - era5_df: ERA5 hourly frame from load_snow_hourly
+
+    Returns:
+        DataFrame indexed by bucket name with threshold, settled_yes,
+        first_crossing, final_price and total_snow columns
+    """
+    buckets = bucket_columns(kalshi_df)
+    times, cum_snow = cumulative_snowfall(era5_df)
+    result = threshold_crossings(times, cum_snow, ladder_thresholds(buckets))
+    result.index = pd.Index(buckets, name='bucket')
+    result['final_price'] = kalshi_df[buckets].iloc[-1].to_numpy(dtype=float)
+    result['total_snow'] = cum_snow[-1] if len(cum_snow) else 0.0
+    return result
+
+
+def crossing_event_study(kalshi_df, settlement, offsets_minutes=DEFAULT_EVENT_OFFSETS):
+    """
+    As-of bucket prices around each threshold's first crossing.
+
+    All (bucket, offset) lookups are answered in one searchsorted pass over the
+    forward-filled price matrix.
+
+    Args:
+        kalshi_df: Price history from ladders.load_price_history
+        settlement: Output of settle_snow_ladder
+        offsets_minutes: Minutes relative to the crossing time to sample
+
+    Returns:
+        DataFrame (buckets x offsets) of prices in cents; NaN where the
+        threshold was never crossed or no price existed yet
+    """
+    buckets = list(settlement.index)
+    offsets = np.asarray(offsets_minutes, dtype='int64').astype('timedelta64[m]')
+    prices = kalshi_df[buckets].ffill().to_numpy(dtype=float)
+    stamps = kalshi_df['timestamp'].to_numpy(dtype='datetime64[ns]')
+
+    crossing = settlement['first_crossing'].to_numpy(dtype='datetime64[ns]')
+    query = crossing[:, None] + offsets[None, :]
+    rows = np.searchsorted(stamps, query, side='right') - 1
+    valid = (rows >= 0) & ~np.isnat(query)
+
+    cols = np.arange(len(buckets))[:, None]
+    out = np.where(valid, prices[np.clip(rows, 0, None), cols], np.nan)
+    return pd.DataFrame(out, index=settlement.index,
+                        columns=pd.Index(list(offsets_minutes), name='offset_min'))
+
+
+def main():
+    """Settle the NYC snow ladders in this repo"""
+    for kalshi_csv, era5_csv, name in [
+        ('kalshi-price-history-kxnycsnowm-26jan-minute.csv', 'NY_SNOW_ERA.csv', 'NYC Snowfall'),
+        ('kalshi-price-history-kxsnowstorm-26jannyc-minute.csv', 'NY_SSNOW_ERA.csv', 'NYC Snowstorm'),
+    ]:
+        kalshi_df = load_price_history(kalshi_csv)
+        settlement = settle_snow_ladder(kalshi_df, load_snow_hourly(era5_csv))
+        print(f"\n{'='*70}")
+        print(f"SETTLEMENT: {name} (total snow {settlement['total_snow'].iloc[0]:.2f} inches)")
+        print(f"{'='*70}")
+        print(settlement[['threshold', 'settled_yes', 'first_crossing', 'final_price']].to_string())
+        if settlement['settled_yes'].any():
+            print("\nPrices around first crossing (¢):")
+            print(crossing_event_study(kalshi_df, settlement).dropna(how='all').to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Stage Profiler
+==============
+Named stage timers for the backtest and analysis pipelines, so a slow run
+shows whether the time went to CSV parsing, merge_asof, the probability
+step, the signal loop, the P&L loop or writing results.
+
+Per stage it records calls, wall and CPU time and, optionally
+(memory=True), the tracemalloc peak above the stage's starting allocation
+plus the process peak RSS once the stage ends. One chosen stage can also be
+run under cProfile and dumped to a .prof file. A run's profile is written
+as JSON.
+
+Stages can be used as context managers or as checkpoints, which suits
+top-to-bottom scripts and notebook cells:
+
+    PROFILE = profiler_from_env('BTC_hedge_2024')
+    PROFILE.begin('load_csv')      # ends the previous checkpoint stage
+    ...
+    with PROFILE.stage('merge_asof'):
+        ...
+    PROFILE.finish()               # prints the table, writes JSON if asked
+
+Scripts get their profiler from environment variables, so nothing changes
+unless profiling is switched on:
+
+    KALSHI_PROFILE=1                 enable stage timing
+    KALSHI_PROFILE_MEMORY=1          add tracemalloc / RSS figures (slower)
+    KALSHI_PROFILE_JSON=path.json    where to write the profile
+                                     (default: profile-<run>.json)
+    KALSHI_PROFILE_CPROFILE=stage    run that stage under cProfile and dump
+                                     it to <run>-<stage>.prof
+
+When disabled, stage() returns a shared no-op context manager and begin(),
+end() and finish() return immediately.
+"""
+
+import cProfile
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@dataclass
+class StageStats:
+    """Accumulated figures for one stage (summed over calls)."""
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    traced_peak_bytes: int = None
+    traced_net_bytes: int = None
+    peak_rss_bytes: int = None
+
+
+class _OpenStage:
+    __slots__ = ('name', 'wall', 'cpu', 'traced_start', 'traced_peak', 'cprofile')
+
+    def __init__(self, name):
+        self.name = name
+        self.traced_start = self.traced_peak = 0
+        self.cprofile = None
+
+
+class StageProfiler:
+    """
+    Collects per-stage timings for one run.
+
+    Args:
+        run_name: Label used in the report and default output paths
+        enabled: When False every call is a no-op
+        memory: Also track tracemalloc allocations and peak RSS
+        cprofile_stage: Stage name to run under cProfile
+        json_path: Where finish() writes the profile (None: don't write)
+        cprofile_path: Where finish() dumps the cProfile stats (unused without cprofile_stage)
+    """
+
+    def __init__(self, run_name='run', enabled=True, memory=False, cprofile_stage=None,
+                 json_path=None, cprofile_path=None):
+        self.run_name = run_name
+        self.enabled = enabled
+        self.memory = memory and enabled
+        self.cprofile_stage = cprofile_stage
+        self.json_path = json_path
+        if cprofile_stage is None:
+            self.cprofile_path = None
+        else:
+            self.cprofile_path = cprofile_path or f'{run_name}-{cprofile_stage}.prof'
+        self.stages = {}
+        self._stack = []
+        self._checkpoint = None
+        self._cprofile = None
+        self._started = datetime.now(timezone.utc)
+        self._wall_start = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # -- memory bookkeeping -------------------------------------------------
+
+    def _sync_peak(self):
+        """Fold the tracemalloc peak so far into every open stage, then reset it."""
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            frame.traced_peak = max(frame.traced_peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    # -- opening and closing ------------------------------------------------
+
+    def _open(self, name):
+        if self._stack:
+            name = f'{self._stack[-1].name}/{name}'
+        frame = _OpenStage(name)
+        if self.memory:
+            frame.traced_start = frame.traced_peak = self._sync_peak()
+        if name == self.cprofile_stage or name.rsplit('/', 1)[-1] == self.cprofile_stage:
+            self._cprofile = self._cprofile or cProfile.Profile()
+            frame.cprofile = self._cprofile
+            frame.cprofile.enable()
+        self._stack.append(frame)
+        frame.cpu = time.process_time()
+        frame.wall = time.perf_counter()
+        return frame
+
+    def _close(self):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        frame = self._stack[-1]
+        if frame.cprofile is not None:
+            frame.cprofile.disable()
+
+        stats = self.stages.setdefault(frame.name, StageStats())
+        stats.calls += 1
+        stats.wall_seconds += wall - frame.wall
+        stats.cpu_seconds += cpu - frame.cpu
+        if self.memory:
+            current = self._sync_peak()
+            peak = frame.traced_peak - frame.traced_start
+            stats.traced_peak_bytes = max(stats.traced_peak_bytes or 0, peak)
+            stats.traced_net_bytes = (stats.traced_net_bytes or 0) + current - frame.traced_start
+            stats.peak_rss_bytes = _peak_rss_bytes()
+        self._stack.pop()
+
+    # -- public API ---------------------------------------------------------
+
+    def stage(self, name):
+        """Context manager timing one stage (nested stages are named outer/inner)."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name)
+
+    @contextlib.contextmanager
+    def _stage(self, name):
+        frame = self._open(name)
+        try:
+            yield
+        finally:
+            while self._stack and self._stack[-1] is not frame:
+                self._close()
+            self._close()
+
+    def begin(self, name):
+        """End the current checkpoint stage (if any) and start a new one."""
+        if not self.enabled:
+            return
+        self.end()
+        self._checkpoint = self._open(name)
+
+    def end(self):
+        """End the current checkpoint stage, and anything still open inside it."""
+        if not self.enabled or self._checkpoint is None:
+            return
+        while self._stack:
+            top = self._stack[-1]
+            self._close()
+            if top is self._checkpoint:
+                break
+        self._checkpoint = None
+
+    def report(self):
+        """The run's profile as a JSON-ready dict."""
+        return {
+            'run': self.run_name,
+            'started': self._started.isoformat(),
+            'wall_seconds': time.perf_counter() - self._wall_start,
+            'memory_tracked': self.memory,
+            'peak_rss_bytes': _peak_rss_bytes(),
+            'stages': {name: asdict(stats) for name, stats in self.stages.items()},
+        }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def summary(self):
+        """Plain-text table of the stages, slowest first."""
+        total = time.perf_counter() - self._wall_start
+        lines = [f"PROFILE: {self.run_name} ({total:.3f}s wall)",
+                 f"  {'Stage':<40} {'Calls':>6} {'Wall s':>9} {'CPU s':>9} {'Share':>7}"
+                 + (f" {'Peak MB':>9}" if self.memory else '')]
+        for name, s in sorted(self.stages.items(), key=lambda item: -item[1].wall_seconds):
+            line = (f"  {name:<40} {s.calls:>6} {s.wall_seconds:>9.3f} {s.cpu_seconds:>9.3f} "
+                    f"{s.wall_seconds / total if total else 0:>7.1%}")
+            if self.memory:
+                line += f" {s.traced_peak_bytes / 1e6:>9.1f}"
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def finish(self):
+        """Close open stages, print the table and write the JSON / cProfile outputs."""
+        if not self.enabled:
+            return
+        self.end()
+        while self._stack:
+            self._close()
+        print(self.summary())
+        if self.json_path:
+            self.write_json(self.json_path)
+            print(f"  Profile written to: {self.json_path}")
+        if self._cprofile is not None and self.cprofile_path:
+            self._cprofile.dump_stats(self.cprofile_path)
+            print(f"  cProfile stats for '{self.cprofile_stage}' written to: {self.cprofile_path}")
+
+
+def _env_flag(name):
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def profiler_from_env(run_name):
+    """StageProfiler configured from the KALSHI_PROFILE* environment variables."""
+    enabled = _env_flag('KALSHI_PROFILE')
+    return StageProfiler(
+        run_name,
+        enabled=enabled,
+        memory=_env_flag('KALSHI_PROFILE_MEMORY'),
+        cprofile_stage=os.environ.get('KALSHI_PROFILE_CPROFILE') or None,
+        json_path=os.environ.get('KALSHI_PROFILE_JSON') or (f'profile-{run_name}.json' if enabled else None),
+    )
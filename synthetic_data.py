@@ -0,0 +1,351 @@
+"""
+Synthetic Data Generators
+=========================
+Seeded stand-ins for the inputs the pipelines read, at production scale:
+
+- BTC_1min_*.csv style 1-minute BTC OHLC for a whole year
+- Kalshi minute price histories of multi-bucket BTC ladders ("$X or above")
+  and snow ladders ("Above X inches"), with rows only on active minutes and
+  empty cells like the real exports
+- ERA5 hourly temperature and snow series (the *_TEMP_ERA / *_SNOW_ERA layouts)
+- /series and /markets API catalogs with 100k+ markets, carrying the fields
+  the notebooks read (tickers, titles, open/close times, liquidity_dollars,
+  volume, open_interest, yes_bid/yes_ask, result, category, tags), and an
+  offline paginated API serving them
+- A year of STEP 5 style entries (events_by_entry_date) whose prices carry
+  a favourite-longshot bias, for the event strategy's sizing
+
+Same seed, same data. Prices follow the repo conventions: BTC in dollars,
+Kalshi in cents with two decimals, timestamps in naive UTC.
+"""
+
+import numpy as np
+import pandas as pd
+
+from hedge_backtest import calculate_actual_probability
+
+CATEGORIES = ['Climate and Weather', 'Crypto', 'Economics', 'Companies', 'Politics',
+              'Financials', 'Science and Technology', 'Sports', 'Entertainment']
+
+_TOPICS = {
+    'Climate and Weather': ['highest temperature in {city}', 'snowfall in {city}', 'rain in {city}',
+                            'hurricane landfall', 'lowest temperature in {city}'],
+    'Crypto': ['Bitcoin price', 'Bitcoin maximum price', 'Ethereum price', 'Solana price'],
+    'Economics': ['Fed decision', 'Jerome Powell remarks', 'FOMC rate cut', 'CPI inflation',
+                  'unemployment rate', 'GDP growth', 'federal reserve chair'],
+    'Companies': ['Tesla deliveries', 'Apple earnings', 'Nvidia market cap', 'OpenAI announcement'],
+    'Politics': ['mayor of {city}', 'Senate control', 'government shutdown', 'approval rating'],
+    'Financials': ['S&P 500 close', 'Nasdaq close', 'gold price', 'oil price', '10-year yield'],
+    'Science and Technology': ['SpaceX launch', 'AI model release', 'measles cases'],
+    'Sports': ['NBA finals', 'Super Bowl winner', 'World Series', 'Masters winner'],
+    'Entertainment': ['Oscars best picture', 'Billboard number one', 'box office opening'],
+}
+_CITIES = ['NYC', 'Chicago', 'Miami', 'Austin', 'Houston', 'LA', 'Philadelphia', 'Denver']
+
+
+def synthetic_btc_minutes(start='2024-01-01', days=366, spot=42000.0, volatility=0.60, seed=0):
+    """
+    One-minute BTC OHLC + volume, in the BTC_1min_*.csv layout.
+
+    Closes follow a zero-drift GBM at the given annual volatility; highs and
+    lows add a small intrabar excursion.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(days * 1440)
+    sigma = volatility / np.sqrt(365 * 1440)
+    log_returns = rng.normal(-0.5 * sigma**2, sigma, n)
+    close = spot * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate([[spot], close[:-1]])
+    excursion = np.abs(rng.normal(0, sigma, (2, n))) * close
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq='min'),
+        'open': open_,
+        'high': np.maximum(open_, close) + excursion[0],
+        'low': np.minimum(open_, close) - excursion[1],
+        'close': close,
+        'volume': rng.gamma(2.0, 5.0, n),
+    })
+
+
+def _sparse_prices(rng, fair_cents, row_rate, fill_rate, noise_cents):
+    """Quote fair values on random active minutes with empty cells."""
+    rows = np.flatnonzero(rng.random(len(fair_cents)) < row_rate)
+    fair = fair_cents[rows]
+    prices = np.round(np.clip(fair + rng.normal(0, noise_cents, fair.shape), 1, 99), 2)
+    prices[rng.random(prices.shape) >= fill_rate] = np.nan
+    # Make sure every active row quotes something
+    empty = np.flatnonzero(np.isnan(prices).all(axis=1))
+    column = rng.integers(0, prices.shape[1], len(empty))
+    prices[empty, column] = np.round(np.clip(fair[empty, column], 1, 99), 2)
+    return rows, prices
+
+
+def synthetic_btc_ladder(btc, strikes=(75000, 80000, 90000, 100000, 150000, 250000, 1000000),
+                         expiry='2024-12-31', volatility=0.60, row_rate=0.5, fill_rate=0.6,
+                         noise_cents=3.0, seed=1):
+    """
+    Kalshi minute history for a BTC strike ladder priced off `btc`.
+
+    Fair value is the terminal BSM probability at each minute; quotes add
+    noise, and only a share of minutes (row_rate) and cells (fill_rate) are
+    present, like the exports.
+
+    Returns:
+        DataFrame in the load_price_history layout ("$X or above" columns, ¢)
+    """
+    rng = np.random.default_rng(seed)
+    stamps = btc['timestamp'].to_numpy(dtype='datetime64[ns]')
+    days = (pd.Timestamp(expiry).value - stamps.astype(np.int64)) / 86400e9
+    spot = btc['close'].to_numpy(dtype=float)
+    fair = 100 * calculate_actual_probability(spot[:, None], np.asarray(strikes, dtype=float)[None, :],
+                                              days[:, None], volatility)
+    rows, prices = _sparse_prices(rng, fair, row_rate, fill_rate, noise_cents)
+    df = pd.DataFrame(prices, columns=[f'${k} or above' for k in strikes])
+    df.insert(0, 'timestamp', stamps[rows])
+    return df
+
+
+def synthetic_era5_temperature(start='2024-01-01', days=366, mean_f=60.0, seed=2):
+    """Hourly temperature in the *_TEMP_ERA.csv layout (time, temperature_f)."""
+    rng = np.random.default_rng(seed)
+    time = pd.date_range(start, periods=int(days * 24), freq='h')
+    hour = time.hour.to_numpy()
+    doy = time.dayofyear.to_numpy()
+    seasonal = -18 * np.cos(2 * np.pi * (doy - 15) / 365)
+    diurnal = -8 * np.cos(2 * np.pi * (hour - 3) / 24)
+    weather = np.cumsum(rng.normal(0, 0.6, len(time))) * 0.3
+    return pd.DataFrame({'time': time, 'temperature_f': mean_f + seasonal + diurnal + weather})
+
+
+def synthetic_era5_snow(start='2026-01-01', days=31, storm_rate=0.02, seed=3):
+    """
+    Hourly precipitation in the *_SNOW_ERA.csv layout
+    (time, precipitation_inches, temperature_c, is_snow).
+    """
+    rng = np.random.default_rng(seed)
+    time = pd.date_range(start, periods=int(days * 24), freq='h')
+    storming = np.convolve(rng.random(len(time)) < storm_rate, np.ones(18), mode='same') > 0
+    precip = np.where(storming, rng.gamma(1.5, 0.08, len(time)), 0.0)
+    temperature = -2 + 5 * np.sin(2 * np.pi * np.arange(len(time)) / (24 * 9)) + rng.normal(0, 1.5, len(time))
+    return pd.DataFrame({
+        'time': time,
+        'precipitation_inches': precip,
+        'temperature_c': temperature,
+        'is_snow': (temperature < 0.5) & (precip > 0),
+    })
+
+
+def synthetic_snow_ladder(era5_snow, thresholds=(0.1, 3, 6, 10, 15, 20, 25),
+                          row_rate=0.6, fill_rate=0.85, noise_cents=4.0, seed=4):
+    """
+    Kalshi minute history of a cumulative snow ladder ("Above X inches")
+    over the ERA5 period, with prices drifting towards each threshold's
+    eventual outcome.
+    """
+    rng = np.random.default_rng(seed)
+    hourly = np.where(era5_snow['is_snow'].to_numpy(dtype=bool),
+                      era5_snow['precipitation_inches'].to_numpy(dtype=float), 0.0)
+    total = hourly.sum()
+    minutes = pd.date_range(era5_snow['time'].iloc[0], era5_snow['time'].iloc[-1], freq='min')
+    progress = np.linspace(0, 1, len(minutes))[:, None]
+    thresholds = np.asarray(thresholds, dtype=float)
+    outcome = (total > thresholds).astype(float)[None, :]
+    prior = 100 * np.exp(-thresholds / 6)[None, :]
+    fair = prior * (1 - progress) + 100 * outcome * progress
+    rows, prices = _sparse_prices(rng, fair, row_rate, fill_rate, noise_cents)
+    df = pd.DataFrame(prices, columns=[f'Above {t:.1f} inches' for t in thresholds])
+    df.insert(0, 'timestamp', minutes.values[rows])
+    return df
+
+
+def synthetic_catalog(n_markets=120_000, n_series=3_000, start='2024-01-01', days=730, seed=5):
+    """
+    Series and market catalogs shaped like /series and /markets responses.
+
+    Returns:
+        (series, markets): lists of dicts; market times are ISO strings
+        ending in 'Z' and liquidity_dollars is a string, as in the API
+    """
+    rng = np.random.default_rng(seed)
+    series = []
+    for i in range(n_series):
+        category = CATEGORIES[rng.integers(len(CATEGORIES))]
+        topic = _TOPICS[category][rng.integers(len(_TOPICS[category]))].format(
+            city=_CITIES[rng.integers(len(_CITIES))])
+        series.append({
+            'ticker': f'KX{category[:3].upper()}{i:05d}',
+            'title': topic[0].upper() + topic[1:],
+            'category': category,
+            'tags': [category.split()[0], topic.split()[0].title()],
+            'frequency': ['daily', 'weekly', 'monthly', 'custom'][rng.integers(4)],
+        })
+
+    t0 = pd.Timestamp(start).value // 10**9
+    which = rng.integers(0, n_series, n_markets)
+    opens = t0 + rng.integers(0, days * 86400, n_markets)
+    durations = (rng.lognormal(np.log(5 * 86400), 1.2, n_markets)).astype(np.int64) + 3600
+    liquidity = np.round(rng.lognormal(np.log(20000), 2.0, n_markets), 2)
+    volume = rng.negative_binomial(1, 1e-4, n_markets)
+    open_interest = (volume * rng.random(n_markets)).astype(np.int64)
+    yes_bid = rng.integers(1, 99, n_markets)
+    spread = rng.integers(1, 6, n_markets)
+    results = np.array(['yes', 'no', ''])[rng.choice(3, n_markets, p=[0.3, 0.6, 0.1])]
+
+    def iso(seconds):
+        return pd.to_datetime(seconds, unit='s').strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    open_iso = iso(opens)
+    close_iso = iso(opens + durations)
+    markets = []
+    for j in range(n_markets):
+        s = series[which[j]]
+        event = f"{s['ticker']}-{open_iso[j][2:10].replace('-', '')}"
+        bid = int(yes_bid[j])
+        markets.append({
+            'ticker': f'{event}-B{j % 50}',
+            'event_ticker': event,
+            'series_ticker': s['ticker'],
+            'title': f"{s['title']} on {open_iso[j][:10]}?",
+            'subtitle': f'Bucket {j % 50}',
+            'category': s['category'],
+            'status': 'settled' if results[j] else 'active',
+            'open_time': open_iso[j],
+            'close_time': close_iso[j],
+            'liquidity_dollars': f'{liquidity[j]:.2f}',
+            'volume': int(volume[j]),
+            'open_interest': int(open_interest[j]),
+            'yes_bid': bid,
+            'yes_ask': min(bid + int(spread[j]), 99),
+            'no_bid': 100 - min(bid + int(spread[j]), 99),
+            'no_ask': 100 - bid,
+            'result': str(results[j]),
+        })
+    return series, markets
+
+
+def synthetic_event_entries(start='2024-01-01', days=365, events_per_day=8, bias=0.7, seed=6):
+    """
+    events_by_entry_date as built by STEP 5 of companies.ipynb / work.ipynb.
+
+    Multi-market events have one winning market, drawn from Dirichlet
+    probabilities; single markets resolve from a Beta probability. Quoted
+    prices are the true probabilities raised to `bias` and renormalised,
+    so favourites trade cheap and longshots dear.
+
+    Returns:
+        dict of date -> list of {'event_ticker', 'markets', 'entry_time',
+        'num_markets'}, with market dicts carrying ticker, yes/no bid/ask in
+        cents, result, close_time_dt and liquidity_dollars_float
+    """
+    rng = np.random.default_rng(seed)
+    entries = {}
+    for day in pd.date_range(start, periods=days, freq='D', tz='UTC'):
+        events = []
+        for k in range(rng.poisson(events_per_day)):
+            n = 1 if rng.random() < 0.4 else int(rng.integers(2, 9))
+            if n == 1:
+                prob = np.array([rng.beta(2, 2)])
+                quoted = prob ** bias / (prob ** bias + (1 - prob) ** bias)
+                won = rng.random(1) < prob
+            else:
+                prob = rng.dirichlet(np.full(n, 0.6))
+                quoted = prob ** bias / (prob ** bias).sum()
+                won = np.arange(n) == rng.choice(n, p=prob)
+            entry_time = day + pd.Timedelta(minutes=int(rng.integers(0, 1440)))
+            close_time = entry_time + pd.Timedelta(hours=float(rng.uniform(12, 24 * 14)))
+            event_ticker = f"KXSYN{k:02d}-{day:%y%b%d}".upper()
+            markets = []
+            for j in range(n):
+                bid = int(np.clip(np.round(quoted[j] * 100) - rng.integers(0, 2), 1, 98))
+                ask = bid + int(rng.integers(1, 3))
+                markets.append({
+                    'ticker': f'{event_ticker}-M{j}',
+                    'event_ticker': event_ticker,
+                    'yes_bid': bid,
+                    'yes_ask': ask,
+                    'no_bid': 100 - ask,
+                    'no_ask': 100 - bid,
+                    'result': 'yes' if won[j] else 'no',
+                    'close_time_dt': close_time,
+                    'liquidity_dollars_float': float(rng.lognormal(np.log(150000), 1.0)),
+                })
+            events.append({'event_ticker': event_ticker, 'markets': markets,
+                           'entry_time': entry_time, 'num_markets': n})
+        if events:
+            entries[day.date()] = events
+    return entries
+
+
+class SyntheticKalshiAPI:
+    """
+    Offline stand-in for the /series, /events and /markets endpoints, serving
+    a synthetic_catalog with the API's cursor pagination.
+
+    get() returns (status, json, retry_after) like exchange_crawler.KalshiClient.
+    The catalog is generated on first use in each process, so the object is
+    cheap to send to worker processes.
+    """
+
+    def __init__(self, n_markets=20_000, n_series=300, seed=5):
+        self.n_markets = n_markets
+        self.n_series = n_series
+        self.seed = seed
+        self._data = None
+
+    def __getstate__(self):
+        return {**self.__dict__, '_data': None}
+
+    def _catalog(self):
+        if self._data is None:
+            series, markets = synthetic_catalog(self.n_markets, self.n_series, seed=self.seed)
+            by_series, events = {}, {}
+            for market in markets:
+                by_series.setdefault(market['series_ticker'], []).append(market)
+                events.setdefault(market['series_ticker'], {}).setdefault(market['event_ticker'], {
+                    'event_ticker': market['event_ticker'],
+                    'series_ticker': market['series_ticker'],
+                    'title': market['title'],
+                    'category': market['category'],
+                })
+            self._data = (series, by_series, {k: list(v.values()) for k, v in events.items()})
+        return self._data
+
+    def get(self, path, params):
+        series, markets, events = self._catalog()
+        params = params or {}
+        if path == '/series':
+            records, key = series, 'series'
+        elif path == '/events':
+            records, key = events.get(params.get('series_ticker'), []), 'events'
+        elif path == '/markets':
+            records, key = markets.get(params.get('series_ticker'), []), 'markets'
+            if params.get('status'):
+                records = [m for m in records if m['status'] == params['status']]
+        else:
+            return 404, None, None
+        start = int(params.get('cursor') or 0)
+        end = start + int(params.get('limit', 100))
+        return 200, {key: records[start:end], 'cursor': str(end) if end < len(records) else ''}, None
+
+
+def main():
+    """Generate one year of every input and summarise it"""
+    btc = synthetic_btc_minutes()
+    ladder = synthetic_btc_ladder(btc)
+    era5 = synthetic_era5_temperature()
+    snow_era5 = synthetic_era5_snow()
+    snow = synthetic_snow_ladder(snow_era5)
+    series, markets = synthetic_catalog()
+
+    print(f"  BTC minutes:   {len(btc):>9,} rows, close {btc['close'].iloc[0]:,.0f} -> {btc['close'].iloc[-1]:,.0f}")
+    for name, df in [('BTC ladder', ladder), ('Snow ladder', snow)]:
+        empty = df.iloc[:, 1:].isna().mean()
+        print(f"  {name + ':':<14} {len(df):>9,} rows x {df.shape[1] - 1} buckets, "
+              f"empty cells {empty.min():.0%}-{empty.max():.0%}")
+    print(f"  ERA5 hourly:   {len(era5):>9,} rows, {era5['temperature_f'].min():.0f}-{era5['temperature_f'].max():.0f}°F")
+    print(f"  ERA5 snow:     {len(snow_era5):>9,} rows, {snow_era5['precipitation_inches'].where(snow_era5['is_snow'], 0).sum():.1f} in of snow")
+    print(f"  Catalog:       {len(markets):>9,} markets in {len(series):,} series")
+
+
+if __name__ == "__main__":
+    main()
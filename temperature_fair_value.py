@@ -0,0 +1,326 @@
+"""
+Intraday Fair Value of Daily-High Temperature Buckets
+=====================================================
+KXHIGH* markets trade all day while the high is still being set.
+compare_kalshi_vs_era5.py only checks the final prices against the realised
+maximum. This module prices every bucket at every minute:
+
+    final high = running max so far + remaining rise
+
+The remaining rise is drawn from its empirical distribution for the current
+hour of the day. For each complete day of historical hourly ERA5 that
+distribution is (day max - max of hours 0..h), per local hour h. A bucket's
+fair probability is then
+
+    P(lower <= M + R < upper) = F_h(upper - M) - F_h(lower - M)
+
+where M is the running max, R the rise and F_h(x) = P(R < x) is the
+empirical CDF. Buckets are inclusive whole degrees, so "65° to 66°" covers
+[64.5, 66.5), the same convention as ladder_distribution.py.
+
+Days run midnight to midnight in local standard time (the NWS climate day),
+from the UTC ERA5 and Kalshi timestamps shifted by each city's UTC offset.
+The observation for hour h counts from h:00. Minutes before the market day
+starts have no running max and are left NaN. After the last hour the rise
+is zero, so the prices settle to 0/1.
+
+The per-hour distributions of every city are cached together as one sorted
+array of (city, hour, rise) keys. All minutes x buckets x cities are then
+priced with a single searchsorted, with no loop over rows. The cache is
+rebuilt only after add_history() changes a city's history. History should
+come from the same season as the markets it prices; the diurnal rise of a
+July day is not that of a December day.
+"""
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from dataset_registry import load_dataset
+from ladders import bucket_bounds, bucket_columns
+
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+
+# city -> (Kalshi minute history, ERA5 hourly temperature, market day, UTC offset of local standard time)
+CITIES = {
+    'Los Angeles': ('kalshi-price-history-kxhighlax-25dec15-minute.csv', 'LA_TEMP_ERA.csv', '2025-12-15', -8),
+    'Miami': ('kalshi-price-history-kxhighmia-25dec15-minute.csv', 'MIA_TEMP_ERA.csv', '2025-12-15', -5),
+    'New York City': ('kalshi-price-history-kxhighny-25dec15-minute.csv', 'NY_TEMP_ERA.csv', '2025-12-15', -5),
+    'Austin': ('kalshi-price-history-kxhighaus-25jul26-minute.csv', 'AUS_TEMP_ERA.csv', '2025-07-26', -6),
+    'Chicago': ('kalshi-price-history-kxhighchi-25jul26-minute.csv', 'CHI_TEMP_ERA.csv', '2025-07-26', -6),
+    'Houston': ('kalshi-price-history-kxhighhou-25jul26-minute.csv', 'HOU_TEMP_ERA.csv', '2025-07-26', -6),
+}
+
+
+@dataclass
+class TemperatureMarket:
+    """One KXHIGH* market day."""
+    city: str
+    kalshi: pd.DataFrame          # load_price_history layout, bucket columns in cents
+    observations: pd.DataFrame    # hourly ERA5 (time, temperature_f) covering the market day
+    date: str                     # local market day, e.g. '2025-07-26'
+    utc_offset_hours: float = 0
+
+
+def daily_hours(era5, utc_offset_hours=0):
+    """
+    Hourly temperatures as a (days x 24) local-time matrix.
+
+    Returns:
+        (days, temps): datetime64 local days, and temps with NaN for missing hours
+    """
+    local = pd.to_datetime(era5['time']) + pd.Timedelta(hours=utc_offset_hours)
+    days, day_index = np.unique(local.dt.normalize().to_numpy(dtype='datetime64[ns]'), return_inverse=True)
+    temps = np.full((len(days), 24), np.nan)
+    temps[day_index, local.dt.hour.to_numpy()] = era5['temperature_f'].to_numpy(dtype=float)
+    return days, temps
+
+
+def remaining_rise(temps):
+    """
+    Day max minus the running max after each hour, for the complete days.
+
+    Args:
+        temps: Array (days, 24) from daily_hours
+
+    Returns:
+        Array (complete days, 24), zero in the last hour
+    """
+    complete = temps[~np.isnan(temps).any(axis=1)]
+    return complete.max(axis=1, keepdims=True) - np.maximum.accumulate(complete, axis=1)
+
+
+def bucket_edges(columns):
+    """
+    Half-open [lower, upper) edges of each bucket in °F.
+
+    Returns:
+        (lower, upper) arrays with -inf / inf for the open-ended buckets
+    """
+    bounds = bucket_bounds(columns)
+    lower = np.array([-np.inf if bounds[c][0] is None else bounds[c][0] - 0.5 for c in columns])
+    upper = np.array([np.inf if bounds[c][1] is None else bounds[c][1] + 0.5 for c in columns])
+    return lower, upper
+
+
+def settled_bucket(columns, day_max):
+    """Bucket header a daily high settles in (None if no bucket covers it)."""
+    lower, upper = bucket_edges(columns)
+    hit = np.flatnonzero((lower <= day_max) & (day_max < upper))
+    return columns[hit[0]] if len(hit) else None
+
+
+class FairValueEngine:
+    """
+    Bucket fair values from running max + empirical remaining rise.
+
+    Example:
+        engine = FairValueEngine()
+        engine.add_history('Austin', era5_history, utc_offset_hours=-6)
+        fair = engine.fair_values([TemperatureMarket('Austin', kalshi, era5, '2025-07-26', -6)])
+    """
+
+    def __init__(self, min_days=30):
+        self.min_days = min_days
+        self._rises = {}    # city -> (days, 24) remaining rises
+        self._table = None  # cached (cities, keys, starts, width), dropped when a history changes
+
+    @property
+    def cities(self):
+        return list(self._rises)
+
+    def add_history(self, city, era5, utc_offset_hours=0):
+        """Set a city's rise distribution from hourly ERA5 (time, temperature_f)."""
+        _, temps = daily_hours(era5, utc_offset_hours)
+        rises = remaining_rise(temps)
+        if len(rises) < self.min_days:
+            raise ValueError(f"{city}: {len(rises)} complete days of history, need {self.min_days}")
+        self._rises[city] = rises
+        self._table = None
+
+    def _distributions(self):
+        """
+        Sorted samples of every (city, hour) as one key array.
+
+        Group g = city * 24 + hour is shifted to [g * width, g * width + max
+        rise], so a single searchsorted answers any mix of groups.
+        """
+        if self._table is None:
+            cities = self.cities
+            if not cities:
+                raise ValueError("no history added")
+            width = np.ceil(max(r.max() for r in self._rises.values())) + 2.0
+            samples = [np.sort(self._rises[c][:, h]) + (i * 24 + h) * width
+                       for i, c in enumerate(cities) for h in range(24)]
+            sizes = np.array([len(s) for s in samples])
+            starts = np.concatenate([[0], np.cumsum(sizes)])
+            self._table = ({c: i for i, c in enumerate(cities)}, np.concatenate(samples), starts, width)
+        return self._table
+
+    def rise_cdf(self, group, value):
+        """
+        P(R < value) for rise distribution group(s) city * 24 + hour.
+
+        Args:
+            group: Integer array of groups
+            value: Float array broadcastable with group
+
+        Returns:
+            Array of probabilities (NaN where value is NaN)
+        """
+        _, keys, starts, width = self._distributions()
+        group, value = np.broadcast_arrays(np.asarray(group), np.asarray(value, dtype=float))
+        # Rises lie in [0, width - 2]: clipping keeps every query inside its own group
+        clipped = np.clip(np.nan_to_num(value, nan=0.0), -0.5, width - 1.0)
+        below = np.searchsorted(keys, group * width + clipped, side='left') - starts[group]
+        counts = starts[group + 1] - starts[group]
+        return np.where(np.isnan(value), np.nan, below / counts)
+
+    def _market_rows(self, market, city_index):
+        """Minute grid, running max, rise group and bucket edges of one market."""
+        columns = bucket_columns(market.kalshi)
+        stamps = market.kalshi['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        first = stamps[0] - stamps[0] % NS_PER_MINUTE
+        minutes = np.arange(first, stamps[-1] + 1, NS_PER_MINUTE)
+
+        date = pd.Timestamp(market.date)
+        days, temps = daily_hours(market.observations, market.utc_offset_hours)
+        today = temps[days == date.to_datetime64()]
+        running = np.fmax.accumulate(today[0]) if len(today) else np.full(24, np.nan)
+
+        day_start = (date - pd.Timedelta(hours=market.utc_offset_hours)).value
+        hour = (minutes - day_start) // NS_PER_HOUR
+        hour_clipped = np.clip(hour, 0, 23)
+        running_max = np.where(hour >= 0, running[hour_clipped], np.nan)
+        lower, upper = bucket_edges(columns)
+        return columns, minutes, running_max, city_index * 24 + hour_clipped, lower, upper
+
+    def fair_values(self, markets):
+        """
+        Fair probability of every bucket at every minute of every market.
+
+        The minutes of all markets are stacked into one (rows x buckets)
+        problem and priced with two rise_cdf calls.
+
+        Args:
+            markets: TemperatureMarket list; each city needs add_history first
+
+        Returns:
+            Dict of city -> DataFrame with timestamp, running_max and one 0-1
+            column per bucket, over every minute from the first to the last
+            Kalshi timestamp
+        """
+        index, _, _, _ = self._distributions()
+        rows = [self._market_rows(m, index[m.city]) for m in markets]
+        n_buckets = max(len(r[0]) for r in rows)
+
+        def stack(position, fill):
+            return np.concatenate([np.pad(r[position].astype(float)[None, :].repeat(len(r[1]), axis=0),
+                                          ((0, 0), (0, n_buckets - len(r[0]))), constant_values=fill)
+                                   for r in rows])
+
+        running_max = np.concatenate([r[2] for r in rows])[:, None]
+        group = np.concatenate([r[3] for r in rows])[:, None]
+        lower, upper = stack(4, np.nan), stack(5, np.nan)
+        fair = self.rise_cdf(group, upper - running_max) - self.rise_cdf(group, lower - running_max)
+
+        result, lo = {}, 0
+        for market, (columns, minutes, running, _, _, _) in zip(markets, rows):
+            hi = lo + len(minutes)
+            frame = pd.DataFrame(fair[lo:hi, :len(columns)], columns=columns)
+            frame.insert(0, 'running_max', running)
+            frame.insert(0, 'timestamp', minutes.astype('datetime64[ns]'))
+            result[market.city] = frame
+            lo = hi
+        return result
+
+
+def mispricing(kalshi, fair):
+    """
+    Fair minus market probability per bucket, the analog of the BTC signal.
+
+    Kalshi prices are forward-filled onto the fair-value minutes (0-1).
+    """
+    columns = bucket_columns(kalshi)
+    market = kalshi.copy()
+    market[columns] = market[columns].ffill() / 100
+    market['timestamp'] = market['timestamp'].astype('datetime64[ns]')
+    merged = pd.merge_asof(fair[['timestamp']], market, on='timestamp', direction='backward')
+    out = fair[['timestamp']].copy()
+    out[columns] = fair[columns].to_numpy() - merged[columns].to_numpy(dtype=float)
+    return out
+
+
+def _history(era5_csv, utc_offset_hours, min_days, seed):
+    """The city's ERA5 if it has enough complete days, else a synthetic year of it."""
+    from synthetic_data import synthetic_era5_temperature
+
+    era5 = load_dataset(era5_csv)
+    _, temps = daily_hours(era5, utc_offset_hours)
+    if len(remaining_rise(temps)) >= min_days:
+        return era5, utc_offset_hours, 'ERA5'
+    # synthetic_era5_temperature is already in local time (afternoon peak)
+    synthetic = synthetic_era5_temperature(days=365, mean_f=era5['temperature_f'].mean(), seed=seed)
+    return synthetic, 0, 'synthetic'
+
+
+def main():
+    """Fair values of every KXHIGH* market in the repo, against the market and the outcome"""
+    import time
+
+    engine = FairValueEngine()
+    markets = []
+    for seed, (city, (kalshi_csv, era5_csv, date, offset)) in enumerate(CITIES.items()):
+        if not os.path.exists(kalshi_csv):
+            continue
+        history, history_offset, source = _history(era5_csv, offset, engine.min_days, seed=30 + seed)
+        engine.add_history(city, history, history_offset)
+        markets.append(TemperatureMarket(city, load_dataset(kalshi_csv), load_dataset(era5_csv), date, offset))
+        print(f"  {city}: rise distribution from {source} history")
+
+    start = time.perf_counter()
+    fair = engine.fair_values(markets)
+    elapsed = time.perf_counter() - start
+    cells = sum(f.shape[0] * (f.shape[1] - 2) for f in fair.values())
+    print(f"\n  {cells:,} minute x bucket fair values for {len(markets)} cities in {elapsed * 1000:.1f} ms")
+
+    # Spot check a few rows against a direct empirical probability
+    frame = fair[markets[0].city]
+    rises = engine._rises[markets[0].city]
+    lower, upper = bucket_edges(bucket_columns(markets[0].kalshi))
+    day_start = pd.Timestamp(markets[0].date) - pd.Timedelta(hours=markets[0].utc_offset_hours)
+    for i in range(0, len(frame), max(1, len(frame) // 7)):
+        m = frame['running_max'].iloc[i]
+        if np.isnan(m):
+            continue
+        h = int(np.clip((frame['timestamp'].iloc[i] - day_start) // pd.Timedelta(hours=1), 0, 23))
+        direct = ((lower[None, :] <= m + rises[:, h, None]) & (m + rises[:, h, None] < upper[None, :])).mean(axis=0)
+        assert np.allclose(frame.iloc[i, 2:].to_numpy(dtype=float), direct)
+
+    for market in markets:
+        frame = fair[market.city]
+        columns = bucket_columns(market.kalshi)
+        days, temps = daily_hours(market.observations, market.utc_offset_hours)
+        day_max = np.nanmax(temps[days == pd.Timestamp(market.date).to_datetime64()])
+        outcome = settled_bucket(columns, day_max)
+        gap = mispricing(market.kalshi, frame)
+        local = frame['timestamp'] + pd.Timedelta(hours=market.utc_offset_hours)
+        print(f"\n{market.city} {market.date}: ERA5 high {day_max:.1f}°F -> {outcome}")
+        print(f"  {'local time':<12}{'run max':>8}{'fair':>7}{'market':>8}{'fair-mkt':>9}   (settling bucket)")
+        for clock in ('10:00', '13:00', '16:00', '19:00'):
+            at = pd.Timestamp(f"{market.date} {clock}")
+            i = np.searchsorted(local.to_numpy(), at.to_datetime64())
+            # Skip clock times outside the market's data rather than print a later row under them
+            if at < local.iloc[0] or i >= len(frame) or np.isnan(frame['running_max'].iloc[i]):
+                continue
+            fair_p = frame[outcome].iloc[i]
+            diff = gap[outcome].iloc[i]
+            print(f"  {clock:<12}{frame['running_max'].iloc[i]:>8.1f}{fair_p:>7.2f}"
+                  f"{fair_p - diff:>8.2f}{diff:>+9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Walk-Forward Optimisation of Hedge Parameters
+=============================================
+The thresholds in BTC_hedge_2024.py (0.25/0.15/0.05) and
+BTC_hedge_082025_12_2025.py (0.15/0.05/0.02) were picked in-sample. This
+module slices a merged BTC/Kalshi minute frame into rolling (or expanding)
+train/test folds, picks the best volatility and threshold set on each train
+fold, and scores that choice on the following test fold only. The test
+folds are stitched into one out-of-sample P&L series.
+
+Preprocessing is done once: BSM probabilities for every volatility in the
+grid are computed over the whole series up front, and folds only slice
+those arrays. Each fold evaluates every threshold set at once as the columns
+of a (minutes x sets) matrix (ladder_hedge.ladder_signals handles per-column
+thresholds), in chunks to bound memory. Folds are independent and can be
+spread over a process pool; the shared arrays are sent to each worker once.
+
+Per fold the numbers follow hedge_backtest.run_backtest on that slice: the
+position starts flat, each signal change pays one Kalshi fee and the last
+position is closed at the fold's final price.
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from hedge_backtest import HedgeConfig, NS_PER_DAY, calculate_actual_probability, days_to_expiry
+from kalshi_fees import kalshi_fee
+from ladder_hedge import ladder_signals
+
+
+def threshold_grid(strong, weak, neutral):
+    """
+    Every (strong, weak, neutral) combination with neutral <= weak <= strong.
+
+    Returns:
+        Array (sets, 3)
+    """
+    combos = [c for c in itertools.product(strong, weak, neutral) if c[2] <= c[1] <= c[0]]
+    return np.array(combos, dtype=float).reshape(-1, 3)
+
+
+def walk_forward_folds(timestamps, train_days, test_days, step_days=None, expanding=False):
+    """
+    Row ranges of rolling train/test folds.
+
+    Parameters:
+    - timestamps: Sorted datetime64 values or int64 nanoseconds
+    - train_days / test_days: Fold lengths in days
+    - step_days: How far each fold moves on (default: test_days, so test
+      folds tile the series without overlap)
+    - expanding: Keep every train fold anchored at the first row
+
+    Returns:
+        List of (train_start, train_end, test_start, test_end) row indices,
+        end-exclusive
+    """
+    stamps = np.asarray(timestamps).astype('datetime64[ns]').astype(np.int64)
+    step_ns = int((step_days or test_days) * NS_PER_DAY)
+    train_ns = int(train_days * NS_PER_DAY)
+    test_ns = int(test_days * NS_PER_DAY)
+
+    folds = []
+    cut = stamps[0] + train_ns
+    while cut < stamps[-1]:
+        start = stamps[0] if expanding else cut - train_ns
+        rows = np.searchsorted(stamps, [start, cut, cut + test_ns])
+        if rows[1] > rows[0] and rows[2] > rows[1]:
+            folds.append((int(rows[0]), int(rows[1]), int(rows[1]), int(rows[2])))
+        cut += step_ns
+    return folds
+
+
+def evaluate_thresholds(mispricing, prices, thresholds, contracts, max_chunk_elements=4_000_000):
+    """
+    Strategy C Kalshi P&L of many threshold sets over one slice.
+
+    Args:
+        mispricing: Model minus market probability, shape (minutes,)
+        prices: Kalshi prices (0-1), shape (minutes,)
+        thresholds: Array (sets, 3) of strong, weak, neutral
+
+    Returns:
+        (pnl_after_fees, total_fees, num_trades), each shape (sets,)
+    """
+    n = len(prices)
+    moves = np.diff(prices, prepend=prices[:1])[:, None] * contracts
+    fees_here = kalshi_fee(prices, contracts)[:, None]
+    chunk = max(1, max_chunk_elements // max(n, 1))
+
+    pnl, fees, trades = [], [], []
+    for lo in range(0, len(thresholds), chunk):
+        strong, weak, neutral = thresholds[lo:lo + chunk].T
+        m = np.broadcast_to(mispricing[:, None], (n, len(strong)))
+        signal = ladder_signals(m, strong, weak, neutral)
+        held = np.vstack([np.zeros((1, signal.shape[1]), dtype=signal.dtype), signal[:-1]])
+        traded = signal != held
+        fee = np.where(traded, fees_here, 0.0).sum(axis=0)
+        pnl.append((held * moves).sum(axis=0) - fee)
+        fees.append(fee)
+        trades.append(traded.sum(axis=0))
+    return np.concatenate(pnl), np.concatenate(fees), np.concatenate(trades)
+
+
+_SHARED = {}
+
+
+def _init_worker(probabilities, prices, btc):
+    _SHARED['probabilities'] = probabilities
+    _SHARED['prices'] = prices
+    _SHARED['btc'] = btc
+
+
+def _run_fold(args):
+    """Optimise on the train rows, then score the winner on the test rows."""
+    (train_start, train_end, test_start, test_end), volatilities, thresholds, contracts, initial_capital = args
+    probabilities, prices, btc = _SHARED['probabilities'], _SHARED['prices'], _SHARED['btc']
+
+    train = slice(train_start, train_end)
+    scores = np.stack([
+        evaluate_thresholds(probabilities[v, train] - prices[train], prices[train], thresholds, contracts)[0]
+        for v in range(len(volatilities))
+    ])
+    v, t = np.unravel_index(np.argmax(scores), scores.shape)
+
+    test = slice(test_start, test_end)
+    test_prices = prices[test]
+    mispricing = probabilities[v, test] - test_prices
+    signal = ladder_signals(mispricing[:, None], *thresholds[t])[:, 0]
+    held = np.concatenate([[0], signal[:-1]])
+    traded = signal != held
+    fees = np.where(traded, kalshi_fee(test_prices, contracts), 0.0)
+    minute_pnl = held * np.diff(test_prices, prepend=test_prices[:1]) * contracts - fees
+
+    test_btc = btc[test]
+    summary = {
+        'volatility': volatilities[v],
+        'strong_threshold': thresholds[t, 0],
+        'weak_threshold': thresholds[t, 1],
+        'neutral_threshold': thresholds[t, 2],
+        'train_pnl': scores[v, t],
+        'test_pnl': minute_pnl.sum(),
+        'test_fees': fees.sum(),
+        'test_trades': int(traded.sum()),
+        'test_strategy_a_pnl': initial_capital * (test_btc[-1] - test_btc[0]) / test_btc[0],
+    }
+    return summary, minute_pnl
+
+
+def walk_forward(df, config=None, volatilities=(0.45, 0.60, 0.75), thresholds=None,
+                 train_days=60, test_days=14, step_days=None, expanding=False, n_workers=1):
+    """
+    Walk-forward optimisation of volatility and thresholds.
+
+    Parameters:
+    - df: Output of hedge_backtest.merge_btc_kalshi
+    - config: HedgeConfig for strike, expiry, contracts and capital
+    - volatilities: Volatility grid
+    - thresholds: Array (sets, 3) from threshold_grid (default: a grid around
+      both scripts' settings)
+    - train_days / test_days / step_days / expanding: Fold layout, see
+      walk_forward_folds
+    - n_workers: Processes to spread folds over (1 = run in-process)
+
+    Returns:
+        (folds, oos_pnl) where folds has one row per fold with the chosen
+        parameters and train/test figures, and oos_pnl is the stitched
+        per-minute out-of-sample Kalshi P&L (after fees) on the test rows
+    """
+    config = config or HedgeConfig()
+    if thresholds is None:
+        thresholds = threshold_grid(strong=[0.10, 0.15, 0.20, 0.25, 0.30],
+                                    weak=[0.05, 0.10, 0.15],
+                                    neutral=[0.02, 0.05])
+    thresholds = np.asarray(thresholds, dtype=float)
+    volatilities = [float(v) for v in volatilities]
+
+    stamps = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    prices = df['market_price'].to_numpy(dtype=float)
+    btc = df['btc_price'].to_numpy(dtype=float)
+    days = days_to_expiry(stamps, config.expiry_ns)
+    probabilities = np.stack([calculate_actual_probability(btc, config.strike, days, vol)
+                              for vol in volatilities])
+
+    folds = walk_forward_folds(stamps, train_days, test_days, step_days, expanding)
+    if not folds:
+        raise ValueError("data too short for one train/test fold")
+    jobs = [(fold, volatilities, thresholds, config.contracts, config.initial_capital) for fold in folds]
+    if n_workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(probabilities, prices, btc)) as pool:
+            results = list(pool.map(_run_fold, jobs))
+    else:
+        _init_worker(probabilities, prices, btc)
+        results = [_run_fold(job) for job in jobs]
+
+    timestamps = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+    rows, pieces = [], []
+    for (train_start, train_end, test_start, test_end), (summary, minute_pnl) in zip(folds, results):
+        rows.append({
+            'train_start': timestamps[train_start], 'train_end': timestamps[train_end - 1],
+            'test_start': timestamps[test_start], 'test_end': timestamps[test_end - 1],
+            **summary,
+        })
+        pieces.append(pd.Series(minute_pnl, index=pd.DatetimeIndex(timestamps[test_start:test_end])))
+
+    oos_pnl = pd.concat(pieces)
+    # Overlapping test folds (step_days < test_days): keep the latest fold's minutes
+    oos_pnl = oos_pnl[~oos_pnl.index.duplicated(keep='last')].rename('kalshi_pnl_c')
+    return pd.DataFrame(rows), oos_pnl
+
+
+def main():
+    """Walk-forward the 2025 August max market (needs BTC_1min_2025.csv)"""
+    from hedge_backtest import load_btc_minutes, load_kalshi_strike, merge_btc_kalshi
+
+    config = HedgeConfig(strike=130000, expiry='2025-08-31')
+    kalshi = load_kalshi_strike('kalshi-price-history-kxbtcmaxm-aug25-minute.csv', '$130000 or above')
+    df = merge_btc_kalshi(load_btc_minutes('BTC_1min_2025.csv'), kalshi)
+    folds, oos_pnl = walk_forward(df, config, train_days=7, test_days=3, n_workers=4)
+    print(folds.to_string())
+    print(f"\n  Out-of-sample Kalshi P&L (after fees): ${oos_pnl.sum():,.2f}")
+
+
+if __name__ == "__main__":
+    main()